@@ -1,7 +1,16 @@
 # app/cli.py
+# The pipelines (LangChain, FAISS, Ollama and GitPython) are imported by the
+# commands that use them, so --help and the light commands start quickly
 import typer
-from src.pipeline.indexing import IndexingPipeline
-from src.pipeline.querying import QueryPipeline
+from typing import Optional
+from config.settings import (
+    QUERY_SERVER_HOST,
+    QUERY_SERVER_PORT,
+    QUERY_SERVER_URL,
+    INDEX_CACHE_MAX_BYTES,
+    TRACE_LOG_PATH,
+    WARM_UP_MODELS,
+)
 import time
 
 app = typer.Typer()
@@ -10,6 +19,8 @@ app = typer.Typer()
 @app.command()
 def index(github_url: str):
     """Indexes a GitHub repository: clones, chunks, and vectorizes it."""
+    from src.pipeline.indexing import IndexingPipeline
+
     typer.echo(f"🚀 Starting indexing for: {github_url}")
     start_time = time.time()
     pipeline = IndexingPipeline(github_url)
@@ -20,10 +31,93 @@ def index(github_url: str):
 
 
 @app.command()
-def query(github_url: str):
+def reenrich(
+    github_url: str,
+    force: bool = typer.Option(
+        False, help="Retry every queued chunk now, ignoring backoff and attempt limits."
+    ),
+):
+    """Retries the chunks of an indexed repository whose enrichment failed."""
+    from src.pipeline.indexing import IndexingPipeline
+
+    typer.echo(f"🔁 Retrying failed enrichments for: {github_url}")
+    IndexingPipeline(github_url).reenrich(force=force)
+
+
+@app.command("export")
+def export_index(
+    github_url: str,
+    output: Optional[str] = typer.Option(
+        None, help="Bundle path (default: <repo>.bundle.tar.gz)."
+    ),
+):
+    """Packages the index of a repository into a portable bundle."""
+    from src.utils.bundle import export_bundle
+
+    repo_name = github_url.split("/")[-1]
+    try:
+        manifest = export_bundle(repo_name, output)
+    except FileNotFoundError as e:
+        typer.echo(f"Error: {e}")
+        raise typer.Exit(1)
+    typer.echo(
+        f"📦 Exported {manifest['generation']} of {repo_name} "
+        f"(commit {(manifest['commit'] or 'unknown')[:12]}, "
+        f"{len(manifest['files'])} files)."
+    )
+
+
+@app.command("import")
+def import_index(
+    bundle_path: str,
+    force: bool = typer.Option(
+        False, help="Import even if the bundle was built with other settings."
+    ),
+):
+    """Installs an exported index bundle; the next 'index' run continues from it."""
+    import tarfile
+    from src.utils.bundle import import_bundle
+
+    try:
+        manifest, generation = import_bundle(bundle_path, force=force)
+    except (ValueError, OSError, tarfile.TarError) as e:
+        typer.echo(f"Error: {e}")
+        raise typer.Exit(1)
+    typer.echo(
+        f"📦 Imported {manifest['repo']} at commit "
+        f"{(manifest['commit'] or 'unknown')[:12]} as {generation}."
+    )
+
+
+@app.command()
+def query(
+    github_url: str,
+    server: Optional[str] = typer.Option(
+        QUERY_SERVER_URL, help="Query server URL; answers come from the server if set."
+    ),
+    trace: bool = typer.Option(False, help="Show where each answer's time went."),
+    trace_log: Optional[str] = typer.Option(
+        TRACE_LOG_PATH, help="JSONL file each query's trace is appended to."
+    ),
+    warm_up: bool = typer.Option(
+        WARM_UP_MODELS, help="Load the models in the background while the index loads."
+    ),
+):
     """Starts an interactive query session for an indexed repository."""
+    from src.utils.tracing import format_trace, append_trace
+
     typer.echo(f"🤔 Starting query session for: {github_url}")
-    pipeline = QueryPipeline(github_url)
+    if server:
+        from src.server.client import RemoteQueryPipeline
+
+        pipeline = RemoteQueryPipeline(github_url, base_url=server)
+    else:
+        from src.pipeline.querying import QueryPipeline
+
+        pipeline = QueryPipeline(github_url)
+        pipeline.trace_log = trace_log
+        if warm_up:
+            pipeline.warm_up()  # the model loads while the index does
     try:
         pipeline.setup()
     except FileNotFoundError as e:
@@ -32,21 +126,102 @@ def query(github_url: str):
         raise typer.Exit()
 
     typer.echo("💡 Ask a question. Type 'exit' to quit.")
+    typer.echo("   Narrow the search with lang:python, path:src/ or type:class.")
     while True:
         user_query = typer.prompt("\n> ")
         if user_query.lower() == "exit":
             break
 
-        result = pipeline.ask(user_query)
+        try:
+            result = pipeline.ask(user_query)
+        except (ValueError, RuntimeError) as e:
+            typer.echo(f"Error: {e}")
+            continue
 
         typer.echo("\n💬 Answer:")
         typer.echo(result["result"])
+        stats = result.get("stats")
+        if stats:
+            typer.echo(
+                f"\n⏱️ {stats['time_to_answer']:.1f}s | ~{stats['prompt_tokens']} prompt tokens"
+            )
+        query_trace = result.get("trace")
+        if query_trace and server and trace_log:
+            append_trace(query_trace, trace_log)  # local pipelines log their own
+        if query_trace and trace:
+            typer.echo("\n🔎 " + format_trace(query_trace))
         typer.echo("\n📚 Sources:")
         for doc in result["source_documents"]:
             metadata = doc.metadata
             typer.echo(
                 f"  - {metadata.get('file_path')} (Lines: {metadata.get('start_line')}-{metadata.get('end_line')})"
             )
+            for location in metadata.get("locations", [])[1:]:
+                typer.echo(
+                    f"      also in {location['file_path']} (Lines: {location['start_line']}-{location['end_line']})"
+                )
+
+
+@app.command("query-all")
+def query_all(
+    repos: Optional[str] = typer.Option(
+        None, help="Comma-separated repo names or patterns (default: all indexed repos)."
+    ),
+    k: int = typer.Option(5, help="Number of merged results used for each answer."),
+):
+    """Starts an interactive query session across several indexed repositories."""
+    from src.pipeline.federated import FederatedQueryPipeline
+
+    repo_filter = [r.strip() for r in repos.split(",")] if repos else None
+    pipeline = FederatedQueryPipeline()
+    searched = pipeline.resolve_repos(repo_filter)
+    if not searched:
+        typer.echo("No indexed repositories match. Run the 'index' command first.")
+        raise typer.Exit()
+    typer.echo(f"🤔 Searching {len(searched)} repositories: {', '.join(searched)}")
+
+    typer.echo("💡 Ask a question. Type 'exit' to quit.")
+    typer.echo("   Narrow the search with lang:python, path:src/ or type:class.")
+    while True:
+        user_query = typer.prompt("\n> ")
+        if user_query.lower() == "exit":
+            break
+
+        try:
+            result = pipeline.ask(user_query, k=k, repo_filter=repo_filter)
+        except (ValueError, RuntimeError) as e:
+            typer.echo(f"Error: {e}")
+            continue
+
+        typer.echo("\n💬 Answer:")
+        typer.echo(result["result"])
+        stats = result.get("stats")
+        if stats:
+            typer.echo(
+                f"\n⏱️ {stats['time_to_answer']:.1f}s | ~{stats['prompt_tokens']} prompt tokens"
+            )
+        typer.echo("\n📚 Sources:")
+        for doc in result["source_documents"]:
+            metadata = doc.metadata
+            typer.echo(
+                f"  - [{metadata['repo']}] {metadata.get('file_path')} (Lines: {metadata.get('start_line')}-{metadata.get('end_line')}) score={metadata['score']:.3f}"
+            )
+        for repo, error in result["errors"].items():
+            typer.echo(f"  ⚠️ {repo}: {error}")
+
+
+@app.command()
+def serve(
+    host: str = QUERY_SERVER_HOST,
+    port: int = QUERY_SERVER_PORT,
+    max_memory_mb: int = typer.Option(
+        INDEX_CACHE_MAX_BYTES // 1024**2, help="Memory budget for loaded indexes."
+    ),
+):
+    """Runs the query server, keeping indexes of many repositories loaded."""
+    from src.server.query_server import run_server
+
+    run_server(host=host, port=port, max_bytes=max_memory_mb * 1024**2)
 
 
 if __name__ == "__main__":
@@ -5,8 +5,11 @@ import os
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.pipeline.indexing import IndexingPipeline
+from src.pipeline.jobs import JobManager
 from src.pipeline.querying import QueryPipeline
+from src.server.client import RemoteQueryPipeline
+from src.utils.tracing import format_trace
+from config.settings import QUERY_SERVER_URL, WARM_UP_MODELS
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -33,6 +36,32 @@ st.markdown(
 )
 
 
+# --- Shared Resources (one per app process, shared by all sessions) ---
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+
+@st.cache_resource(max_entries=8)
+def load_query_pipeline(repo_url):
+    """Sets up a query pipeline once per repository; it follows new index generations."""
+    if QUERY_SERVER_URL:
+        query_pipeline = RemoteQueryPipeline(repo_url)
+    else:
+        query_pipeline = QueryPipeline(repo_url)
+        if WARM_UP_MODELS:
+            query_pipeline.warm_up()
+    query_pipeline.setup()
+    return query_pipeline
+
+
+def connect_query_pipeline(repo_url):
+    """Returns the shared pipeline of a repository, switched to its newest index."""
+    query_pipeline = load_query_pipeline(repo_url)
+    query_pipeline.refresh(wait=True)
+    return query_pipeline
+
+
 # --- Session State Initialization ---
 if "query_pipeline" not in st.session_state:
     st.session_state.query_pipeline = None
@@ -40,6 +69,50 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "indexed_repo" not in st.session_state:
     st.session_state.indexed_repo = None
+if "indexing_job_id" not in st.session_state:
+    st.session_state.indexing_job_id = None
+if "indexing_notice" not in st.session_state:
+    st.session_state.indexing_notice = None
+
+
+@st.fragment(run_every=1.0)
+def indexing_status():
+    """Live progress of the background indexing job, refreshed every second."""
+    job_manager = get_job_manager()
+    job = job_manager.get(st.session_state.indexing_job_id)
+    if job is None:
+        return
+
+    if job.active:
+        stage = job.stage or "queued"
+        st.progress(
+            job.progress(),
+            text=f"Indexing `{job.github_url}`: {stage} ({job.current}/{job.total})",
+        )
+        if st.button("Cancel Indexing"):
+            job_manager.cancel(job.job_id)
+        return
+
+    # --- The job finished: connect the query engine and refresh the page ---
+    st.session_state.indexing_job_id = None
+    if job.status == "done":
+        try:
+            st.session_state.query_pipeline = connect_query_pipeline(job.github_url)
+            st.session_state.indexed_repo = job.github_url
+            st.session_state.indexing_notice = (
+                "success",
+                f"Successfully indexed `{job.github_url}`! You can now ask questions.",
+            )
+        except FileNotFoundError:
+            st.session_state.indexing_notice = (
+                "error",
+                "Indexing failed. Could not find the vector store. Please ensure the indexing process completes successfully.",
+            )
+    elif job.status == "cancelled":
+        st.session_state.indexing_notice = ("warning", "Indexing was cancelled.")
+    else:
+        st.session_state.indexing_notice = ("error", f"An error occurred: {job.error}")
+    st.rerun()
 
 
 # --- Sidebar ---
@@ -55,42 +128,25 @@ with st.sidebar:
 
     if st.button("Index Repository"):
         if repo_url:
-            with st.spinner(
-                f"Starting indexing for `{repo_url}`... This may take a while."
-            ):
-                try:
-                    # Clear previous state
-                    st.session_state.query_pipeline = None
-                    st.session_state.messages = []
-                    st.session_state.indexed_repo = None
-
-                    # --- Run Indexing Pipeline ---
-                    st.info("Step 1/3: Cloning repository...")
-                    indexing_pipeline = IndexingPipeline(repo_url)
-
-                    st.info("Step 2/3: Chunking, enriching, and vectorizing files...")
-                    indexing_pipeline.run()
-
-                    st.info("Step 3/3: Setting up query engine...")
-                    query_pipeline = QueryPipeline(repo_url)
-                    query_pipeline.setup()
-
-                    # --- Store in session state on success ---
-                    st.session_state.query_pipeline = query_pipeline
-                    st.session_state.indexed_repo = repo_url
-                    st.success(
-                        f"Successfully indexed `{repo_url}`! You can now ask questions."
-                    )
-
-                except FileNotFoundError:
-                    st.error(
-                        "Indexing failed. Could not find the vector store. Please ensure the indexing process completes successfully."
-                    )
-                except Exception as e:
-                    st.error(f"An error occurred: {e}")
+            # Clear previous state
+            st.session_state.query_pipeline = None
+            st.session_state.messages = []
+            st.session_state.indexed_repo = None
+            st.session_state.indexing_notice = None
+
+            # --- Run Indexing Pipeline in the background ---
+            job = get_job_manager().submit(repo_url)
+            st.session_state.indexing_job_id = job.job_id
         else:
             st.warning("Please enter a GitHub repository URL.")
 
+    if st.session_state.indexing_job_id:
+        indexing_status()
+
+    if st.session_state.indexing_notice:
+        kind, text = st.session_state.indexing_notice
+        getattr(st, kind)(text)
+
     st.markdown("---")
     st.markdown(
         "Created by [Amey Tonannavar](https://github.com/trippynix) | "
@@ -98,6 +154,24 @@ with st.sidebar:
     )
 
 
+def render_sources(sources):
+    """Lists each source document with its location, near-duplicate locations and content."""
+    for doc in sources:
+        metadata = doc.metadata
+        # Normalize file path for consistent display
+        file_path = metadata.get("file_path", "N/A").replace("\\", "/")
+        start_line = metadata.get("start_line", "N/A")
+        end_line = metadata.get("end_line", "N/A")
+        st.markdown(f"- **File:** `{file_path}` (Lines: {start_line}-{end_line})")
+        for location in metadata.get("locations", [])[1:]:
+            st.markdown(
+                f"  - *Also in:* `{location['file_path']}` "
+                f"(Lines: {location['start_line']}-{location['end_line']})"
+            )
+        # Display the raw content of the source document
+        st.code(doc.page_content, language="plaintext")
+
+
 # --- Main Chat Interface ---
 st.title("Chat with your Codebase")
 st.markdown(
@@ -113,21 +187,18 @@ else:
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("trace"):
+            with st.expander("Latency Trace"):
+                st.code(format_trace(message["trace"]), language="plaintext")
         if "sources" in message:
             with st.expander("View Sources"):
-                for doc in message["sources"]:
-                    metadata = doc.metadata
-                    file_path = metadata.get("file_path", "N/A").replace("\\", "/")
-                    start_line = metadata.get("start_line", "N/A")
-                    end_line = metadata.get("end_line", "N/A")
-                    st.markdown(
-                        f"- **File:** `{file_path}` (Lines: {start_line}-{end_line})"
-                    )
-                    st.code(doc.page_content, language="plaintext")
+                render_sources(message["sources"])
 
 
 # Accept user input
-if prompt := st.chat_input("Ask a question about the code..."):
+if prompt := st.chat_input(
+    "Ask a question about the code... (filters: lang:python path:src/ type:class)"
+):
     if st.session_state.query_pipeline:
         # Add user message to chat history
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -143,28 +214,32 @@ if prompt := st.chat_input("Ask a question about the code..."):
                     response = st.session_state.query_pipeline.ask(prompt)
                     answer = response.get("result", "Sorry, I couldn't find an answer.")
                     sources = response.get("source_documents", [])
+                    trace = response.get("trace")
 
                     st.markdown(answer)
+                    stats = response.get("stats")
+                    if stats:
+                        st.caption(
+                            f"⏱️ {stats['time_to_answer']:.1f}s · "
+                            f"~{stats['prompt_tokens']} prompt tokens"
+                        )
+
+                    if trace:
+                        with st.expander("Latency Trace"):
+                            st.code(format_trace(trace), language="plaintext")
 
                     if sources:
                         with st.expander("View Sources"):
-                            for doc in sources:
-                                metadata = doc.metadata
-                                # Normalize file path for consistent display
-                                file_path = metadata.get("file_path", "N/A").replace(
-                                    "\\", "/"
-                                )
-                                start_line = metadata.get("start_line", "N/A")
-                                end_line = metadata.get("end_line", "N/A")
-                                st.markdown(
-                                    f"- **File:** `{file_path}` (Lines: {start_line}-{end_line})"
-                                )
-                                # Display the raw content of the source document
-                                st.code(doc.page_content, language="plaintext")
+                            render_sources(sources)
 
                     # Add assistant response to chat history
                     st.session_state.messages.append(
-                        {"role": "assistant", "content": answer, "sources": sources}
+                        {
+                            "role": "assistant",
+                            "content": answer,
+                            "sources": sources,
+                            "trace": trace,
+                        }
                     )
 
                 except Exception as e:
@@ -0,0 +1,104 @@
+# benchmarks/bench_chunk_records.py
+"""
+Compares the chunk records of an indexing run before and after packing:
+the pickled size and round-trip time of each file's chunks sent back from
+a parse worker, the memory the parent then holds per chunk, and the memory
+and docstore.json size of each chunk's document metadata. Chunks are parsed
+from a real directory and replicated to simulate a larger repository.
+
+Usage: python -m benchmarks.bench_chunk_records [--path src] [--copies 50]
+"""
+import os
+import json
+import time
+import pickle
+import argparse
+import tracemalloc
+from src.components.chunker import parse_and_chunk_file
+from src.components.chunk_records import pack_chunks, unpack_chunks, document_metadata
+
+SUMMARY = "Parses the configuration file and returns the settings it defines, with defaults."
+KEYWORDS = "configuration, parsing, settings, defaults, loader"
+
+
+def parse_files(path, copies):
+    """Per-file chunk lists as a worker returns them, the directory `copies` times."""
+    files = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            if name.endswith((".py", ".js", ".java", ".md")):
+                chunks = parse_and_chunk_file(os.path.join(root, name), "bench")
+                if chunks:
+                    files.append(chunks)
+    copied = []
+    for i in range(copies):
+        for chunks in files:
+            # One path object per file, shared by its chunks as the chunker does
+            file_path = f"copy{i}/{chunks[0]['file_path']}"
+            copied.append([dict(chunk, file_path=file_path) for chunk in chunks])
+    return copied
+
+
+def transfer(files, packed):
+    """Pickled bytes and round-trip seconds of the worker results."""
+    payloads = [pack_chunks(chunks) if packed else chunks for chunks in files]
+    start = time.perf_counter()
+    blobs = [pickle.dumps(payload, pickle.HIGHEST_PROTOCOL) for payload in payloads]
+    received = [pickle.loads(blob) for blob in blobs]
+    if packed:
+        received = [unpack_chunks(payload) for payload in received]
+    return sum(len(blob) for blob in blobs), time.perf_counter() - start, blobs
+
+
+def held(blobs, packed):
+    """Bytes allocated for the chunk dicts the parent keeps."""
+    tracemalloc.start()
+    chunks = []
+    for blob in blobs:
+        payload = pickle.loads(blob)
+        chunks.extend(unpack_chunks(payload) if packed else payload)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, chunks
+
+
+def metadata(chunks, compact):
+    """Bytes allocated for the document metadata, and their size in JSON."""
+    for chunk in chunks:
+        chunk["summary"], chunk["keywords"] = SUMMARY, KEYWORDS
+    tracemalloc.start()
+    if compact:
+        metadatas = [document_metadata(chunk) for chunk in chunks]
+    else:
+        metadatas = [{k: v for k, v in chunk.items() if k != "content"} for chunk in chunks]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(json.dumps(metadatas))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="src")
+    parser.add_argument("--copies", type=int, default=50)
+    args = parser.parse_args()
+
+    files = parse_files(args.path, args.copies)
+    count = sum(len(chunks) for chunks in files)
+    print(f"{count} chunks in {len(files)} files")
+    print(
+        f"{'records':>8} {'pickle B/chunk':>15} {'round trip ms':>14} "
+        f"{'held B/chunk':>13} {'metadata B/chunk':>17} {'docstore B/chunk':>17}"
+    )
+    for packed in (False, True):
+        size, seconds, blobs = transfer(files, packed)
+        held_bytes, chunks = held(blobs, packed)
+        metadata_bytes, json_bytes = metadata(chunks, packed)
+        print(
+            f"{'packed' if packed else 'dicts':>8} {size / count:>15.0f} "
+            f"{seconds * 1000:>14.1f} {held_bytes / count:>13.0f} "
+            f"{metadata_bytes / count:>17.0f} {json_bytes / count:>17.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_index_load.py
+"""
+Compares reading an index into memory with memory-mapping it, cold (index
+file evicted from the page cache) and warm, for several index sizes. The
+first search is timed too, since a mapped index pages its vectors in then.
+
+Usage: python -m benchmarks.bench_index_load [--sizes 10000,100000] [--dim 768]
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from src.components.chunk_index import ChunkIndex, INDEX_FILE
+
+
+def make_index(path, size, dim):
+    index = ChunkIndex(dim)
+    vectors = np.random.default_rng(0).random((size, dim), dtype=np.float32)
+    for start in range(0, size, 10000):
+        batch = vectors[start : start + 10000]
+        ids = [f"chunk-{i}" for i in range(start, start + len(batch))]
+        index.add_embeddings(zip(ids, batch), [{} for _ in ids], ids)
+    index.save_local(path)
+    return vectors[0]
+
+
+def evict(path):
+    """Drops the index file from the page cache (Linux), for a cold load."""
+    fd = os.open(os.path.join(path, INDEX_FILE), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def measure(path, query, mmap, cold):
+    if cold:
+        evict(path)
+    start = time.perf_counter()
+    index = ChunkIndex.load_local(path, mmap=mmap)
+    loaded = time.perf_counter()
+    index.similarity_search_with_score_by_vector(query, k=5)
+    searched = time.perf_counter()
+    return loaded - start, searched - loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,300000")
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    print(f"{'vectors':>8} {'mode':>5} {'cache':>5} {'load ms':>9} {'1st search ms':>14}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as path:
+            query = make_index(path, size, args.dim)
+            for mmap in (False, True):
+                for cold in (True, False):
+                    load, search = measure(path, query, mmap, cold)
+                    print(
+                        f"{size:>8} {'mmap' if mmap else 'read':>5} "
+                        f"{'cold' if cold else 'warm':>5} "
+                        f"{load * 1000:>9.1f} {search * 1000:>14.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
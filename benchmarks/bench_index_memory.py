@@ -0,0 +1,98 @@
+# benchmarks/bench_index_memory.py
+"""
+Compares the peak memory of embedding a synthetic repository's chunks by
+collecting every vector before building the index (as before) and by
+streaming them into the index in batches. Each mode runs in a fresh process
+with fake embeddings; the chunk list itself is counted in both.
+
+Usage: python -m benchmarks.bench_index_memory [--chunks 100000,1000000] [--dim 768]
+"""
+import sys
+import random
+import resource
+import argparse
+import subprocess
+from src.components.vectorstore import VectorstoreManager
+from src.pipeline.indexing import EmbeddingWriter
+
+
+class FakeEmbeddings:
+    def __init__(self, dim):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        return [[random.random() for _ in range(self.dim)] for _ in texts]
+
+
+class NoCheckpoint:
+    def append_vectors(self, file_path, file_hash, embeddings):
+        pass
+
+
+def make_chunks(count):
+    return [
+        {
+            "chunk_id": f"pkg{i % 500}/mod{i}.py#{i:016x}",
+            "file_path": f"repos/synthetic/pkg{i % 500}/mod{i}.py",
+            "repo": "synthetic",
+            "content": f"def function_{i}(value):\n    return value * {i}\n" * 4,
+            "summary": "Multiplies a value.",
+            "keywords": "math, multiply",
+        }
+        for i in range(count)
+    ]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def run(mode, count, dim):
+    chunks = make_chunks(count)
+    baseline = peak_rss_mb()
+    manager = VectorstoreManager()
+    manager.embeddings = FakeEmbeddings(dim)
+    if mode == "collect":
+        vectors = {}
+        for start in range(0, count, 256):
+            batch = chunks[start : start + 256]
+            vectors.update(zip([c["chunk_id"] for c in batch], manager.embed_chunks(batch)))
+        manager.create_vectorstore(chunks, [vectors[c["chunk_id"]] for c in chunks])
+    else:
+        writer = EmbeddingWriter(manager, NoCheckpoint(), None, chunks)
+        writer.add(chunks)
+        writer.flush()
+    print(f"{baseline:.0f} {peak_rss_mb():.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", default="100000,300000,1000000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run(args.run, int(args.chunks), args.dim)
+        return
+
+    index_mb = lambda count: count * args.dim * 4 / 1024**2
+    print(f"{'chunks':>8} {'mode':>8} {'chunk list MB':>14} {'peak MB':>8} {'vectors MB':>11}")
+    for count in (int(c) for c in args.chunks.split(",")):
+        for mode in ("collect", "stream"):
+            output = subprocess.run(
+                [
+                    sys.executable, "-m", "benchmarks.bench_index_memory",
+                    "--run", mode, "--chunks", str(count), "--dim", str(args.dim),
+                ],
+                capture_output=True, text=True, check=True,
+            ).stdout.split("\n")
+            baseline, peak = output[-2].split()
+            print(
+                f"{count:>8} {mode:>8} {baseline:>14} {peak:>8} "
+                f"{index_mb(count):>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
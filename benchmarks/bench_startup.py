@@ -0,0 +1,89 @@
+# benchmarks/bench_startup.py
+"""
+Measures how quickly the CLI becomes usable: the wall time of `--help` and
+of importing each pipeline, each in a fresh interpreter, and optionally the
+time to the first answer for an indexed repository, with the answer model
+unloaded beforehand (cold) and with the model warmed up while the index
+loads. Every measurement runs in a new process so imports are counted.
+
+Usage: python -m benchmarks.bench_startup [--runs 5]
+           [--repo https://github.com/user/repo --question "What does it do?"]
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+COMMANDS = {
+    "cli --help": [sys.executable, "-m", "app.cli", "--help"],
+    "import querying": [sys.executable, "-c", "import src.pipeline.querying"],
+    "import indexing": [sys.executable, "-c", "import src.pipeline.indexing"],
+}
+
+
+def wall_time(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def first_answer(repo_url, question, warm_up):
+    """
+    Runs in a fresh process: seconds from the start of the session until the
+    index is loaded and until the first answer has been generated.
+    """
+    start = time.perf_counter()
+    from src.pipeline.querying import QueryPipeline
+
+    pipeline = QueryPipeline(repo_url)
+    if warm_up:
+        pipeline.warm_up()
+    pipeline.setup()
+    loaded = time.perf_counter()
+    pipeline.ask(question)
+    return {"setup": loaded - start, "first_answer": time.perf_counter() - start}
+
+
+def measure_first_answer(repo_url, question, warm_up):
+    from src.llm.ollama_client import load_model
+    from config.settings import ANSWER_MODEL
+
+    load_model(ANSWER_MODEL, keep_alive=0)  # unloaded, as after a reboot or idle time
+    code = (
+        "import json; from benchmarks.bench_startup import first_answer; "
+        f"print(json.dumps(first_answer({repo_url!r}, {question!r}, {warm_up!r})))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repo", help="URL of an indexed repository to time answers of.")
+    parser.add_argument("--question", default="What does this repository do?")
+    args = parser.parse_args()
+
+    print(f"{'command':>16} {'median ms':>10} {'min ms':>8}")
+    for name, command in COMMANDS.items():
+        times = [wall_time(command) for _ in range(args.runs)]
+        print(
+            f"{name:>16} {statistics.median(times) * 1000:>10.0f} {min(times) * 1000:>8.0f}"
+        )
+
+    if args.repo:
+        print(f"\n{'model':>16} {'index loaded s':>15} {'first answer s':>15}")
+        for warm_up in (False, True):
+            result = measure_first_answer(args.repo, args.question, warm_up)
+            print(
+                f"{'warmed up' if warm_up else 'cold':>16} "
+                f"{result['setup']:>15.2f} {result['first_answer']:>15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
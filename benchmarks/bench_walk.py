@@ -0,0 +1,69 @@
+# benchmarks/bench_walk.py
+"""
+Compares the single-pass scandir walk with the previous double os.walk on a
+synthetic repository.
+
+Usage: python -m benchmarks.bench_walk [--dirs 200] [--files 50]
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.utils.repo_walker import RepositoryWalker
+from src.utils.gitignore_loader import load_gitignore
+
+
+def make_repo(root, dirs, files):
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("node_modules/\n*.log\n")
+    for d in range(dirs):
+        for top in ("src", "node_modules"):
+            path = os.path.join(root, top, f"pkg{d}")
+            os.makedirs(path)
+            for i in range(files):
+                with open(os.path.join(path, f"mod{i}.py"), "w") as f:
+                    f.write(f"def f{i}():\n    return {i}\n")
+
+
+def double_os_walk(repo_path):
+    """The walk as done before: one os.walk for the tree, one for the files."""
+    for root, dirs, files in os.walk(repo_path):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        sorted(files)
+    spec = load_gitignore(repo_path)
+    found = []
+    for root, dirs, files in os.walk(repo_path):
+        if ".git" in dirs:
+            dirs.remove(".git")
+        rel_root = os.path.relpath(root, repo_path)
+        rel_root = "" if rel_root == "." else rel_root
+        dirs[:] = [d for d in dirs if not spec.match_file(os.path.join(rel_root, d))]
+        for f in files:
+            if not spec.match_file(os.path.join(rel_root, f)):
+                found.append(os.path.join(root, f))
+                os.stat(found[-1])
+    return found
+
+
+def single_walk(repo_path):
+    return [path for path, _, _ in RepositoryWalker(repo_path).walk()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=200)
+    parser.add_argument("--files", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_repo(root, args.dirs, args.files)
+        for name, walk in (("double os.walk", double_os_walk), ("single scandir", single_walk)):
+            start = time.perf_counter()
+            found = walk(root)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>15}: {len(found):>6} files in {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
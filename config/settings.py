@@ -9,6 +9,160 @@ VECTORSTORE_PATH = f"{DATA_DIR}/vectorstore"
 # Models
 EMBEDDING_MODEL = "nomic-embed-text"
 LLM_MODEL = "qwen2.5-coder:latest"
+# Per-stage models, e.g. a small fast one for enrichment and a larger one for answers
+ENRICH_MODEL = LLM_MODEL
+ANSWER_MODEL = LLM_MODEL
 
 # Ollama API
 OLLAMA_API_URL = "http://localhost:11434/api/chat"
+# How long Ollama keeps the answer model loaded after a request; query sessions
+# also load it in the background while the index loads (WARM_UP_MODELS)
+ANSWER_KEEP_ALIVE = "30m"
+WARM_UP_MODELS = True
+
+# LLM scheduling: answers to interactive queries go before background enrichment
+ENRICH_WORKERS = 4  # concurrent enrichment requests of an indexing run
+ANSWER_WORKERS = 4  # concurrent answer requests per process
+ENRICH_YIELD_INTERVAL = 0.5  # seconds between checks while answers are generated
+ENRICH_MAX_YIELD = 60  # longest an enrichment request waits for answers, in seconds
+ANSWER_MARKER_TTL = 600  # older answer markers (left by crashed processes) are ignored
+
+# Enrichment retries (chunks whose LLM enrichment failed)
+ENRICH_MAX_ATTEMPTS = 5  # automatic attempts; `reenrich --force` ignores the limit
+ENRICH_RETRY_BACKOFF = 5  # seconds before the first retry, doubled per attempt
+ENRICH_RETRY_MAX_BACKOFF = 6 * 3600
+ENRICH_RETRY_WAIT = 30  # seconds a run may wait at its end to retry failures
+
+# Chunk sizing (in estimated tokens)
+CHUNK_MAX_TOKENS = 1024  # larger chunks are split along syntactic boundaries
+CHUNK_MIN_TOKENS = 48  # smaller adjacent chunks are packed together
+CHUNK_TARGET_TOKENS = 384  # size packed chunks grow up to
+
+# Near-duplicate detection (MinHash/LSH over chunk content)
+DEDUP_ENABLED = True
+DEDUP_THRESHOLD = 0.85  # estimated Jaccard similarity to treat chunks as copies
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16
+
+# File classification (files skipped before parsing and enrichment)
+SKIP_REASONS = ["binary", "oversized", "minified", "generated", "vendored"]
+BINARY_EXTENSIONS = (
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".bmp",
+    ".ico",
+    ".svgz",
+    ".webp",
+    ".exe",
+    ".dll",
+    ".so",
+    ".dylib",
+    ".bin",
+    ".o",
+    ".a",
+    ".class",
+    ".jar",
+    ".pyc",
+    ".zip",
+    ".tar",
+    ".gz",
+    ".bz2",
+    ".xz",
+    ".7z",
+    ".pdf",
+    ".woff",
+    ".woff2",
+    ".ttf",
+    ".eot",
+    ".mp3",
+    ".mp4",
+    ".mov",
+    ".wav",
+)
+MAX_FILE_BYTES = 1_000_000
+MAX_TEXT_FILE_BYTES = 200_000  # stricter limit for .txt/.md (logs, data dumps)
+SNIFF_BYTES = 8192  # how much of a file is read to classify it
+MINIFIED_MAX_LINE_LENGTH = 1000
+MINIFIED_AVG_LINE_LENGTH = 200
+GENERATED_MARKERS = (
+    "@generated",
+    "DO NOT EDIT",
+    "Code generated by",
+    "auto-generated",
+    "autogenerated",
+    "This file was generated",
+)
+VENDORED_PATHS = (  # linguist-style path patterns
+    r"(^|/)node_modules/",
+    r"(^|/)bower_components/",
+    r"(^|/)vendor(ed)?/",
+    r"(^|/)third[-_]?party/",
+    r"(^|/)site-packages/",
+    r"(^|/)\.venv/",
+    r"(^|/)dist/",
+    r"\.min\.(js|css)$",
+    r"(^|/)jquery[^/]*\.js$",
+    r"(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock)$",
+)
+
+# Repository walk
+HASH_WORKERS = 8  # threads hashing files while the repository is walked
+
+# Embedding during indexing: chunks are embedded and added to the index in
+# batches, flushed at whichever limit is reached first. These size the batch
+# buffers only; the chunk list and the index are held in full regardless.
+EMBED_BATCH_SIZE = 256  # chunks
+EMBED_BATCH_MAX_BYTES = 32 * 1024**2  # text buffered for one batch
+
+# Background indexing jobs (app): finished jobs are forgotten after this many seconds
+JOB_RETENTION = 3600
+
+# Query server
+QUERY_SERVER_HOST = "127.0.0.1"
+QUERY_SERVER_PORT = 8765
+# Set to e.g. "http://127.0.0.1:8765" to make the CLI and app thin clients
+QUERY_SERVER_URL = None
+QUERY_SERVER_WORKERS = 8  # threads answering requests concurrently
+INDEX_CACHE_MAX_BYTES = 4 * 1024**3  # memory budget for indexes kept loaded
+
+# Federated search across repositories
+FEDERATED_WORKERS = 8  # repositories searched in parallel
+
+# Answer prompt context (in estimated tokens)
+CONTEXT_CANDIDATES = 8  # chunks retrieved per question
+CONTEXT_TOKEN_BUDGET = 3000  # context tokens sent with each question
+CONTEXT_FULL_CODE_HITS = 3  # top hits sent as full code, the rest as summaries
+
+# Query traces (span timings, tokens and scores) are returned with every answer;
+# set to e.g. f"{DATA_DIR}/query_traces.jsonl" to also append them to a log
+TRACE_LOG_PATH = None
+
+# Hierarchical summaries: file and directory summaries for broad questions
+SUMMARY_TREE_ENABLED = True
+SUMMARY_MAX_PARTS = 40  # part summaries sent to the model per file or directory
+SUMMARY_CANDIDATES = 3  # file/directory summaries retrieved for a broad question
+SUMMARY_CHILDREN = 12  # child summaries listed under a retrieved directory
+SUMMARY_DRILL_CHUNKS = 4  # chunks then retrieved under the matched paths
+SUMMARY_TOKEN_BUDGET = 1500  # context tokens sent with a broad question
+
+# Code graph: import and call edges between chunks, for neighborhood expansion
+CODE_GRAPH_ENABLED = True
+GRAPH_EXPAND_HITS = 3  # top hits whose one-hop neighbors are added to the context
+GRAPH_MAX_NEIGHBORS = 4  # neighbor chunks added per question
+
+# Index generations
+GENERATIONS_RETAINED = 2  # previous generations kept besides the current one
+GENERATION_MIN_AGE = 600  # seconds before a replaced generation may be deleted
+
+# Vector index maintenance
+COMPACTION_THRESHOLD = 0.2  # share of deleted vectors that triggers a compaction
+# Shards of a repository index: "directory" (top-level directories, small ones
+# merged), "size" (files hashed over shards of SHARD_MAX_CHUNKS), or None
+INDEX_SHARD_BY = "directory"
+SHARD_MIN_CHUNKS = 1000  # smaller directories share one shard
+SHARD_MAX_CHUNKS = 50000
+SHARD_SEARCH_WORKERS = 4  # shards searched in parallel
+# Query processes memory-map index vectors read-only, sharing the page cache
+INDEX_MMAP = True
@@ -0,0 +1,270 @@
+# src/components/chunk_index.py
+import os
+import json
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from src.utils.tracing import span
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.json"
+
+# Maps the vectors of flat indexes without copying them (faiss >= 1.10)
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+
+
+class ChunkDocstore:
+    """
+    Chunk documents by chunk_id (the `docstore` of a ChunkIndex). Loaded
+    records are only turned into Documents when first looked up, so loading
+    an index does not pay for documents no query returns.
+    """
+
+    def __init__(self, documents=None, records=None):
+        self.documents = documents or {}
+        self.records = records or {}  # loaded {"page_content", "metadata"}
+
+    def search(self, chunk_id):
+        """Returns the document of a chunk, or None if it isn't stored."""
+        doc = self.documents.get(chunk_id)
+        if doc is None and chunk_id in self.records:
+            record = self.records[chunk_id]
+            doc = self.documents.setdefault(chunk_id, Document(**record))
+        return doc
+
+    def metadata(self, chunk_id):
+        """Returns the metadata of a chunk without building its Document."""
+        doc = self.documents.get(chunk_id)
+        if doc is not None:
+            return doc.metadata
+        return self.records.get(chunk_id, {}).get("metadata", {})
+
+    def add(self, chunk_id, document):
+        self.documents[chunk_id] = document
+        self.records.pop(chunk_id, None)
+
+    def delete(self, chunk_id):
+        self.documents.pop(chunk_id, None)
+        self.records.pop(chunk_id, None)
+
+    def estimate_bytes(self):
+        """Approximate size of the stored texts and metadata, without copying them."""
+        size = 0
+        for doc in self.documents.values():
+            size += len(doc.page_content) + len(str(doc.metadata))
+        for chunk_id, record in self.records.items():
+            if chunk_id not in self.documents:  # not built into a Document yet
+                size += len(record["page_content"]) + len(str(record["metadata"]))
+        return size
+
+    def dump(self):
+        """All records, as saved in docstore.json."""
+        records = dict(self.records)
+        for chunk_id, doc in self.documents.items():
+            records[chunk_id] = {
+                "page_content": doc.page_content,
+                "metadata": doc.metadata,
+            }
+        return records
+
+
+class ChunkIndex:
+    """
+    Vector store over a FAISS IndexIDMap2. Every chunk gets a stable int64
+    id, kept in a persistent id <-> chunk_id mapping, so a delete only
+    touches the deleted ids: their vectors are tombstoned, hidden from
+    searches by an ID selector, and physically removed by `compact()`.
+
+    It exposes the parts of the LangChain FAISS interface the rest of the
+    code uses (`index`, `index_to_docstore_id`, `docstore`, the
+    similarity_search_with_score* methods, `add_embeddings`, `delete`).
+
+    An index loaded with `mmap=True` is read-only: its vectors stay in the
+    file, shared through the page cache by every process that maps it.
+    """
+
+    def __init__(self, dim, embedding_function=None, index=None):
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self.index = index
+        self.embedding_function = embedding_function
+        self.docstore = ChunkDocstore()
+        self.index_to_docstore_id = {}  # int64 id -> chunk_id, live chunks only
+        self.chunk_to_id = {}
+        self.tombstones = set()  # ids deleted but still in the FAISS index
+        self.next_id = 0
+        self.mmapped = False
+
+    def _check_writable(self):
+        # FAISS aborts the process when a mapped index is resized
+        if self.mmapped:
+            raise ValueError("This index is memory-mapped read-only.")
+
+    def __len__(self):
+        return len(self.index_to_docstore_id)
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, faiss_ids=None):
+        """
+        Adds (text, vector) pairs under the given chunk ids, replacing chunks
+        already stored. New FAISS ids are allocated unless `faiss_ids` are
+        given (by a caller sharing one id space between several indexes).
+        """
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            return []
+        self._check_writable()
+        metadatas = metadatas or [{} for _ in text_embeddings]
+        self.delete([chunk_id for chunk_id in ids if chunk_id in self.chunk_to_id])
+
+        if faiss_ids is None:
+            int_ids = np.arange(self.next_id, self.next_id + len(ids), dtype=np.int64)
+        else:
+            int_ids = np.asarray(faiss_ids, dtype=np.int64)
+        self.next_id = max(self.next_id, int(int_ids.max()) + 1)
+        vectors = np.array([vector for _, vector in text_embeddings], dtype=np.float32)
+        self.index.add_with_ids(vectors, int_ids)
+
+        for int_id, chunk_id, (text, _), metadata in zip(
+            int_ids.tolist(), ids, text_embeddings, metadatas
+        ):
+            self.index_to_docstore_id[int_id] = chunk_id
+            self.chunk_to_id[chunk_id] = int_id
+            self.docstore.add(chunk_id, Document(page_content=text, metadata=metadata))
+        return ids
+
+    def add_documents(self, documents, ids):
+        """Embeds and adds documents under the given chunk ids."""
+        texts = [doc.page_content for doc in documents]
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(
+            zip(texts, vectors), [doc.metadata for doc in documents], ids
+        )
+
+    def delete(self, ids):
+        """Tombstones chunks by chunk_id in O(k); unknown ids are ignored. Returns the count."""
+        deleted = 0
+        for chunk_id in ids:
+            int_id = self.chunk_to_id.pop(chunk_id, None)
+            if int_id is None:
+                continue
+            del self.index_to_docstore_id[int_id]
+            self.docstore.delete(chunk_id)
+            self.tombstones.add(int_id)
+            deleted += 1
+        return deleted
+
+    def reconstruct(self, faiss_id):
+        """The stored vector with the given FAISS id."""
+        return self.index.reconstruct(faiss_id)
+
+    @property
+    def metric_type(self):
+        return self.index.metric_type
+
+    @property
+    def fragmentation(self):
+        """Share of the vectors in the FAISS index that are tombstoned."""
+        return len(self.tombstones) / self.index.ntotal if self.index.ntotal else 0.0
+
+    def compact(self, min_fragmentation=0.0):
+        """
+        Physically removes the tombstoned vectors from the FAISS index, if
+        more than `min_fragmentation` of them are tombstoned.
+        """
+        if not self.tombstones or self.fragmentation <= min_fragmentation:
+            return 0
+        self._check_writable()
+        removed = self.index.remove_ids(
+            faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype=np.int64))
+        )
+        self.tombstones.clear()
+        return removed
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, faiss_ids=None):
+        """
+        Returns the `k` nearest live chunks as [(document, L2 distance)],
+        optionally searching only the vectors with the given ids.
+        """
+        candidates = len(self) if faiss_ids is None else len(faiss_ids)
+        k = min(k, candidates)
+        if k <= 0:
+            return []
+
+        # Selectors are kept in locals: FAISS only holds raw pointers to them
+        if faiss_ids is not None:
+            selector = faiss.IDSelectorBatch(np.asarray(faiss_ids, dtype=np.int64))
+        elif self.tombstones:
+            dead = faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype=np.int64))
+            selector = faiss.IDSelectorNot(dead)
+        else:
+            selector = None
+        params = faiss.SearchParameters(sel=selector) if selector is not None else None
+
+        vector = np.array([embedding], dtype=np.float32)
+        with span("faiss_search"):
+            scores, int_ids = self.index.search(vector, k, params=params)
+
+        results = []
+        with span("docstore_fetch"):
+            for score, int_id in zip(scores[0].tolist(), int_ids[0].tolist()):
+                chunk_id = self.index_to_docstore_id.get(int_id)
+                if chunk_id is not None:
+                    results.append((self.docstore.search(chunk_id), score))
+        return results
+
+    def similarity_search_with_score(self, query, k=4):
+        with span("embed_query"):
+            embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k=k)
+
+    def save_local(self, path):
+        """Writes the FAISS index and the id mapping with the documents to `path`."""
+        os.makedirs(path, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(path, INDEX_FILE))
+        data = {
+            "next_id": self.next_id,
+            "tombstones": sorted(self.tombstones),
+            "ids": {str(k): v for k, v in self.index_to_docstore_id.items()},
+            "documents": self.docstore.dump(),
+        }
+        with open(os.path.join(path, DOCSTORE_FILE), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load_local(cls, path, embedding_function=None, mmap=False):
+        """
+        Loads an index saved by save_local. With `mmap`, the vectors are
+        memory-mapped read-only instead of read (when FAISS supports it).
+        """
+        index_path = os.path.join(path, INDEX_FILE)
+        mmap = mmap and MMAP_FLAGS is not None
+        if mmap:
+            index = faiss.read_index(index_path, MMAP_FLAGS | faiss.IO_FLAG_READ_ONLY)
+        else:
+            index = faiss.read_index(index_path)
+        store = cls(index.d, embedding_function, index=index)
+        store.mmapped = mmap
+        with open(os.path.join(path, DOCSTORE_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        store.next_id = data["next_id"]
+        store.tombstones = set(data["tombstones"])
+        store.index_to_docstore_id = {int(k): v for k, v in data["ids"].items()}
+        store.chunk_to_id = {v: k for k, v in store.index_to_docstore_id.items()}
+        store.docstore = ChunkDocstore(records=data["documents"])
+        return store
+
+    @classmethod
+    def from_langchain(cls, vectorstore):
+        """Converts a LangChain FAISS vectorstore (the format used before), reusing its vectors."""
+        positions = sorted(vectorstore.index_to_docstore_id)
+        store = cls(vectorstore.index.d, vectorstore.embedding_function)
+        if not positions:
+            return store
+        vectors = vectorstore.index.reconstruct_batch(np.array(positions, dtype=np.int64))
+        docs = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[p]) for p in positions]
+        store.add_embeddings(
+            [(doc.page_content, vector) for doc, vector in zip(docs, vectors)],
+            [doc.metadata for doc in docs],
+            [vectorstore.index_to_docstore_id[p] for p in positions],
+        )
+        return store
@@ -0,0 +1,163 @@
+# src/components/chunk_normalizer.py
+import re
+from config.settings import CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_TARGET_TOKENS
+
+# Chunk types that are small declarations and can be packed together freely
+DECLARATION_TYPES = {None, "other", "generic", "import", "variable", "annotation", "export"}
+
+# Lines that close a block are a poor place to start a new part
+CLOSING_LINE = re.compile(r"^\s*[)\]}]")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for code and prose)."""
+    return (len(text) + 3) // 4
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+
+def _best_cut(lines, start, limit, body_indent):
+    """
+    Picks where the part starting at `start` should end (exclusive), looking
+    back from `limit` for the latest syntactic boundary: a statement at the
+    chunk's body indentation, then a blank line, then a hard cut.
+    """
+    for i in range(limit, start, -1):
+        line = lines[i]
+        if (
+            line.strip()
+            and _indent(line) <= body_indent
+            and not CLOSING_LINE.match(line)
+            and not lines[i - 1].rstrip().endswith(("\\", ","))
+        ):
+            return i
+    for i in range(limit, start, -1):
+        if not lines[i].strip():
+            return i
+    return limit
+
+
+def split_chunk(chunk, max_tokens=CHUNK_MAX_TOKENS):
+    """
+    Splits an oversized chunk into parts of at most `max_tokens`, with exact
+    line ranges. Chunks whose content is not a contiguous run of the file's
+    lines, such as class skeletons without their method bodies, are kept
+    whole: a part's line offset would not be its line in the file.
+    """
+    lines = chunk["content"].splitlines()
+    if estimate_tokens(chunk["content"]) <= max_tokens or len(lines) < 2:
+        return [chunk]
+    start_line, end_line = chunk.get("start_line"), chunk.get("end_line")
+    if start_line is not None and end_line is not None and end_line - start_line + 1 != len(lines):
+        return [chunk]
+
+    body_indents = [_indent(line) for line in lines[1:] if line.strip()]
+    body_indent = min(body_indents) if body_indents else 0
+    line_tokens = [estimate_tokens(line) + 1 for line in lines]
+
+    bounds = []
+    start = 0
+    while start < len(lines):
+        limit, budget = start, 0
+        while limit < len(lines) and (
+            limit == start or budget + line_tokens[limit] <= max_tokens
+        ):
+            budget += line_tokens[limit]
+            limit += 1
+        if limit >= len(lines):
+            bounds.append((start, len(lines)))
+            break
+        cut = _best_cut(lines, start, limit, body_indent)
+        bounds.append((start, cut))
+        start = cut
+
+    parts = []
+    for number, (first, last) in enumerate(bounds, start=1):
+        part = dict(chunk)
+        part["content"] = "\n".join(lines[first:last])
+        if chunk.get("start_line") is not None:
+            part["start_line"] = chunk["start_line"] + first
+            part["end_line"] = chunk["start_line"] + last - 1
+        part["part"] = number
+        part["parts"] = len(bounds)
+        parts.append(part)
+    return parts
+
+
+def _can_pack(packed, chunk):
+    """Two chunks can be packed if both are declarations or both are siblings of the same kind."""
+    if (packed.get("start_line") is None) != (chunk.get("start_line") is None):
+        return False
+    if packed.get("type") in DECLARATION_TYPES and chunk.get("type") in DECLARATION_TYPES:
+        return True
+    return packed.get("type") == chunk.get("type") and packed.get("parent") == chunk.get(
+        "parent"
+    )
+
+
+def _pack(packed, chunk):
+    merged = dict(packed)
+    merged["content"] = packed["content"].rstrip() + "\n" + chunk["content"]
+    if merged.get("start_line") is not None:
+        merged["end_line"] = chunk.get("end_line")
+    if packed.get("type") != chunk.get("type"):
+        merged["type"] = "other"
+    if packed.get("name") and chunk.get("name"):
+        merged["name"] = f"{packed['name']}, {chunk['name']}"
+    return merged
+
+
+def pack_chunks(chunks, min_tokens=CHUNK_MIN_TOKENS, target_tokens=CHUNK_TARGET_TOKENS):
+    """Packs runs of adjacent tiny chunks into chunks of up to `target_tokens`."""
+    packed_chunks = []
+    open_pack = False  # whether the last output chunk is still accepting tiny chunks
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk["content"])
+        if (
+            open_pack
+            and tokens < min_tokens
+            and _can_pack(packed_chunks[-1], chunk)
+            and estimate_tokens(packed_chunks[-1]["content"]) + tokens <= target_tokens
+        ):
+            packed_chunks[-1] = _pack(packed_chunks[-1], chunk)
+            continue
+        packed_chunks.append(chunk)
+        open_pack = tokens < min_tokens
+    return packed_chunks
+
+
+def normalize_chunks(
+    chunks,
+    max_tokens=CHUNK_MAX_TOKENS,
+    min_tokens=CHUNK_MIN_TOKENS,
+    target_tokens=CHUNK_TARGET_TOKENS,
+):
+    """
+    Normalizes parser output for a single file: oversized chunks are split
+    along syntactic sub-boundaries and runs of tiny adjacent chunks are packed
+    up to the target size.
+    """
+    chunks = [c for c in chunks if c.get("content", "").strip()]
+    split = [part for chunk in chunks for part in split_chunk(chunk, max_tokens)]
+    return pack_chunks(split, min_tokens, target_tokens)
+
+
+def chunk_stats(chunks, prompt_overhead=0):
+    """Returns chunk count, total and average size, and tokens sent for enrichment."""
+    tokens = sum(estimate_tokens(c.get("content", "")) for c in chunks)
+    return {
+        "chunks": len(chunks),
+        "tokens": tokens,
+        "avg_tokens": tokens / len(chunks) if chunks else 0,
+        "llm_tokens": tokens + prompt_overhead * len(chunks),
+    }
+
+
+def merge_stats(total, stats):
+    """Adds the counters of `stats` into `total` and recomputes the average."""
+    for key in ("chunks", "tokens", "llm_tokens"):
+        total[key] = total.get(key, 0) + stats.get(key, 0)
+    total["avg_tokens"] = total["tokens"] / total["chunks"] if total["chunks"] else 0
+    return total
@@ -0,0 +1,76 @@
+# src/components/chunk_records.py
+import sys
+
+# Fields sent per chunk from a parse worker; the chunks of a file share the rest
+ROW_FIELDS = ("chunk_id", "type", "name", "parent", "start_line", "end_line", "content")
+# Values repeated across many chunks, kept once in memory
+INTERNED_FIELDS = ("repo", "file_path", "lang", "type")
+# Fields stored in a document's page content rather than in its metadata
+TEXT_FIELDS = ("content", "summary", "keywords")
+# Metadata key giving the lengths of the code and summary in the page content
+TEXT_SPANS = "text_spans"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def pack_chunks(chunks):
+    """
+    Compact form of the parsed chunks of one file, for the trip from a parse
+    worker back to the indexing process: the repo, path and language once,
+    then a tuple of values per chunk. The summary and keywords are empty
+    before enrichment and are not sent.
+    """
+    if not chunks:
+        return None
+    first = chunks[0]
+    rows = tuple(tuple(chunk[field] for field in ROW_FIELDS) for chunk in chunks)
+    return first["repo"], first["file_path"], first["lang"], rows
+
+
+def unpack_chunks(packed):
+    """The chunk dicts of a pack_chunks result, with shared values interned."""
+    if packed is None:
+        return []
+    repo, file_path, lang, rows = packed
+    repo, file_path, lang = _intern(repo), _intern(file_path), _intern(lang)
+    chunks = []
+    for chunk_id, type, name, parent, start_line, end_line, content in rows:
+        chunks.append(
+            {
+                "repo": repo,
+                "file_path": file_path,
+                "lang": lang,
+                "chunk_id": chunk_id,
+                "type": _intern(type),
+                "name": name,
+                "parent": parent,
+                "start_line": start_line,
+                "end_line": end_line,
+                "content": content,
+                "summary": "",
+                "keywords": "",
+            }
+        )
+    return chunks
+
+
+def intern_chunk_fields(chunks):
+    """Interns the values repeated across chunks loaded from JSON, in place."""
+    for chunk in chunks:
+        for field in INTERNED_FIELDS:
+            if field in chunk:
+                chunk[field] = _intern(chunk[field])
+    return chunks
+
+
+def document_metadata(chunk):
+    """
+    The metadata stored with a chunk's document: its fields except the code,
+    summary and keywords, which the page content (see document_text) holds
+    already, and the lengths of the code and summary that start it.
+    """
+    metadata = {k: v for k, v in chunk.items() if k not in TEXT_FIELDS}
+    metadata[TEXT_SPANS] = [len(chunk.get("content", "")), len(chunk.get("summary", ""))]
+    return metadata
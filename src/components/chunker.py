@@ -1,20 +1,26 @@
 # src/components/chunker.py
-import os
+import hashlib
 from src.parsers.python_parser import parse_python_with_ast
 from src.parsers.js_parser import parse_js
 from src.parsers.java_parser import parse_java
 from src.parsers.markdown_parser import markdown_split
-from src.llm.ollama_client import enrich_chunk
+from src.components.chunk_normalizer import normalize_chunks, chunk_stats, estimate_tokens
+from src.components.code_graph import file_symbols
+from src.llm.ollama_client import ENRICH_PROMPT
+from src.utils.repo_walker import repo_relative_path
 
 
-def _parse_file(file_path):
-    """Dispatcher to parse a file based on its extension."""
+def _parse_file(file_path, references=None):
+    """
+    Dispatcher to parse a file based on its extension. Code parsers record
+    the file's imports, definitions and calls in `references` if given.
+    """
     if file_path.endswith(".py"):
-        return parse_python_with_ast(file_path), "python"
+        return parse_python_with_ast(file_path, references), "python"
     elif file_path.endswith(".js"):
-        return parse_js(file_path), "javascript"
+        return parse_js(file_path, references), "javascript"
     elif file_path.endswith(".java"):
-        return parse_java(file_path), "java"
+        return parse_java(file_path, references), "java"
     elif file_path.endswith((".md", ".txt")):
         with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
             content = f.read()
@@ -23,34 +29,65 @@ def _parse_file(file_path):
         return [], "unknown"
 
 
-def process_and_chunk_file(file_path, repo_name):
+def make_chunk_id(rel_path, content, seen=None):
+    """
+    Repo-unique chunk id from the file's relative path and a hash of the
+    chunk content, so an unchanged chunk keeps its id wherever it moves in
+    its file. `seen` (ids already used in the file) disambiguates repeats.
+    """
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    chunk_id = f"{rel_path}#{digest}"
+    if seen is not None:
+        count = seen.get(chunk_id, 0)
+        seen[chunk_id] = count + 1
+        if count:
+            chunk_id = f"{chunk_id}~{count + 1}"
+    return chunk_id
+
+
+def parse_and_chunk_file(file_path, repo_name, stats=None, symbols=None):
     """
-    Parses a single file, adds metadata, and returns a list of chunks.
-    (This is now a sequential operation for a single file).
+    Parses a single file, adds metadata, and returns a list of chunks that
+    are not enriched yet (empty summary and keywords).
+    If a `stats` dict is given, chunk sizing before and after normalization is recorded in it.
+    If a `symbols` dict is given, the file's imports and the names each
+    chunk defines and refers to are recorded in it, for the code graph.
     """
-    raw_chunks, lang = _parse_file(file_path)
+    if symbols is None:
+        raw_chunks, lang = _parse_file(file_path)
+    else:
+        references = {}
+        raw_chunks, lang = _parse_file(file_path, references)
     if lang == "unknown":
         return []
 
+    chunks = normalize_chunks(raw_chunks)
+    if stats is not None:
+        overhead = estimate_tokens(ENRICH_PROMPT)
+        stats["before"] = chunk_stats(raw_chunks, overhead)
+        stats["after"] = chunk_stats(chunks, overhead)
+
+    rel_path = repo_relative_path(file_path, repo_name)
+    seen_ids = {}
     processed_chunks = []
-    for i, chunk in enumerate(raw_chunks):
+    for chunk in chunks:
         content = chunk.get("content", "")
-
-        # Enrich chunks one by one
-        enriched_data = enrich_chunk(content)
-        summary = enriched_data["summary"]
-        keywords = enriched_data["keywords"]
-
         entry = {
             "repo": repo_name,
             "file_path": file_path,
             "lang": lang,
-            "chunk_id": f"{os.path.basename(file_path)}-{i}",
+            "chunk_id": make_chunk_id(rel_path, content.rstrip(), seen_ids),
+            "type": chunk.get("type"),
+            "name": chunk.get("name"),
+            "parent": chunk.get("parent"),
             "start_line": chunk.get("start_line"),
             "end_line": chunk.get("end_line"),
             "content": content.rstrip(),
-            "summary": summary,
-            "keywords": keywords,
+            "summary": "",
+            "keywords": "",
         }
         processed_chunks.append(entry)
+    if symbols is not None:
+        symbols.update(file_symbols(processed_chunks, references, lang))
     return processed_chunks
+
@@ -0,0 +1,189 @@
+# src/components/code_graph.py
+import os
+import json
+import posixpath
+from collections import defaultdict
+from src.utils.atomic_io import atomic_write_json
+
+GRAPH_FILE = "graph.json"  # edges, all that queries load
+SYMBOLS_FILE = "symbols.json"  # per-file symbols, for the next update
+
+
+def file_symbols(chunks, references, lang):
+    """
+    Assigns a file's definitions and references (from its parser) to the
+    chunks whose lines contain them: the narrowest such chunk, preferring
+    a method over the skeleton of its class. Returns the file's symbols,
+    {"lang", "imports", "chunks": {chunk_id: {"defines", "refs"}}}.
+    """
+    spans = [
+        (chunk.get("type") == "class", chunk["end_line"] - chunk["start_line"], chunk)
+        for chunk in chunks
+        if chunk.get("start_line") is not None and chunk.get("end_line") is not None
+    ]
+    spans.sort(key=lambda span: span[:2])
+
+    def owner(line):
+        for _, _, chunk in spans:
+            if chunk["start_line"] <= line <= chunk["end_line"]:
+                return chunk["chunk_id"]
+        return None  # lines outside every chunk, e.g. unplaced JS/Java code
+
+    symbols = defaultdict(lambda: {"defines": set(), "refs": set()})
+    for key in ("defines", "refs"):
+        for line, name in references.get(key, ()):
+            chunk_id = owner(line)
+            if chunk_id:
+                symbols[chunk_id][key].add(name)
+    return {
+        "lang": lang,
+        "imports": references.get("imports", {}),
+        "chunks": {
+            chunk_id: {key: sorted(names) for key, names in entry.items()}
+            for chunk_id, entry in symbols.items()
+        },
+    }
+
+
+def _module_paths(path, lang, module, level):
+    """
+    Candidate repository paths of a module imported by the file at `path`,
+    and whether they are exact (relative imports) or may match as a suffix
+    (absolute imports, e.g. of a package under src/).
+    """
+    if lang == "python":
+        parts = module.split(".") if module else []
+        if level:
+            base = posixpath.dirname(path)
+            for _ in range(level - 1):
+                base = posixpath.dirname(base)
+            stem = posixpath.join(base, *parts)
+            return [stem + ".py", posixpath.join(stem, "__init__.py")], True
+        stem = "/".join(parts)
+        return [stem + ".py", stem + "/__init__.py"], False
+    if lang == "javascript":
+        if not module.startswith("."):
+            return [], True  # a package from node_modules
+        stem = posixpath.normpath(posixpath.join(posixpath.dirname(path), module))
+        return [stem, stem + ".js", stem + "/index.js"], True
+    if lang == "java":
+        return [module.replace(".", "/") + ".java"], False
+    return [], True
+
+
+class CodeGraph:
+    """
+    Import and call edges between the chunks of a repository. The symbols of
+    each file (its imports, the names each chunk defines and refers to) are
+    kept per file and replaced only when the file changes; edges are then
+    resolved from them with dictionary lookups. A name resolves to the
+    definition it was imported from, else one in the same file, else the
+    only definition in the repository (ambiguous names make no edge).
+    """
+
+    def __init__(self, files=None, edges=None):
+        self.files = files or {}  # repo-relative path -> symbols (see file_symbols)
+        self.edges = edges or {}  # chunk_id -> [chunk ids it imports or calls]
+        self.callers = self._invert(self.edges)
+
+    def __len__(self):
+        return len(self.edges)
+
+    @staticmethod
+    def _invert(edges):
+        callers = defaultdict(list)
+        for chunk_id, targets in edges.items():
+            for target in targets:
+                callers[target].append(chunk_id)
+        return dict(callers)
+
+    def update(self, changed, removed=()):
+        """Replaces the symbols of changed files ({path: symbols}) and drops removed ones."""
+        self.files.update(changed)
+        for path in removed:
+            self.files.pop(path, None)
+
+    def _module_file(self, path, lang, module, level, by_suffix):
+        candidates, exact = _module_paths(path, lang, module, level)
+        for candidate in candidates:
+            if candidate in self.files:
+                return candidate
+            if not exact and len(by_suffix.get(candidate, ())) == 1:
+                return by_suffix[candidate][0]
+        return None
+
+    def resolve(self, canonical=None):
+        """
+        Recomputes the edges from the stored symbols. `canonical` maps the
+        ids of near-duplicate chunks to the chunk indexed in their place.
+        """
+        canonical = canonical or {}
+        definitions = defaultdict(list)  # name -> [(path, chunk_id)]
+        by_suffix = defaultdict(list)  # "pkg/mod.py" -> ["src/pkg/mod.py", ...]
+        for path, symbols in self.files.items():
+            for chunk_id, entry in symbols.get("chunks", {}).items():
+                for name in entry["defines"]:
+                    definitions[name].append((path, chunk_id))
+            parts = path.split("/")
+            for i in range(1, len(parts)):
+                by_suffix["/".join(parts[i:])].append(path)
+
+        edges = defaultdict(list)
+        for path, symbols in self.files.items():
+            imports = {}
+            for local, (module, name, level) in symbols.get("imports", {}).items():
+                module_file = self._module_file(
+                    path, symbols["lang"], module, level, by_suffix
+                )
+                if module_file:
+                    imports[local] = (module_file, name or local)
+
+            for chunk_id, entry in symbols.get("chunks", {}).items():
+                source = canonical.get(chunk_id, chunk_id)
+                for name in entry["refs"]:
+                    for target in self._targets(name, path, imports, definitions):
+                        target = canonical.get(target, target)
+                        if target != source and target not in edges[source]:
+                            edges[source].append(target)
+        self.edges = {chunk_id: targets for chunk_id, targets in edges.items() if targets}
+        self.callers = self._invert(self.edges)
+        return sum(len(targets) for targets in self.edges.values())
+
+    @staticmethod
+    def _targets(name, path, imports, definitions):
+        candidates = definitions.get(name, ())
+        if name in imports:
+            module_file, imported = imports[name]
+            hits = [c for p, c in definitions.get(imported, ()) if p == module_file]
+            if hits:
+                return hits
+        local = [c for p, c in candidates if p == path]
+        if local:
+            return local
+        return [candidates[0][1]] if len(candidates) == 1 else []
+
+    def neighbors(self, chunk_id):
+        """Chunks one hop away: those `chunk_id` imports or calls, then its callers."""
+        return self.edges.get(chunk_id, []) + self.callers.get(chunk_id, [])
+
+    def save(self, path):
+        """Writes the edges and symbols into a generation directory."""
+        atomic_write_json(os.path.join(path, GRAPH_FILE), self.edges)
+        atomic_write_json(os.path.join(path, SYMBOLS_FILE), self.files)
+
+    @classmethod
+    def load(cls, path, symbols=True):
+        """
+        Loads the graph of a generation directory (empty if it has none);
+        without `symbols`, only the edges, which is all queries need.
+        """
+        graph = cls()
+        if not path or not os.path.exists(os.path.join(path, GRAPH_FILE)):
+            return graph
+        with open(os.path.join(path, GRAPH_FILE), "r", encoding="utf-8") as f:
+            graph.edges = json.load(f)
+        graph.callers = cls._invert(graph.edges)
+        if symbols and os.path.exists(os.path.join(path, SYMBOLS_FILE)):
+            with open(os.path.join(path, SYMBOLS_FILE), "r", encoding="utf-8") as f:
+                graph.files = json.load(f)
+        return graph
@@ -0,0 +1,165 @@
+# src/components/context_assembler.py
+from src.components.chunk_normalizer import estimate_tokens
+from src.components.chunk_records import TEXT_SPANS
+from config.settings import CONTEXT_TOKEN_BUDGET, CONTEXT_FULL_CODE_HITS
+
+
+def document_code(doc):
+    """Returns the code of a retrieved chunk, without the summary and keywords appended for embedding."""
+    metadata = doc.metadata
+    if TEXT_SPANS in metadata:
+        return doc.page_content[: metadata[TEXT_SPANS][0]]
+    # Documents stored before the spans keep the summary and keywords in metadata
+    keywords = metadata.get("keywords", "")
+    if isinstance(keywords, list):
+        keywords = ", ".join(keywords)
+    suffix = metadata.get("summary", "") + keywords
+    if suffix and doc.page_content.endswith(suffix):
+        return doc.page_content[: -len(suffix)]
+    return doc.page_content
+
+
+def document_summary(doc):
+    """Returns the summary of a retrieved chunk."""
+    metadata = doc.metadata
+    if TEXT_SPANS in metadata:
+        code_chars, summary_chars = metadata[TEXT_SPANS]
+        return doc.page_content[code_chars : code_chars + summary_chars]
+    return metadata.get("summary") or ""
+
+
+class ContextBlock:
+    """A contiguous piece of one file made of one or more retrieved chunks."""
+
+    def __init__(self, rank, doc):
+        metadata = doc.metadata
+        self.rank = rank
+        self.docs = [doc]
+        self.file_path = metadata.get("file_path")
+        self.repo = metadata.get("repo")
+        self.start_line = metadata.get("start_line")
+        self.end_line = metadata.get("end_line")
+        self.location = (self.repo, self.file_path)
+        self.code = document_code(doc).rstrip()
+        self.summaries = [document_summary(doc)]
+        # A class skeleton spans its methods' lines without containing their code
+        self.is_skeleton = metadata.get("type") == "class"
+        # Only a range the code fills line for line can be compared with others:
+        # packed chunks drop blank lines, and older indexes stored every part of
+        # a split block with the block's start line (see agrees)
+        self.exact_lines = (
+            self.has_lines
+            and not self.is_skeleton
+            and len(self.code.splitlines()) == self.end_line - self.start_line + 1
+        )
+
+    @property
+    def has_lines(self):
+        return self.start_line is not None and self.end_line is not None
+
+    def agrees(self, other):
+        """Whether `other` (starting at or after this block) has the same code on the lines both cover."""
+        own_lines = self.code.splitlines()[other.start_line - self.start_line :]
+        other_lines = other.code.splitlines()
+        shared = min(len(own_lines), len(other_lines))
+        return own_lines[:shared] == other_lines[:shared]
+
+    def contains(self, other):
+        return (
+            self.exact_lines
+            and other.exact_lines
+            and self.location == other.location
+            and self.start_line <= other.start_line
+            and other.end_line <= self.end_line
+            and self.agrees(other)
+        )
+
+    def touches(self, other):
+        """Whether `other` (starting at or after this block) overlaps or directly follows it."""
+        return (
+            self.exact_lines
+            and other.exact_lines
+            and self.location == other.location
+            and other.start_line <= self.end_line + 1
+            and self.agrees(other)
+        )
+
+    def merge(self, other):
+        overlap = self.end_line - other.start_line + 1
+        other_lines = other.code.splitlines()
+        if overlap > 0:
+            other_lines = other_lines[overlap:]
+        if other_lines:
+            self.code = self.code + "\n" + "\n".join(other_lines)
+        self.end_line = max(self.end_line, other.end_line)
+        self.rank = min(self.rank, other.rank)
+        self.docs.extend(other.docs)
+        self.summaries.extend(other.summaries)
+
+    def header(self):
+        prefix = f"[{self.repo}] " if self.repo else ""
+        lines = f" (Lines: {self.start_line}-{self.end_line})" if self.has_lines else ""
+        return f"{prefix}File: {self.file_path}{lines}"
+
+    def full_text(self):
+        return f"{self.header()}\n{self.code}"
+
+    def summary_text(self):
+        summary = " ".join(s for s in self.summaries if s) or self.code[:200]
+        return f"{self.header()}\nSummary: {summary}"
+
+
+def assemble_context(
+    documents,
+    token_budget=CONTEXT_TOKEN_BUDGET,
+    full_code_hits=CONTEXT_FULL_CODE_HITS,
+):
+    """
+    Builds the answer prompt context from ranked documents:
+    - drops chunks whose lines are already covered by a better-ranked chunk,
+    - merges overlapping or adjacent chunks of the same file into one block,
+      both only where the chunks' code fills their ranges and agrees,
+    - sends the top blocks as full code and the rest as their stored
+      summaries, stopping when the token budget is used up.
+    Returns (context, documents used, stats).
+    """
+    blocks = []
+    for rank, doc in enumerate(documents):
+        block = ContextBlock(rank, doc)
+        if not any(kept.contains(block) for kept in blocks):
+            blocks.append(block)
+
+    # Merge neighbours within each file, walking the blocks in line order
+    merged = []
+    for block in sorted(
+        blocks, key=lambda b: (str(b.location), b.start_line or 0, b.rank)
+    ):
+        if merged and merged[-1].touches(block):
+            merged[-1].merge(block)
+        else:
+            merged.append(block)
+    merged.sort(key=lambda b: b.rank)
+
+    parts, used_docs = [], []
+    remaining = token_budget
+    full_blocks = summary_blocks = 0
+    for position, block in enumerate(merged):
+        text = block.full_text() if position < full_code_hits else None
+        if text is None or estimate_tokens(text) > remaining:
+            text = block.summary_text()
+            if estimate_tokens(text) > remaining:
+                break
+            summary_blocks += 1
+        else:
+            full_blocks += 1
+        parts.append(text)
+        used_docs.extend(block.docs)
+        remaining -= estimate_tokens(text)
+
+    stats = {
+        "context_tokens": token_budget - remaining,
+        "candidates": len(documents),
+        "full_blocks": full_blocks,
+        "summary_blocks": summary_blocks,
+    }
+    return "\n\n".join(parts), used_docs, stats
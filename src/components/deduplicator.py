@@ -0,0 +1,231 @@
+# src/components/deduplicator.py
+import os
+import re
+import json
+import hashlib
+import random
+import numpy as np
+from src.utils.atomic_io import atomic_write_json
+from config.settings import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS
+
+FINGERPRINTS_FILE = "fingerprints.json"  # canonical chunks' MinHash signatures
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 5
+
+
+def _tokens(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _hash(value):
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over chunk contents. Each added chunk is either a
+    canonical chunk or a near-duplicate of one; `find` returns the key of the
+    canonical chunk whose estimated Jaccard similarity reaches the threshold.
+    """
+
+    def __init__(
+        self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, bands=DEDUP_BANDS
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(1)  # fixed seed so signatures are stable across runs
+        # (a * shingle + b) mod p stays within uint64 for 32-bit shingle hashes
+        size = self.rows * bands
+        self.perm_a = np.array(
+            [rng.randrange(1, MERSENNE_PRIME) for _ in range(size)], dtype=np.uint64
+        )[:, None]
+        self.perm_b = np.array(
+            [rng.randrange(0, MERSENNE_PRIME) for _ in range(size)], dtype=np.uint64
+        )[:, None]
+        self.exact = {}  # normalized content hash -> key
+        self.buckets = {}  # (band, band hash) -> [keys]
+        self.signatures = {}  # key -> minhash signature
+        self.fingerprints = {}  # key -> (exact hash, signature), what is saved
+
+    def _fingerprint(self, text):
+        """Returns the exact-match hash and the MinHash signature (None for tiny texts)."""
+        tokens = _tokens(text)
+        exact = hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest()
+        if len(tokens) < SHINGLE_SIZE:
+            return exact, None
+
+        shingles = np.fromiter(
+            {
+                _hash(" ".join(tokens[i : i + SHINGLE_SIZE]))
+                for i in range(len(tokens) - SHINGLE_SIZE + 1)
+            },
+            dtype=np.uint64,
+        )
+        hashed = (self.perm_a * shingles[None, :] + self.perm_b) % MERSENNE_PRIME
+        return exact, tuple(hashed.min(axis=1).tolist())
+
+    def _bands(self, signature):
+        for band in range(self.bands):
+            yield band, hash(signature[band * self.rows : (band + 1) * self.rows])
+
+    def _similarity(self, sig_a, sig_b):
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+    def find(self, text, fingerprint=None):
+        """Returns the key of a canonical near-duplicate of `text`, or None."""
+        exact, signature = fingerprint or self._fingerprint(text)
+        if exact in self.exact:
+            return self.exact[exact]
+        if signature is None:
+            return None
+
+        best_key, best_score = None, self.threshold
+        seen = set()
+        for band_key in self._bands(signature):
+            for key in self.buckets.get(band_key, []):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = self._similarity(signature, self.signatures[key])
+                if score >= best_score:
+                    best_key, best_score = key, score
+        return best_key
+
+    def add(self, key, text, fingerprint=None):
+        """Registers `text` as a canonical chunk under `key`."""
+        exact, signature = fingerprint or self._fingerprint(text)
+        self.fingerprints[key] = (exact, signature)
+        self.exact.setdefault(exact, key)
+        if signature is None:
+            return
+        self.signatures[key] = signature
+        for band_key in self._bands(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def remove(self, key):
+        """Unregisters the canonical chunk `key`."""
+        exact, signature = self.fingerprints.pop(key)
+        if self.exact.get(exact) == key:
+            del self.exact[exact]
+        if signature is None:
+            return
+        del self.signatures[key]
+        for band_key in self._bands(signature):
+            keys = self.buckets[band_key]
+            keys.remove(key)
+            if not keys:
+                del self.buckets[band_key]
+
+    def sync(self, canonical_chunks):
+        """
+        Makes `canonical_chunks` the registered canonical chunks, removing
+        the others and fingerprinting only those not registered yet.
+        Returns the number of chunks fingerprinted.
+        """
+        chunks = {chunk["chunk_id"]: chunk for chunk in canonical_chunks}
+        for key in [key for key in self.fingerprints if key not in chunks]:
+            self.remove(key)
+        added = 0
+        for key, chunk in chunks.items():
+            if key not in self.fingerprints:
+                self.add(key, chunk.get("content", ""))
+                added += 1
+        return added
+
+    def save(self, file_path):
+        """Writes the fingerprints of the canonical chunks, to be loaded by the next run."""
+        atomic_write_json(
+            file_path,
+            {
+                "num_perm": len(self.perm_a),
+                "bands": self.bands,
+                "chunks": self.fingerprints,
+            },
+            indent=None,
+        )
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Loads the fingerprints saved at `file_path`. The index is empty if
+        there are none or they were computed with other MinHash settings.
+        """
+        index = cls()
+        if not file_path or not os.path.exists(file_path):
+            return index
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("num_perm") != len(index.perm_a) or data.get("bands") != index.bands:
+            return index
+        for key, (exact, signature) in data["chunks"].items():
+            index.add(key, None, (exact, tuple(signature) if signature else None))
+        return index
+
+    def add_or_find(self, key, text):
+        """Returns the canonical key for `text`, registering it as canonical if it is new."""
+        fingerprint = self._fingerprint(text)
+        canonical = self.find(text, fingerprint)
+        if canonical is None:
+            self.add(key, text, fingerprint)
+        return canonical
+
+
+def assign_duplicates(new_chunks, canonical_chunks=(), index=None):
+    """
+    Marks near-duplicate chunks with `duplicate_of` pointing at the chunk_id
+    of their canonical chunk. `canonical_chunks` are already-indexed chunks
+    that new chunks may duplicate, or `index` already holds them; new
+    canonical chunks are added to it. Returns the new chunks that are canonical.
+    """
+    if index is None:
+        index = NearDuplicateIndex()
+        for chunk in canonical_chunks:
+            index.add(chunk["chunk_id"], chunk.get("content", ""))
+
+    canonicals = []
+    for chunk in new_chunks:
+        canonical_id = index.add_or_find(chunk["chunk_id"], chunk.get("content", ""))
+        if canonical_id is None or canonical_id == chunk["chunk_id"]:
+            chunk.pop("duplicate_of", None)
+            canonicals.append(chunk)
+        else:
+            chunk["duplicate_of"] = canonical_id
+    return canonicals
+
+
+def promote_orphans(chunks, removed_ids):
+    """
+    Re-links duplicates whose canonical chunk was removed: the first orphan of
+    each removed canonical becomes the new canonical. Returns the promoted chunks.
+    """
+    promoted = {}
+    for chunk in chunks:
+        canonical_id = chunk.get("duplicate_of")
+        if canonical_id not in removed_ids:
+            continue
+        if canonical_id in promoted:
+            chunk["duplicate_of"] = promoted[canonical_id]["chunk_id"]
+        else:
+            del chunk["duplicate_of"]
+            promoted[canonical_id] = chunk
+    return list(promoted.values())
+
+
+def duplicate_locations(chunks):
+    """Maps each canonical chunk_id to the locations of its duplicates."""
+    locations = {}
+    for chunk in chunks:
+        if chunk.get("duplicate_of"):
+            locations.setdefault(chunk["duplicate_of"], []).append(
+                {
+                    "file_path": chunk["file_path"],
+                    "start_line": chunk.get("start_line"),
+                    "end_line": chunk.get("end_line"),
+                }
+            )
+    return locations
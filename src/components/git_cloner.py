@@ -34,3 +34,13 @@ def clone_github_repo(github_url, base_dir="repos"):
         Repo.clone_from(github_url, local_path)
 
     return local_path
+
+
+def head_commit(local_path):
+    """The SHA of the commit checked out in a local clone, or None if unknown."""
+    if Repo is None:
+        return None
+    try:
+        return Repo(local_path).head.commit.hexsha
+    except Exception:  # not a git checkout, or no commit yet
+        return None
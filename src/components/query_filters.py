@@ -0,0 +1,89 @@
+# src/components/query_filters.py
+import re
+from fnmatch import fnmatch
+import numpy as np
+from src.utils.repo_walker import repo_relative_path
+
+FILTER_KEYS = ("lang", "path", "type")
+FILTER_PATTERN = re.compile(r"(?<!\S)(lang|path|type):(\S+)")
+LANG_ALIASES = {"py": "python", "js": "javascript", "md": "markdown"}
+
+
+def parse_query(query_text):
+    """
+    Splits `lang:python path:src/ type:class` predicates out of a query.
+    Returns (query without predicates, {key: [values]}): values of one key
+    are alternatives, different keys must all match.
+    """
+    filters = {}
+    for key, value in FILTER_PATTERN.findall(query_text):
+        value = value.lower() if key != "path" else value
+        if key == "lang":
+            value = LANG_ALIASES.get(value, value)
+        filters.setdefault(key, []).append(value)
+    cleaned = " ".join(FILTER_PATTERN.sub(" ", query_text).split())
+    return cleaned, filters
+
+
+def merge_filters(*filter_sets):
+    """Combines filter dicts, e.g. explicit arguments and inline predicates."""
+    merged = {}
+    for filters in filter_sets:
+        for key, values in (filters or {}).items():
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unknown filter '{key}', expected one of {FILTER_KEYS}.")
+            if isinstance(values, str):
+                values = [values]
+            merged.setdefault(key, []).extend(values)
+    return merged
+
+
+def relative_path(metadata):
+    """The chunk's file path relative to its repository checkout."""
+    return repo_relative_path(metadata.get("file_path") or "", metadata.get("repo"))
+
+
+class MetadataTable:
+    """
+    Column view of the filterable metadata of a loaded vectorstore, built
+    once so filters resolve to FAISS ids with array operations instead of
+    walking the docstore on every query.
+    """
+
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+        ids, langs, types, paths = [], [], [], []
+        for faiss_id, doc_id in vectorstore.index_to_docstore_id.items():
+            metadata = vectorstore.docstore.metadata(doc_id)
+            ids.append(faiss_id)
+            langs.append(str(metadata.get("lang") or "").lower())
+            types.append(str(metadata.get("type") or "").lower())
+            paths.append(relative_path(metadata))
+        self.ids = np.array(ids, dtype=np.int64)
+        self.columns = {
+            "lang": np.array(langs, dtype=str),
+            "type": np.array(types, dtype=str),
+            "path": np.array(paths, dtype=str),
+        }
+
+    def _mask(self, key, values):
+        column = self.columns[key]
+        mask = np.zeros(len(self.ids), dtype=bool)
+        for value in values:
+            if key != "path":
+                mask |= column == value
+            elif any(char in value for char in "*?["):
+                mask |= np.fromiter(
+                    (fnmatch(path, value) for path in column), dtype=bool, count=len(column)
+                )
+            else:
+                prefix = value[2:] if value.startswith("./") else value
+                mask |= np.char.startswith(column, prefix)
+        return mask
+
+    def select(self, filters):
+        """Returns the FAISS ids of the documents matching every filter."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        for key, values in filters.items():
+            mask &= self._mask(key, values)
+        return self.ids[mask]
@@ -0,0 +1,356 @@
+# src/components/sharded_index.py
+import os
+import json
+import math
+import heapq
+import shutil
+import zlib
+import contextvars
+from collections import ChainMap, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import faiss
+import numpy as np
+from src.components.chunk_index import ChunkIndex
+from src.components.query_filters import relative_path
+from src.utils.tracing import span
+from config.settings import (
+    INDEX_SHARD_BY,
+    SHARD_MIN_CHUNKS,
+    SHARD_MAX_CHUNKS,
+    SHARD_SEARCH_WORKERS,
+)
+
+SHARDS_FILE = "shards.json"
+SHARDS_DIR = "shards"
+SMALL_SHARD = "small"  # directories too small for a shard of their own
+SINGLE_SHARD = "all"
+LEGACY_SHARD = "unsharded"  # an index saved before sharding, until rebalanced
+
+# Shared by all indexes: FAISS releases the GIL, so shards search in parallel
+_executor = ThreadPoolExecutor(max_workers=SHARD_SEARCH_WORKERS)
+
+
+def shard_key(metadata, by=INDEX_SHARD_BY):
+    """
+    The unit kept together in one shard: the chunk's top-level directory
+    ("" for files at the repository root), or its file when sharding by size.
+    """
+    path = relative_path(metadata)
+    if by == "size":
+        return path
+    head, sep, _ = path.partition("/")
+    return head if sep else ""
+
+
+def _link_shard(source, target):
+    """Reuses an unchanged shard of the previous generation, hard-linked if possible."""
+    os.makedirs(target)
+    for name in os.listdir(source):
+        try:
+            os.link(os.path.join(source, name), os.path.join(target, name))
+        except OSError:
+            shutil.copy2(os.path.join(source, name), os.path.join(target, name))
+
+
+class ShardedDocstore:
+    """The `docstore` of a ShardedIndex: looks chunks up in their shard."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def _shard(self, chunk_id):
+        return self.index.shards.get(self.index.chunk_shard.get(chunk_id))
+
+    def search(self, chunk_id):
+        shard = self._shard(chunk_id)
+        return shard.docstore.search(chunk_id) if shard else None
+
+    def metadata(self, chunk_id):
+        shard = self._shard(chunk_id)
+        return shard.docstore.metadata(chunk_id) if shard else {}
+
+    def dump(self):
+        records = {}
+        for shard in self.index.shards.values():
+            records.update(shard.docstore.dump())
+        return records
+
+
+class ShardedIndex:
+    """
+    A repository index split into ChunkIndex shards, by top-level directory
+    (directories under SHARD_MIN_CHUNKS chunks share one shard) or by size
+    (files hashed over shards of about SHARD_MAX_CHUNKS chunks). The shards
+    share one FAISS id space, so ids stay unique across the whole index.
+
+    Searches fan out to the shards in parallel and merge their top-k. A save
+    rewrites only the shards changed since the index was loaded; the others
+    are linked from the generation they were loaded from.
+    """
+
+    def __init__(self, dim, embedding_function=None, by=INDEX_SHARD_BY):
+        self.dim = dim
+        self.embedding_function = embedding_function
+        self.by = by
+        self.parts = 1  # shards when sharding by size
+        self.large_keys = set()  # directories with a shard of their own
+        self.shards = {}
+        self.chunk_shard = {}  # chunk_id -> shard name
+        self.dirty = set()  # shards changed since they were loaded
+        self.path = None  # generation the shards were loaded from
+        self.next_id = 0
+        self.docstore = ShardedDocstore(self)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards.values())
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.chunk_shard
+
+    @property
+    def index_to_docstore_id(self):
+        """FAISS id -> chunk_id over all shards."""
+        return ChainMap(
+            *(shard.index_to_docstore_id for shard in self.shards.values())
+        )
+
+    @property
+    def metric_type(self):
+        for shard in self.shards.values():
+            return shard.metric_type
+        return faiss.METRIC_L2
+
+    @property
+    def mmapped(self):
+        return any(shard.mmapped for shard in self.shards.values())
+
+    @property
+    def fragmentation(self):
+        """The highest share of tombstoned vectors of any shard."""
+        return max(
+            (shard.fragmentation for shard in self.shards.values()), default=0.0
+        )
+
+    def shard_for(self, metadata):
+        """The shard a chunk belongs in under the current layout."""
+        key = shard_key(metadata, self.by)
+        if self.by == "size":
+            return f"part-{zlib.crc32(key.encode()) % self.parts:03d}"
+        if self.by == "directory":
+            return f"dir-{key}" if key in self.large_keys else SMALL_SHARD
+        return SINGLE_SHARD
+
+    def _shard(self, name):
+        if name not in self.shards:
+            self.shards[name] = ChunkIndex(self.dim, self.embedding_function)
+        return self.shards[name]
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None):
+        """Adds (text, vector) pairs under the given chunk ids to their shards."""
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            return []
+        metadatas = metadatas or [{} for _ in text_embeddings]
+        faiss_ids = range(self.next_id, self.next_id + len(ids))
+        self.next_id += len(ids)
+
+        batches = defaultdict(list)
+        for item in zip(text_embeddings, metadatas, ids, faiss_ids):
+            batches[self.shard_for(item[1])].append(item)
+        for name, batch in batches.items():
+            pairs, metas, chunk_ids, int_ids = zip(*batch)
+            # A chunk stored in another shard is moved, not duplicated
+            self.delete([c for c in chunk_ids if self.chunk_shard.get(c, name) != name])
+            self._shard(name).add_embeddings(
+                pairs, list(metas), list(chunk_ids), int_ids
+            )
+            self.chunk_shard.update(dict.fromkeys(chunk_ids, name))
+            self.dirty.add(name)
+        return ids
+
+    def add_documents(self, documents, ids):
+        """Embeds and adds documents under the given chunk ids."""
+        texts = [doc.page_content for doc in documents]
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(
+            zip(texts, vectors), [doc.metadata for doc in documents], ids
+        )
+
+    def delete(self, ids):
+        """Tombstones chunks by chunk_id in their shards; unknown ids are ignored."""
+        by_shard = defaultdict(list)
+        for chunk_id in ids:
+            name = self.chunk_shard.pop(chunk_id, None)
+            if name is not None:
+                by_shard[name].append(chunk_id)
+        for name, chunk_ids in by_shard.items():
+            self.shards[name].delete(chunk_ids)
+            self.dirty.add(name)
+        return sum(len(chunk_ids) for chunk_ids in by_shard.values())
+
+    def touch(self, chunk_ids):
+        """Marks the shards of chunks whose documents were changed in place."""
+        for chunk_id in chunk_ids:
+            if chunk_id in self.chunk_shard:
+                self.dirty.add(self.chunk_shard[chunk_id])
+
+    def reconstruct(self, faiss_id):
+        for shard in self.shards.values():
+            if faiss_id in shard.index_to_docstore_id:
+                return shard.reconstruct(faiss_id)
+        raise KeyError(faiss_id)
+
+    def compact(self, min_fragmentation=0.0):
+        """Compacts the shards with more than `min_fragmentation` tombstoned vectors."""
+        removed = 0
+        for name, shard in self.shards.items():
+            count = shard.compact(min_fragmentation)
+            if count:
+                self.dirty.add(name)
+                removed += count
+        return removed
+
+    def plan(self, metadatas, by=INDEX_SHARD_BY):
+        """Sets the layout for chunks with the given metadata."""
+        self.by = by
+        counts = defaultdict(int)
+        for metadata in metadatas:
+            counts[shard_key(metadata, by)] += 1
+        self.parts = max(1, math.ceil(sum(counts.values()) / SHARD_MAX_CHUNKS))
+        self.large_keys = {
+            key for key, count in counts.items() if key and count >= SHARD_MIN_CHUNKS
+        }
+
+    def rebalance(self, by=INDEX_SHARD_BY):
+        """
+        Recomputes the layout from the stored chunks and moves the chunks
+        whose shard changed: directories that grew past SHARD_MIN_CHUNKS get
+        a shard of their own, shrunk ones are merged into the small shard,
+        and size shards are re-split as the index grows. Returns the moves.
+        """
+        self.plan((self.docstore.metadata(c) for c in self.chunk_shard), by)
+
+        moves = defaultdict(list)  # source shard -> chunk ids
+        for chunk_id, name in self.chunk_shard.items():
+            if self.shard_for(self.docstore.metadata(chunk_id)) != name:
+                moves[name].append(chunk_id)
+        moved = 0
+        for name, chunk_ids in moves.items():
+            shard = self.shards[name]
+            faiss_ids = [shard.chunk_to_id[c] for c in chunk_ids]
+            vectors = shard.index.reconstruct_batch(
+                np.array(faiss_ids, dtype=np.int64)
+            )
+            docs = [shard.docstore.search(c) for c in chunk_ids]
+            # Moved chunks get new ids: the old ones stay tombstoned in `shard`
+            self.delete(chunk_ids)
+            self.add_embeddings(
+                [(doc.page_content, vector) for doc, vector in zip(docs, vectors)],
+                [doc.metadata for doc in docs],
+                chunk_ids,
+            )
+            moved += len(chunk_ids)
+
+        for name in [name for name, shard in self.shards.items() if not len(shard)]:
+            del self.shards[name]
+        return moved
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, faiss_ids=None):
+        """Searches every shard in parallel and merges their results into one top-k."""
+        shards = [shard for shard in self.shards.values() if len(shard)]
+        if len(shards) == 1:
+            return shards[0].similarity_search_with_score_by_vector(
+                embedding, k, faiss_ids
+            )
+        # Each shard search runs in a copy of this context, so it sees the query's trace
+        contexts = [contextvars.copy_context() for _ in shards]
+        results = _executor.map(
+            lambda shard, context: context.run(
+                shard.similarity_search_with_score_by_vector, embedding, k, faiss_ids
+            ),
+            shards,
+            contexts,
+        )
+        # Every shard scores with the same metric: L2 distances (lower is
+        # closer) or inner products (higher is closer)
+        hits = (hit for shard_hits in results for hit in shard_hits)
+        if self.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return heapq.nlargest(k, hits, key=lambda hit: hit[1])
+        return heapq.nsmallest(k, hits, key=lambda hit: hit[1])
+
+    def similarity_search_with_score(self, query, k=4):
+        with span("embed_query"):
+            embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k=k)
+
+    def layout(self):
+        """The shard layout, as saved in shards.json."""
+        return {
+            "by": self.by,
+            "parts": self.parts,
+            "next_id": self.next_id,
+            "shards": {
+                name: {"chunks": len(shard), "vectors": shard.index.ntotal}
+                for name, shard in sorted(self.shards.items())
+            },
+            "large_keys": sorted(self.large_keys),
+        }
+
+    def save_local(self, path):
+        """
+        Writes the shards changed since loading and links the others from
+        the generation they were loaded from. Returns the rewritten shards.
+        """
+        written = []
+        for name, shard in self.shards.items():
+            target = os.path.join(path, SHARDS_DIR, name)
+            source = self.path and os.path.join(self.path, SHARDS_DIR, name)
+            if name not in self.dirty and source and os.path.isdir(source):
+                _link_shard(source, target)
+            else:
+                shard.save_local(target)
+                written.append(name)
+        with open(os.path.join(path, SHARDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.layout(), f, indent=2)
+        return written
+
+    def mark_saved(self, path):
+        """Records that the shards now live in the generation at `path`."""
+        self.path = path
+        self.dirty.clear()
+
+    @classmethod
+    def load_local(cls, path, embedding_function=None, mmap=False):
+        with open(os.path.join(path, SHARDS_FILE), "r", encoding="utf-8") as f:
+            layout = json.load(f)
+        names = list(layout["shards"])
+        shards = _executor.map(
+            lambda name: ChunkIndex.load_local(
+                os.path.join(path, SHARDS_DIR, name), embedding_function, mmap=mmap
+            ),
+            names,
+        )
+        store = None
+        for name, shard in zip(names, shards):
+            if store is None:
+                store = cls(shard.index.d, embedding_function, by=layout["by"])
+            store.shards[name] = shard
+            store.chunk_shard.update(dict.fromkeys(shard.chunk_to_id, name))
+        store = store or cls(0, embedding_function, by=layout["by"])
+        if len({shard.metric_type for shard in store.shards.values()}) > 1:
+            raise ValueError(f"The shards in {path} use different distance metrics.")
+        store.parts = layout["parts"]
+        store.large_keys = set(layout["large_keys"])
+        store.next_id = layout["next_id"]
+        store.path = path
+        return store
+
+    @classmethod
+    def from_index(cls, index):
+        """Wraps an unsharded ChunkIndex; the next rebalance spreads it over shards."""
+        store = cls(index.index.d, index.embedding_function)
+        store.shards[LEGACY_SHARD] = index
+        store.chunk_shard = dict.fromkeys(index.chunk_to_id, LEGACY_SHARD)
+        store.next_id = index.next_id
+        store.dirty.add(LEGACY_SHARD)
+        return store
@@ -0,0 +1,243 @@
+# src/components/summary_tree.py
+import os
+import re
+import json
+import hashlib
+import posixpath
+from collections import defaultdict
+from langchain_core.documents import Document
+from src.components.chunk_index import ChunkIndex
+from src.components.query_filters import relative_path
+from src.utils.atomic_io import atomic_write_json
+from config.settings import (
+    ENRICH_MODEL,
+    EMBED_BATCH_SIZE,
+    COMPACTION_THRESHOLD,
+    SUMMARY_MAX_PARTS,
+    SUMMARY_CHILDREN,
+)
+
+SUMMARIES_FILE = "summaries.json"
+SUMMARIES_DIR = "summaries"  # the coarse index of the summaries
+TREE_FILE = "repository_structure.txt"
+FALLBACK_CHARS = 300  # a failed summary is replaced by this much of its parts
+
+# Questions about how the code is organized rather than about specific code.
+# Words like "structured" or "layout" only count next to a repository noun:
+# "how is the Config dataclass structured?" is about one class.
+_SCOPE = r"(repo|repository|project|codebase|package|module|directory|folder)s?"
+_ORGANIZATION = (
+    r"(structure|structured|organi[sz]ed|organi[sz]ation|architecture|layout"
+    r"|purpose of|responsible for|walk me through)"
+)
+BROAD_QUERY = re.compile(
+    r"\b(overview|high[- ]level)\b"
+    rf"|\b{_ORGANIZATION}\b.*\b{_SCOPE}\b"
+    rf"|\b{_SCOPE}\b.*\b{_ORGANIZATION}\b"
+    rf"|\bwhat (does|do|is) (the |this )?[\w./-]+ {_SCOPE}\b",
+    re.IGNORECASE,
+)
+
+
+def is_broad_query(query_text):
+    """Whether a question asks about the repository's organization."""
+    return bool(BROAD_QUERY.search(query_text))
+
+
+def node_id(kind, path):
+    """Id of the summary of a file ("file") or directory ("dir"; "" is the root)."""
+    return f"{kind}:{path}"
+
+
+def node_label(node):
+    if node["kind"] == "dir":
+        return f"Directory: {node['path'] or '. (repository root)'}"
+    return f"File: {node['path']}"
+
+
+def first_sentence(text):
+    head, sep, _ = text.partition(". ")
+    return head + "." if sep else text
+
+
+class SummaryTree:
+    """
+    File and directory summaries of a repository, built bottom-up: a file's
+    from the summaries of its chunks, a directory's from its children's.
+    Each node keeps a hash of its inputs, so an update re-summarizes only
+    the nodes along changed paths. The summaries are embedded in a small
+    coarse index of their own, searched first for broad questions.
+    """
+
+    def __init__(self, nodes=None, index=None, embedding_function=None):
+        # node id -> {"kind", "path", "summary", "children", "source"}
+        self.nodes = nodes or {}
+        self.index = index
+        self.embedding_function = embedding_function
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _layout(self, chunks):
+        """The chunk summaries of each file and the child node ids of each directory."""
+        files = defaultdict(list)
+        for chunk in sorted(chunks, key=lambda c: c.get("start_line") or 0):
+            if chunk["file_path"] != TREE_FILE:
+                files[relative_path(chunk)].append(chunk.get("summary") or "")
+        children = defaultdict(set)
+        for path in files:
+            child, parent = node_id("file", path), posixpath.dirname(path)
+            while True:
+                children[parent].add(child)
+                if not parent:
+                    break
+                child, parent = node_id("dir", parent), posixpath.dirname(parent)
+        return files, children
+
+    def _parts(self, kind, path, files, children):
+        """(name, summary) of the parts a node is summarized from."""
+        if kind == "file":
+            parts = [(None, summary) for summary in files[path] if summary]
+        else:
+            parts = [
+                (posixpath.basename(self.nodes[child]["path"]), self.nodes[child]["summary"])
+                for child in sorted(children[path])
+                if self.nodes[child]["summary"]
+            ]
+        return parts[:SUMMARY_MAX_PARTS]
+
+    def update(self, chunks, summarize, embed_documents):
+        """
+        Brings the summaries up to date with `chunks`, deepest paths first,
+        and re-embeds the nodes that changed. `summarize(jobs)` returns the
+        result of summarize_node for each (kind, path, parts) job. Returns
+        the number of nodes (re)built.
+        """
+        files, children = self._layout(chunks)
+        levels = defaultdict(list)  # depth -> [(kind, path)]
+        for path in files:
+            levels[path.count("/") + 1].append(("file", path))
+        for path in children:
+            levels[path.count("/") + 1 if path else 0].append(("dir", path))
+
+        current = {node_id(kind, path) for level in levels.values() for kind, path in level}
+        removed = [nid for nid in self.nodes if nid not in current]
+        for nid in removed:
+            del self.nodes[nid]
+
+        changed = []
+        for depth in sorted(levels, reverse=True):
+            jobs = []
+            for kind, path in sorted(levels[depth]):
+                nid = node_id(kind, path)
+                parts = self._parts(kind, path, files, children)
+                source = hashlib.sha256(
+                    json.dumps([ENRICH_MODEL, parts]).encode("utf-8")
+                ).hexdigest()
+                node = self.nodes.get(nid)
+                if node is None or node["source"] != source:
+                    node = self.nodes[nid] = {"kind": kind, "path": path, "source": source}
+                    # A single part needs no model call: its summary is the node's
+                    node["summary"] = parts[0][1] if len(parts) == 1 else ""
+                    if len(parts) > 1:
+                        jobs.append((node, parts))
+                    changed.append(nid)
+                node["children"] = sorted(children.get(path, ())) if kind == "dir" else []
+
+            if not jobs:
+                continue
+            results = summarize(
+                [
+                    (node["kind"], node["path"], [
+                        f"{name}: {summary}" if name else summary for name, summary in parts
+                    ])
+                    for node, parts in jobs
+                ]
+            )
+            for (node, parts), result in zip(jobs, results):
+                node["summary"] = result["summary"]
+                if result.get("error") or not result["summary"]:
+                    # Stands in until the next update summarizes the node again
+                    node["summary"] = " ".join(s for _, s in parts)[:FALLBACK_CHARS]
+                    node["source"] = None
+
+        self._embed(changed + removed, embed_documents)
+        return len(changed)
+
+    def document(self, nid):
+        """The embedded text and metadata of a node."""
+        node = self.nodes[nid]
+        return Document(
+            page_content=f"{node_label(node)}\n{node['summary']}",
+            metadata={
+                "node_id": nid,
+                "kind": node["kind"],
+                "path": node["path"],
+                "file_path": node["path"] or ".",
+                "summary": node["summary"],
+                "start_line": None,
+                "end_line": None,
+            },
+        )
+
+    def _embed(self, node_ids, embed_documents):
+        if self.index is not None:
+            self.index.delete(node_ids)
+        node_ids = [nid for nid in node_ids if self.nodes.get(nid, {}).get("summary")]
+        for start in range(0, len(node_ids), EMBED_BATCH_SIZE):
+            batch = node_ids[start : start + EMBED_BATCH_SIZE]
+            docs = [self.document(nid) for nid in batch]
+            texts = [doc.page_content for doc in docs]
+            vectors = embed_documents(texts)
+            if self.index is None:
+                self.index = ChunkIndex(len(vectors[0]), self.embedding_function)
+            self.index.add_embeddings(
+                zip(texts, vectors), [doc.metadata for doc in docs], batch
+            )
+
+    def search(self, embedding, k):
+        """The `k` summaries closest to an embedded query: [(document, score)]."""
+        if self.index is None or not len(self.index):
+            return []
+        return self.index.similarity_search_with_score_by_vector(embedding, k=k)
+
+    def describe(self, nid, max_children=SUMMARY_CHILDREN):
+        """A node's summary for the prompt; a directory lists its children's too."""
+        node = self.nodes[nid]
+        lines = [node_label(node), f"Summary: {node['summary']}"]
+        children = [
+            self.nodes[child]
+            for child in node["children"]
+            if self.nodes.get(child, {}).get("summary")
+        ]
+        if children:
+            lines.append("Contents:")
+        for child in children[:max_children]:
+            name = posixpath.basename(child["path"])
+            if child["kind"] == "dir":
+                name += "/"
+            lines.append(f"- {name}: {first_sentence(child['summary'])}")
+        if len(children) > max_children:
+            lines.append(f"- ... and {len(children) - max_children} more")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """Writes the summaries and their coarse index into a generation directory."""
+        if self.index is not None:
+            self.index.compact(COMPACTION_THRESHOLD)
+            self.index.save_local(os.path.join(path, SUMMARIES_DIR))
+        atomic_write_json(os.path.join(path, SUMMARIES_FILE), self.nodes)
+
+    @classmethod
+    def load(cls, path, embedding_function=None, mmap=False):
+        """Loads the summaries of a generation directory; empty if it has none."""
+        tree = cls(embedding_function=embedding_function)
+        if not path or not os.path.exists(os.path.join(path, SUMMARIES_FILE)):
+            return tree
+        with open(os.path.join(path, SUMMARIES_FILE), "r", encoding="utf-8") as f:
+            tree.nodes = json.load(f)
+        if os.path.isdir(os.path.join(path, SUMMARIES_DIR)):
+            tree.index = ChunkIndex.load_local(
+                os.path.join(path, SUMMARIES_DIR), embedding_function, mmap=mmap
+            )
+        return tree
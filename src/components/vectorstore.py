@@ -1,12 +1,26 @@
 # src/components/vectorstore.py
 import os
+import shutil
 import faiss
-from langchain_community.vectorstores import FAISS
-from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.documents import Document
 from uuid import uuid4
-from config.settings import VECTORSTORE_PATH, EMBEDDING_MODEL
+from src.components.chunk_index import ChunkIndex, DOCSTORE_FILE
+from src.components.sharded_index import ShardedIndex, SHARDS_FILE
+from src.components.summary_tree import SummaryTree
+from src.components.code_graph import CodeGraph
+from src.components.chunk_records import document_metadata, TEXT_FIELDS, TEXT_SPANS
+from src.utils.generations import repo_generations
+from config.settings import VECTORSTORE_PATH, EMBEDDING_MODEL, COMPACTION_THRESHOLD
+
+
+def document_text(chunk):
+    """The text stored and embedded for a chunk: its code, summary and keywords."""
+    # Ensure keywords is a string before concatenation
+    keywords = chunk.get("keywords", "")
+    if isinstance(keywords, list):
+        keywords = ", ".join(keywords)  # Join list into a string
+    return chunk.get("content", "") + chunk.get("summary", "") + keywords
 
 
 class VectorstoreManager:
@@ -14,59 +28,50 @@ class VectorstoreManager:
         self.db_path = VECTORSTORE_PATH
         self.embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL)
 
-    def create_vectorstore(self, chunks):
-        """Creates and returns a new FAISS vectorstore from chunks."""
-        # --- START OF FIX ---
-        texts = []
-        for c in chunks:
-            # Ensure keywords is a string before concatenation
-            keywords = c.get("keywords", "")
-            if isinstance(keywords, list):
-                keywords = ", ".join(keywords)  # Join list into a string
-
-            # Combine all text content
-            full_text = c.get("content", "") + c.get("summary", "") + keywords
-            texts.append(full_text)
-
-        metadatas = [{k: v for k, v in c.items() if k != "content"} for c in chunks]
-
-        docs = [
-            Document(page_content=text, metadata=meta)
-            for text, meta in zip(texts, metadatas)
+    def _documents(self, chunks):
+        """Builds the embedded text and metadata of each chunk."""
+        return [
+            Document(page_content=document_text(c), metadata=document_metadata(c))
+            for c in chunks
         ]
-        uuids = [str(uuid4()) for _ in texts]
 
-        # Initialize an empty FAISS index
-        embedding_dim = len(self.embeddings.embed_query(texts[0]))
-        index = faiss.IndexFlatL2(embedding_dim)
+    def embed_chunks(self, chunks):
+        """Embeds chunks the way they are stored, so vectors can be checkpointed."""
+        return self.embeddings.embed_documents([document_text(c) for c in chunks])
 
-        vectorstore = FAISS(
-            embedding_function=self.embeddings,
-            index=index,
-            docstore=InMemoryDocstore(),
-            index_to_docstore_id={},
-        )
-        vectorstore.add_documents(documents=docs, ids=uuids)
+    def _add(self, vectorstore, docs, ids, vectors):
+        if vectors is None:
+            vectorstore.add_documents(documents=docs, ids=ids)
+        else:
+            vectorstore.add_embeddings(
+                text_embeddings=[(doc.page_content, v) for doc, v in zip(docs, vectors)],
+                metadatas=[doc.metadata for doc in docs],
+                ids=ids,
+            )
+
+    def create_vectorstore(self, chunks, vectors=None, planned=None):
+        """
+        Creates and returns a new sharded FAISS vectorstore from chunks,
+        reusing `vectors` (one per chunk) when they were already computed.
+        The shard layout is planned for the `planned` chunks when more are
+        to be added in later batches.
+        """
+        docs = self._documents(chunks)
+        # Docstore ids are the chunk ids, so later runs can delete by chunk_id
+        uuids = [c.get("chunk_id") or str(uuid4()) for c in chunks]
+
+        if vectors is None:
+            vectors = self.embed_chunks(chunks)
+        vectorstore = ShardedIndex(len(vectors[0]), self.embeddings)
+        vectorstore.plan(planned if planned is not None else chunks)
+        self._add(vectorstore, docs, uuids, vectors)
         return vectorstore
 
-    def add_documents(self, vectorstore, chunks):
+    def add_documents(self, vectorstore, chunks, vectors=None):
         """Adds new documents to an existing vectorstore."""
-        texts = []
-        for c in chunks:
-            keywords = c.get("keywords", "")
-            if isinstance(keywords, list):
-                keywords = ", ".join(keywords)
-            full_text = c.get("content", "") + c.get("summary", "") + keywords
-            texts.append(full_text)
-
-        metadatas = [{k: v for k, v in c.items() if k != "content"} for c in chunks]
-        docs = [
-            Document(page_content=text, metadata=meta)
-            for text, meta in zip(texts, metadatas)
-        ]
+        docs = self._documents(chunks)
         uuids = [c["chunk_id"] for c in chunks]  # Use our custom chunk_id
-
-        vectorstore.add_documents(documents=docs, ids=uuids)
+        self._add(vectorstore, docs, uuids, vectors)
         return vectorstore
 
     def delete(self, vectorstore, chunk_ids):
@@ -74,30 +79,203 @@ class VectorstoreManager:
         Deletes documents from the vectorstore by their chunk_id,
         safely ignoring any IDs that are not found.
         """
-        if not vectorstore or not chunk_ids:
-            return vectorstore
+        if vectorstore and chunk_ids:
+            vectorstore.delete(chunk_ids)  # tombstones, O(len(chunk_ids))
+        return vectorstore
 
-        # Find which of the requested IDs actually exist in the vector store
-        ids_to_delete = [
-            id_ for id_ in chunk_ids if id_ in vectorstore.index_to_docstore_id.values()
-        ]
+    def update_metadata(self, vectorstore, chunks):
+        """Refreshes the stored metadata (e.g. line ranges) of unchanged chunks in place."""
+        for chunk in chunks:
+            doc = vectorstore.docstore.search(chunk["chunk_id"])
+            if isinstance(doc, Document):
+                metadata = document_metadata(chunk)
+                if doc.page_content == document_text(chunk):
+                    # The page content holds the text: drop copies left in older metadata
+                    for field in TEXT_FIELDS:
+                        doc.metadata.pop(field, None)
+                else:
+                    del metadata[TEXT_SPANS]  # the stored spans still describe the text
+                doc.metadata.update(metadata)
+        vectorstore.touch([chunk["chunk_id"] for chunk in chunks])
+        return vectorstore
+
+    def vectors_by_text(self, vectorstore):
+        """Maps each stored document's text to its vector, to reuse embeddings."""
+        vectors = {}
+        for faiss_id, doc_id in vectorstore.index_to_docstore_id.items():
+            doc = vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                vectors[doc.page_content] = vectorstore.reconstruct(faiss_id).tolist()
+        return vectors
 
-        if ids_to_delete:
-            vectorstore.delete(ids=ids_to_delete)
+    def set_duplicate_locations(self, vectorstore, locations):
+        """Records on each canonical document the locations of its near-duplicates."""
+        if not vectorstore:
+            return vectorstore
 
+        changed = []
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            metadata = vectorstore.docstore.metadata(doc_id)
+            duplicates = locations.get(metadata.get("chunk_id"), [])
+            # Only changed documents are touched, so unchanged shards are kept
+            if metadata.get("duplicates", []) != duplicates:
+                vectorstore.docstore.search(doc_id).metadata["duplicates"] = duplicates
+                changed.append(doc_id)
+        vectorstore.touch(changed)
         return vectorstore
 
-    def save(self, vectorstore, repo_name):
-        """Saves a FAISS vectorstore."""
-        path = os.path.join(self.db_path, f"{repo_name}_vectorstore")
-        vectorstore.save_local(path)
-        print(f"Vectorstore saved to {path}")
+    def estimate_memory(self, vectorstore):
+        """Estimates the bytes held by a loaded vectorstore (vectors and documents)."""
+        if not vectorstore:
+            return 0
 
-    def load(self, repo_name):
-        """Loads an existing FAISS vectorstore."""
-        path = os.path.join(self.db_path, f"{repo_name}_vectorstore")
-        if not os.path.exists(path):
+        size = 0
+        for shard in vectorstore.shards.values():
+            # Mapped vectors live in the page cache, shared with other processes
+            if not shard.mmapped:
+                size += shard.index.ntotal * shard.index.d * 4  # float32
+            # Summed per document: a dump would copy the whole docstore
+            size += shard.docstore.estimate_bytes()
+        return size
+
+    def search_by_vector_in(self, vectorstore, embedding, k, faiss_ids):
+        """
+        Searches only the vectors with the given FAISS ids, using an ID
+        selector so the excluded vectors are skipped rather than scored and
+        filtered out afterwards. Returns [(document, score)].
+        """
+        return vectorstore.similarity_search_with_score_by_vector(
+            embedding, k=k, faiss_ids=faiss_ids
+        )
+
+    def generations(self, repo_name):
+        """The index generations of a repository."""
+        return repo_generations(repo_name, self.db_path)
+
+    def save(self, vectorstore, repo_name, before_commit=None):
+        """
+        Saves the vectorstore as a new index generation and makes it current.
+        `before_commit(path)` may add files to the generation (e.g. chunks and
+        cache) so that they go live together with the vectors.
+        """
+        # Runs in the indexing job: queries keep using the current generation
+        moved = vectorstore.rebalance()
+        if moved:
+            print(f"🧩 Moved {moved} chunks to their new shards.")
+        removed = vectorstore.compact(COMPACTION_THRESHOLD)
+        if removed:
+            print(f"🧹 Compacted the index, removed {removed} deleted vectors.")
+
+        store = self.generations(repo_name)
+        path = store.stage()
+        try:
+            written = vectorstore.save_local(path)
+            if before_commit:
+                before_commit(path)
+            generation = store.commit(path)
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        vectorstore.mark_saved(os.path.join(store.root, generation))
+
+        # Files of the layout used before generations are superseded now
+        for name in ("index.faiss", "index.pkl"):
+            try:
+                os.remove(os.path.join(store.root, name))
+            except FileNotFoundError:
+                pass
+        store.collect_garbage()
+        print(
+            f"Vectorstore saved to {os.path.join(store.root, generation)} "
+            f"({len(written)} of {len(vectorstore.shards)} shards rewritten)"
+        )
+        return generation
+
+    def list_repos(self):
+        """Returns the names of all repositories with a saved vectorstore."""
+        if not os.path.isdir(self.db_path):
+            return []
+        suffix = "_vectorstore"
+        return sorted(
+            name[: -len(suffix)]
+            for name in os.listdir(self.db_path)
+            if name.endswith(suffix)
+        )
+
+    def relevance_score(self, vectorstore, score):
+        """
+        Maps a raw FAISS score to a relevance in (0, 1], higher is better, so
+        scores from indexes with different metrics can be compared.
+        """
+        if vectorstore.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return (1.0 + max(-1.0, min(1.0, score))) / 2
+        return 1.0 / (1.0 + max(0.0, score))  # L2 distance
+
+    def index_version(self, repo_name):
+        """
+        Returns a token that changes whenever a new index is saved (None if
+        there is no index): the current generation name.
+        """
+        store = self.generations(repo_name)
+        generation = store.current()
+        if generation:
+            return generation
+        # Layout from before generations: the index files sit in the root
+        try:
+            return str(os.stat(os.path.join(store.root, "index.faiss")).st_mtime_ns)
+        except FileNotFoundError:
             return None
-        return FAISS.load_local(
+
+    def load_generation(self, repo_name, mmap=False):
+        """
+        Loads the current index; returns (vectorstore, index version) or
+        (None, None). With `mmap`, the vectors are memory-mapped read-only,
+        for processes that only query the index.
+        """
+        store = self.generations(repo_name)
+        generation = store.current()
+        path = os.path.join(store.root, generation) if generation else store.root
+        if os.path.exists(os.path.join(path, SHARDS_FILE)):
+            vectorstore = ShardedIndex.load_local(path, self.embeddings, mmap=mmap)
+        elif not os.path.exists(os.path.join(path, "index.faiss")):
+            return None, None
+        elif os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+            # Saved before sharding: rebalanced into shards on the next save
+            vectorstore = ShardedIndex.from_index(
+                ChunkIndex.load_local(path, self.embeddings, mmap=mmap)
+            )
+        else:
+            vectorstore = ShardedIndex.from_index(self._load_langchain(path))
+        return vectorstore, generation or self.index_version(repo_name)
+
+    def load_summaries(self, repo_name, generation=None, mmap=False):
+        """
+        Loads the file and directory summaries of a generation (the current
+        one by default); the tree is empty if the index was saved without.
+        """
+        store = self.generations(repo_name)
+        generation = generation or store.current()
+        path = generation and os.path.join(store.root, generation)
+        return SummaryTree.load(path, self.embeddings, mmap=mmap)
+
+    def load_graph(self, repo_name, generation=None, symbols=True):
+        """
+        Loads the code graph of a generation (the current one by default);
+        without `symbols`, only its edges. Empty for indexes saved without.
+        """
+        store = self.generations(repo_name)
+        generation = generation or store.current()
+        return CodeGraph.load(generation and os.path.join(store.root, generation), symbols)
+
+    def _load_langchain(self, path):
+        """Loads an index saved by LangChain's FAISS store (before ID mapping)."""
+        from langchain_community.vectorstores import FAISS
+
+        vectorstore = FAISS.load_local(
             path, self.embeddings, allow_dangerous_deserialization=True
         )
+        return ChunkIndex.from_langchain(vectorstore)
+
+    def load(self, repo_name):
+        """Loads an existing FAISS vectorstore (the current generation)."""
+        return self.load_generation(repo_name)[0]
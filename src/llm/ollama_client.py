@@ -1,17 +1,10 @@
 # src/llm/ollama_client.py
 import requests
 import json
-from config.settings import OLLAMA_API_URL, LLM_MODEL
+from src.llm.scheduler import yield_to_answers
+from config.settings import OLLAMA_API_URL, ENRICH_MODEL, ANSWER_KEEP_ALIVE
 
-
-def enrich_chunk(code_chunk: str) -> dict:
-    """
-    Generates a summary and keywords for a code chunk, returning a default on error.
-    """
-    if not code_chunk.strip():
-        return {"summary": "", "keywords": ""}
-
-    prompt = f"""
+ENRICH_PROMPT = """
     Analyze the following code chunk and provide a one-sentence summary and a comma-separated list of keywords.
     Respond with a single JSON object with two keys: "summary" and "keywords".
 
@@ -23,13 +16,37 @@ def enrich_chunk(code_chunk: str) -> dict:
     JSON Response:
     """
 
+SUMMARIZE_PROMPT = """
+    Below are summaries of the parts of the {kind} `{path}` in a code repository.
+    Describe in two or three sentences what the {kind} as a whole is responsible for.
+    Respond with a single JSON object with one key: "summary".
+
+    Parts:
+    {parts}
+
+    JSON Response:
+    """
+
+
+def failed(error: str) -> dict:
+    """The empty enrichment returned on failure, with the reason in `error`."""
+    return {"summary": "", "keywords": "", "error": error}
+
+
+def _request_json(prompt: str) -> dict:
+    """
+    Asks ENRICH_MODEL for a JSON object, holding off while answers to
+    interactive queries are being generated. On error the object is
+    empty apart from `error`, which says what went wrong.
+    """
     payload = {
-        "model": LLM_MODEL,
+        "model": ENRICH_MODEL,
         "messages": [{"role": "user", "content": prompt}],
         "format": "json",
         "stream": False,
     }
 
+    yield_to_answers()
     try:
         response = requests.post(OLLAMA_API_URL, json=payload, timeout=60)
 
@@ -46,23 +63,70 @@ def enrich_chunk(code_chunk: str) -> dict:
                 print(f"[Ollama HTTP Error {response.status_code}: {response.text}]")
 
             # Immediately return the default value on any HTTP error.
-            return {"summary": "", "keywords": ""}
+            return {"error": f"HTTP {response.status_code}"}
 
         # --- Only process a successful response ---
         json_data = response.json()
         content_string = json_data.get("message", {}).get("content", "{}")
-        enriched_data = json.loads(content_string)
-
-        return {
-            "summary": enriched_data.get("summary", ""),
-            "keywords": enriched_data.get("keywords", ""),
-        }
+        return json.loads(content_string)
 
+    except requests.exceptions.Timeout:
+        print(f"\n[Timeout]: Ollama at {OLLAMA_API_URL} did not answer in time.")
+        return {"error": "timeout"}
     except requests.exceptions.RequestException as e:
         print(
             f"\n[Network Error]: Could not connect to Ollama at {OLLAMA_API_URL}. Is the server running?"
         )
-        return {"summary": "", "keywords": ""}
+        return {"error": "network error"}
     except json.JSONDecodeError as e:
         print(f"\n[JSON Decode Error]: Failed to parse response from Ollama.")
+        return {"error": "malformed JSON"}
+
+
+def load_model(model: str, keep_alive=ANSWER_KEEP_ALIVE, timeout=300) -> bool:
+    """
+    Has Ollama load `model` into memory and keep it there for `keep_alive`
+    (0 unloads it), without generating anything. Returns whether it worked.
+    """
+    payload = {"model": model, "messages": [], "keep_alive": keep_alive}
+    try:
+        response = requests.post(OLLAMA_API_URL, json=payload, timeout=timeout)
+    except requests.exceptions.RequestException:
+        return False
+    return response.status_code < 400
+
+
+def enrich_chunk(code_chunk: str) -> dict:
+    """
+    Generates a summary and keywords for a code chunk. On error the summary
+    and keywords are empty and `error` says what went wrong, so the chunk
+    can be queued for another attempt.
+    """
+    if not code_chunk.strip():
         return {"summary": "", "keywords": ""}
+
+    enriched_data = _request_json(ENRICH_PROMPT.format(code_chunk=code_chunk))
+    if enriched_data.get("error"):
+        return failed(enriched_data["error"])
+    return {
+        "summary": enriched_data.get("summary", ""),
+        "keywords": enriched_data.get("keywords", ""),
+    }
+
+
+def summarize_node(job) -> dict:
+    """
+    Summarizes a file or directory from the summaries of its parts; `job` is
+    (kind, path, parts). Returns {"summary"}, plus `error` on failure.
+    """
+    kind, path, parts = job
+    prompt = SUMMARIZE_PROMPT.format(
+        kind=kind,
+        path=path or ".",
+        parts="\n".join(f"- {part}" for part in parts),
+    )
+    data = _request_json(prompt)
+    if data.get("error"):
+        return {"summary": "", "error": data["error"]}
+    summary = data.get("summary", "")
+    return {"summary": summary if isinstance(summary, str) else str(summary)}
@@ -0,0 +1,78 @@
+# src/llm/scheduler.py
+import os
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from config.settings import (
+    DATA_DIR,
+    ANSWER_WORKERS,
+    ENRICH_YIELD_INTERVAL,
+    ENRICH_MAX_YIELD,
+    ANSWER_MARKER_TTL,
+)
+
+# One marker file per answer being generated, visible to every process on the
+# host (the query server, the CLI and the indexing pool workers)
+ANSWERS_DIR = os.path.join(DATA_DIR, "llm_answers")
+
+_answer_slots = threading.BoundedSemaphore(ANSWER_WORKERS)
+
+
+@contextmanager
+def answering():
+    """
+    Marks an answer as being generated for as long as the block runs, so
+    background enrichment holds off, and bounds the concurrent answer
+    requests of this process to ANSWER_WORKERS.
+    """
+    marker = os.path.join(ANSWERS_DIR, f"{os.getpid()}-{uuid.uuid4().hex}")
+    # Marked before waiting for a slot: queued answers hold enrichment off too
+    while True:
+        os.makedirs(ANSWERS_DIR, exist_ok=True)
+        try:
+            open(marker, "w").close()
+            break
+        except FileNotFoundError:
+            continue  # another process removed the emptied directory meanwhile
+    try:
+        with _answer_slots:
+            yield
+    finally:
+        try:
+            os.remove(marker)
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(ANSWERS_DIR)  # only succeeds once no answer is left
+        except OSError:
+            pass
+
+
+def answers_in_progress(now=None):
+    """Whether any process is generating an answer."""
+    now = time.time() if now is None else now
+    try:
+        entries = os.scandir(ANSWERS_DIR)
+    except FileNotFoundError:
+        return False
+    with entries:
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime < ANSWER_MARKER_TTL:
+                    return True
+            except FileNotFoundError:
+                continue  # the answer finished meanwhile
+    return False
+
+
+def yield_to_answers(max_wait=ENRICH_MAX_YIELD):
+    """
+    Waits while answers are being generated, at most `max_wait` seconds so
+    that a busy query server slows enrichment down without starving it.
+    Returns the seconds waited.
+    """
+    start = time.monotonic()
+    while answers_in_progress() and time.monotonic() - start < max_wait:
+        time.sleep(ENRICH_YIELD_INTERVAL)
+    return time.monotonic() - start
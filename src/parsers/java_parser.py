@@ -1,15 +1,70 @@
 import re
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+IMPORT = re.compile(r"^\s*import\s+(static\s+)?([\w.]+?)(\.\*)?\s*;", re.MULTILINE)
+DEFINITION = re.compile(
+    r"""\b(?:class|interface|enum|record)\s+(\w+)                  # types
+    |^[ \t]*(?:(?:public|private|protected|static|final|abstract|synchronized)\s+)*
+     (?:<[^>]*>\s*)?[\w<>\[\],.?]+\s+(\w+)\s*\([^)]*\)\s*         # methods
+     (?:throws\s+[\w.,\s]+)?\{""",
+    re.VERBOSE | re.MULTILINE,
+)
+CALL = re.compile(r"\b([A-Za-z_]\w*)\s*\(")
+SUPERTYPES = re.compile(r"\b(?:extends|implements)\s+([\w.,\s<>]+?)\s*\{")
+KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "synchronized", "return", "new",
+    "super", "this", "try", "else", "throw", "assert",
+}
 
-def parse_java(file_path):
+
+def _line(content, position):
+    return content.count("\n", 0, position) + 1
+
+
+def extract_references(content):
+    """
+    Collects the symbols of a compilation unit: its imports ({local name:
+    [class path, imported name, 0]}), and by line the names it defines and
+    the names it refers to (calls, `new`, supertypes, imported names).
+    """
+    imports, defines, refs = {}, [], []
+    for match in IMPORT.finditer(content):
+        if match.group(3):
+            continue  # a wildcard import names no symbol
+        path = match.group(2)
+        name = path.rsplit(".", 1)[-1]
+        # `import static a.B.m;` imports member m of class a.B
+        module = path.rsplit(".", 1)[0] if match.group(1) else path
+        imports[name] = [module, name, 0]
+        refs.append((_line(content, match.start()), name))
+    defined_at = set()  # a method's name followed by "(" is no call
+    for match in DEFINITION.finditer(content):
+        group = 1 if match.group(1) else 2
+        if match.group(group) not in KEYWORDS:
+            defines.append((_line(content, match.start()), match.group(group)))
+            defined_at.add(match.start(group))
+    for match in CALL.finditer(content):
+        if match.group(1) not in KEYWORDS and match.start(1) not in defined_at:
+            refs.append((_line(content, match.start()), match.group(1)))
+    for match in SUPERTYPES.finditer(content):
+        for name in re.findall(r"\b\w+\b", re.sub(r"<[^>]*>", "", match.group(1))):
+            if name not in ("extends", "implements"):
+                refs.append((_line(content, match.start()), name))
+    return {"imports": imports, "defines": defines, "refs": refs}
+
+
+def parse_java(file_path, references=None):
     """Parse Java code into structured chunks:
     - Classes, interfaces, enums, methods, and annotations are captured fully.
     - Remaining code (imports, variables, loose statements) is chunked separately.
+    If a `references` dict is given, the file's imports, definitions and
+    calls are recorded in it (see extract_references).
     """
 
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         content = f.read()
+    if references is not None:
+        references.update(extract_references(content))
 
     # Regex for Java structures
     pattern = r"""(
@@ -1,15 +1,86 @@
 import re
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+IMPORT_FROM = re.compile(r"""\bimport\s+([\w$*{},\s]+?)\s+from\s+['"]([^'"]+)['"]""")
+REQUIRE = re.compile(
+    r"""\b(?:const|let|var)\s+(\{[^}]*\}|[\w$]+)\s*=\s*require\(\s*['"]([^'"]+)['"]\s*\)"""
+)
+DEFINITION = re.compile(
+    r"""\bfunction\s*\*?\s*([\w$]+)                                # function f
+    |\bclass\s+([\w$]+)                                        # class C
+    |\b([\w$]+)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[\w$]+\s*=>)  # f = () =>
+    |^[ \t]*(?:async\s+|static\s+)*([\w$]+)\s*\([^)]*\)\s*\{      # method(...) {""",
+    re.VERBOSE | re.MULTILINE,
+)
+CALL = re.compile(r"\b([A-Za-z_$][\w$]*)\s*\(")
+EXTENDS = re.compile(r"\bextends\s+([A-Za-z_$][\w$]*)")
+KEYWORDS = {
+    "if", "for", "while", "switch", "catch", "function", "return", "typeof",
+    "await", "async", "super", "import", "require", "constructor", "with",
+}
 
-def parse_js(file_path):
+
+def _line(content, position):
+    return content.count("\n", 0, position) + 1
+
+
+def _import_names(clause):
+    """[(local name, imported name)] of an import clause; None imports the module."""
+    names = []
+    default, _, rest = clause.partition("{")
+    for part in default.split(","):
+        part = part.strip()
+        if part.startswith("*"):
+            names.append((part.split()[-1], None))
+        elif part:
+            names.append((part, "default"))
+    for part in rest.rstrip("} \n").split(","):
+        name, _, alias = part.strip().partition(" as ")
+        if name:
+            names.append((alias.strip() or name, name))
+    return names
+
+
+def extract_references(content):
+    """
+    Collects the symbols of a module: its imports ({local name: [module,
+    imported name, 0]}), and by line the names it defines and the names it
+    refers to (calls, `new`, base classes, imported names).
+    """
+    imports, defines, refs = {}, [], []
+    for match in list(IMPORT_FROM.finditer(content)) + list(REQUIRE.finditer(content)):
+        clause = match.group(1).strip()
+        if not clause.startswith("{") and match.re is REQUIRE:
+            names = [(clause, None)]
+        else:
+            names = _import_names(clause)
+        for local, name in names:
+            imports[local] = [match.group(2), name, 0]
+            refs.append((_line(content, match.start()), local))
+    defined_at = set()  # a definition's name followed by "(" is no call
+    for match in DEFINITION.finditer(content):
+        group = next(i for i, name in enumerate(match.groups(), 1) if name)
+        if match.group(group) not in KEYWORDS:
+            defines.append((_line(content, match.start()), match.group(group)))
+            defined_at.add(match.start(group))
+    for match in list(CALL.finditer(content)) + list(EXTENDS.finditer(content)):
+        if match.group(1) not in KEYWORDS and match.start(1) not in defined_at:
+            refs.append((_line(content, match.start()), match.group(1)))
+    return {"imports": imports, "defines": defines, "refs": refs}
+
+
+def parse_js(file_path, references=None):
     """Parse JavaScript code into structured chunks:
     - Captures functions (regular, arrow, anonymous), classes, imports/exports, and variables.
     - Remaining code is split into 'other' chunks.
+    If a `references` dict is given, the module's imports, definitions and
+    calls are recorded in it (see extract_references).
     """
 
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         content = f.read()
+    if references is not None:
+        references.update(extract_references(content))
 
     # Regex for JS constructs
     pattern = r"""(
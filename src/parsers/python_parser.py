@@ -1,9 +1,166 @@
 import ast
+import builtins
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from src.components.chunk_normalizer import split_chunk
 
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+BUILTIN_NAMES = set(dir(builtins))
 
-def parse_python_with_ast(file_path):
-    """Parse Python into chunks (functions, classes, and other code)."""
+
+def _node_span(node, lines):
+    """Returns the (start, end) lines of a node, including its decorators."""
+    start_line = min([d.lineno for d in node.decorator_list] + [node.lineno])
+    end_line = getattr(node, "end_lineno", None)
+
+    if end_line is None:  # fallback for Python <3.8
+        # crude fallback: scan forward until indentation drops or file ends
+        end_line = node.lineno
+        while end_line < len(lines) and lines[end_line].startswith((" ", "\t")):
+            end_line += 1
+
+    return start_line, end_line
+
+
+def _header(node, lines):
+    """Returns the decorator and signature lines of a def/class, without its body."""
+    start_line, _ = _node_span(node, lines)
+    body = node.body[0]
+    body = min(getattr(body, "decorator_list", []) + [body], key=lambda n: n.lineno)
+    header = lines[start_line - 1 : body.lineno - 1]
+    # Comments and blank lines before the body belong to the body
+    while header and (not header[-1].strip() or header[-1].lstrip().startswith("#")):
+        header.pop()
+    body_line = lines[body.lineno - 1]
+    if body_line[: body.col_offset].strip():
+        # one-liner such as `def f(): pass`, keep only what precedes the body
+        header.append(body_line[: body.col_offset].rstrip())
+    return header
+
+
+def _class_skeleton(node, lines):
+    """
+    Builds a compact view of a class: its signature, docstring, class-level
+    attributes and the signatures of its methods and nested classes.
+    Method bodies are left out since every method gets its own chunk.
+    """
+    skeleton = list(_header(node, lines))
+    for stmt in node.body:
+        if isinstance(stmt, FUNCTION_NODES + (ast.ClassDef,)):
+            signature = list(_header(stmt, lines))
+            signature[-1] = signature[-1].rstrip() + " ..."
+            skeleton.extend(signature)
+        else:
+            skeleton.extend(lines[stmt.lineno - 1 : stmt.end_lineno])
+    return "\n".join(skeleton)
+
+
+def _collect_definitions(node, lines, parent=None):
+    """
+    Walks the direct children of `node` and yields one chunk per function and
+    one skeleton chunk per class, recursing into class bodies only. Functions
+    nested inside other functions stay part of their enclosing chunk, so every
+    source line ends up in at most one chunk.
+    """
+    for child in ast.iter_child_nodes(node):
+        if not isinstance(child, FUNCTION_NODES + (ast.ClassDef,)):
+            continue
+
+        name = f"{parent}.{child.name}" if parent else child.name
+        start_line, end_line = _node_span(child, lines)
+
+        if isinstance(child, ast.ClassDef):
+            yield {
+                "type": "class",
+                "name": name,
+                "parent": parent,
+                "content": _class_skeleton(child, lines),
+                "start_line": start_line,
+                "end_line": end_line,
+            }
+            yield from _collect_definitions(child, lines, parent=name)
+        else:
+            yield {
+                "type": "method" if parent else "function",
+                "name": name,
+                "parent": parent,
+                "content": "\n".join(lines[start_line - 1 : end_line]),
+                "start_line": start_line,
+                "end_line": end_line,
+            }
+
+
+def _called_name(node):
+    """`f` for `f(...)`, `obj.f(...)` and `Base` in `class C(mod.Base)`."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def extract_references(tree):
+    """
+    Collects the symbols of a module: its imports ({local name: [module,
+    imported name, relative level]}), and by line the names it defines and
+    the names it refers to (calls, base classes, imported names).
+    """
+    imports, defines, refs = {}, [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                module = alias.name if alias.asname else alias.name.split(".")[0]
+                imports[alias.asname or module] = [module, None, 0]
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                local = alias.asname or alias.name
+                imports[local] = [node.module or "", alias.name, node.level]
+                refs.append((node.lineno, local))
+        elif isinstance(node, FUNCTION_NODES + (ast.ClassDef,)):
+            defines.append((node.lineno, node.name))
+            for base in getattr(node, "bases", []):
+                name = _called_name(base)
+                if name:
+                    refs.append((node.lineno, name))
+        elif isinstance(node, ast.Call):
+            name = _called_name(node.func)
+            # Only bare calls can be builtins: obj.open() may be a repo method
+            if name and not (isinstance(node.func, ast.Name) and name in BUILTIN_NAMES):
+                refs.append((node.lineno, name))
+    return {"imports": imports, "defines": defines, "refs": refs}
+
+
+def _module_block_chunks(block, block_start):
+    """
+    Chunks a run of module-level lines starting at line `block_start`:
+    blank lines around it are trimmed and long runs are split along
+    statement boundaries, each part with its own exact line range.
+    """
+    while block and not block[-1].strip():
+        block = block[:-1]
+    while block and not block[0].strip():
+        block, block_start = block[1:], block_start + 1
+    if not block:
+        return []
+    chunk = {
+        "type": "other",
+        "content": "\n".join(block),
+        "start_line": block_start,
+        "end_line": block_start + len(block) - 1,
+    }
+    return split_chunk(chunk)
+
+
+def parse_python_with_ast(file_path, references=None):
+    """
+    Parse Python into hierarchical chunks:
+    - Each class becomes a skeleton chunk (signature, docstring, attributes, method signatures).
+    - Each function and method becomes its own chunk, linked to its class through `parent`.
+    - Remaining module-level code is chunked separately.
+    If a `references` dict is given, the module's imports, definitions and
+    calls are recorded in it (see extract_references).
+    """
 
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
         content = f.read()
@@ -18,32 +175,15 @@ def parse_python_with_ast(file_path):
             for chunk in splitter.split_text(content)
         ]
 
-    chunks = []
-    used_lines = set()
+    if references is not None:
+        references.update(extract_references(tree))
+    chunks = list(_collect_definitions(tree, lines))
 
-    # --- Capture functions/classes with exact line numbers ---
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-            start_line = node.lineno
-            end_line = getattr(node, "end_lineno", None)
-
-            if end_line is None:  # fallback for Python <3.8
-                # crude fallback: scan forward until indentation drops or file ends
-                end_line = start_line
-                while end_line < len(lines) and lines[end_line].startswith((" ", "\t")):
-                    end_line += 1
-
-            node_code = "\n".join(lines[start_line - 1 : end_line])
-            chunks.append(
-                {
-                    "type": (
-                        "function" if isinstance(node, ast.FunctionDef) else "class"
-                    ),
-                    "content": node_code,
-                    "start_line": start_line,
-                    "end_line": end_line,
-                }
-            )
+    # Only top-level definitions claim lines, everything nested is covered by them
+    used_lines = set()
+    for node in tree.body:
+        if isinstance(node, FUNCTION_NODES + (ast.ClassDef,)):
+            start_line, end_line = _node_span(node, lines)
             used_lines.update(range(start_line, end_line + 1))
 
     # --- Capture remaining lines ---
@@ -55,35 +195,13 @@ def parse_python_with_ast(file_path):
                 block_start = i
             current_block.append(line)
         elif current_block:  # flush previous block
-            non_func_code = "\n".join(current_block)
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000, chunk_overlap=100
-            )
-            for chunk in splitter.split_text(non_func_code):
-                chunks.append(
-                    {
-                        "type": "other",
-                        "content": chunk,
-                        "start_line": block_start,
-                        "end_line": block_start + chunk.count("\n"),
-                    }
-                )
+            chunks.extend(_module_block_chunks(current_block, block_start))
             current_block = []
             block_start = None
 
     # flush last block
     if current_block:
-        non_func_code = "\n".join(current_block)
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        for chunk in splitter.split_text(non_func_code):
-            chunks.append(
-                {
-                    "type": "other",
-                    "content": chunk,
-                    "start_line": block_start,
-                    "end_line": block_start + chunk.count("\n"),
-                }
-            )
+        chunks.extend(_module_block_chunks(current_block, block_start))
 
     # --- Sort chunks in original file order ---
     chunks.sort(key=lambda c: c["start_line"] or 0)
@@ -0,0 +1,123 @@
+# src/pipeline/federated.py
+import time
+import threading
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from langchain_ollama import OllamaLLM
+from src.components.vectorstore import VectorstoreManager
+from src.llm.scheduler import answering
+from src.components.context_assembler import assemble_context
+from src.components.chunk_normalizer import estimate_tokens
+from src.components.query_filters import parse_query
+from src.pipeline.querying import (
+    load_query_pipeline,
+    query_pipeline_size,
+    query_pipeline_version,
+)
+from src.utils.index_cache import IndexCache
+from config.settings import ANSWER_MODEL, FEDERATED_WORKERS
+
+FEDERATED_PROMPT = """Use the following code snippets from several repositories to answer the question.
+Mention which repository and file each part of your answer comes from.
+If you don't know the answer, just say that you don't know.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+
+class FederatedQueryPipeline:
+    """
+    Searches many repository indexes in parallel and merges the hits into one
+    top-k by normalized relevance. Indexes are loaded lazily, only when a
+    query first reaches their repository, and kept in a shared IndexCache.
+    """
+
+    def __init__(
+        self, repos=None, index_cache=None, max_workers=FEDERATED_WORKERS
+    ):
+        self.vectorstore_manager = VectorstoreManager()
+        self.repos = repos  # None means every indexed repository
+        self.index_cache = index_cache or IndexCache(
+            load_query_pipeline, query_pipeline_size, version=query_pipeline_version
+        )
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.llm = OllamaLLM(model=ANSWER_MODEL)
+        self.embedding_lock = threading.Lock()
+
+    def resolve_repos(self, repo_filter=None):
+        """Returns the repositories to search, optionally narrowed by name patterns."""
+        repos = self.repos or self.vectorstore_manager.list_repos()
+        if not repo_filter:
+            return list(repos)
+        return [
+            repo
+            for repo in repos
+            if any(fnmatch(repo, pattern) for pattern in repo_filter)
+        ]
+
+    def _embed(self, pipeline, query_text, embeddings):
+        """Embeds the query once per embedding model, whatever the number of repos."""
+        embedder = pipeline.vectorstore_manager.embeddings
+        model = getattr(embedder, "model", None)
+        with self.embedding_lock:
+            if model not in embeddings:
+                embeddings[model] = embedder.embed_query(query_text)
+            return embeddings[model]
+
+    def _search_repo(self, repo_name, query_text, k, embeddings, filters):
+        pipeline = self.index_cache.get(repo_name)
+        embedding = self._embed(pipeline, query_text, embeddings)
+        hits = []
+        for doc, score in pipeline.search_by_vector(embedding, k=k, filters=filters):
+            doc.metadata["repo"] = repo_name
+            doc.metadata["score"] = self.vectorstore_manager.relevance_score(
+                pipeline.vectorstore, score
+            )
+            hits.append(doc)
+        return hits
+
+    def search(self, query_text, k=5, repo_filter=None):
+        """
+        Returns (documents, errors): the overall top-k documents, each with
+        `repo` and normalized `score` metadata, and the repos that failed.
+        Inline `lang:`, `path:` and `type:` predicates filter every repo.
+        """
+        query_text, filters = parse_query(query_text)
+        embeddings = {}
+        futures = {
+            repo: self.executor.submit(
+                self._search_repo, repo, query_text, k, embeddings, filters
+            )
+            for repo in self.resolve_repos(repo_filter)
+        }
+
+        hits, errors = [], {}
+        for repo, future in futures.items():
+            try:
+                hits.extend(future.result())
+            except Exception as e:
+                errors[repo] = str(e)
+
+        hits.sort(key=lambda doc: doc.metadata["score"], reverse=True)
+        return hits[:k], errors
+
+    def ask(self, query_text, k=5, repo_filter=None):
+        """Answers a question from the merged top-k of all searched repositories."""
+        started = time.perf_counter()
+        documents, errors = self.search(query_text, k=k, repo_filter=repo_filter)
+        context, sources, stats = assemble_context(documents)
+        question = parse_query(query_text)[0]  # without the filter predicates
+        prompt = FEDERATED_PROMPT.format(context=context, question=question)
+        with answering():
+            result = self.llm.invoke(prompt)
+
+        stats["prompt_tokens"] = estimate_tokens(prompt)
+        stats["time_to_answer"] = time.perf_counter() - started
+        return {
+            "result": result,
+            "source_documents": sources,
+            "errors": errors,
+            "stats": stats,
+        }
@@ -2,141 +2,816 @@
 import os
 import json
 import time
+import shutil
 import hashlib
+from collections import Counter
 from multiprocessing import Pool, cpu_count
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from src.components.git_cloner import clone_github_repo
-from src.components.chunker import process_and_chunk_file
-from src.components.vectorstore import VectorstoreManager
-from src.utils.gitignore_loader import load_gitignore
-from src.utils.cache_manager import load_cache, save_cache, calculate_file_hash
-from config.settings import REPOS_DIR, DATA_DIR
+from src.components.git_cloner import clone_github_repo, head_commit
+from src.components.chunker import parse_and_chunk_file, make_chunk_id
+from src.components.chunk_normalizer import merge_stats
+from src.components.chunk_records import pack_chunks, unpack_chunks, intern_chunk_fields
+from src.components.deduplicator import (
+    NearDuplicateIndex,
+    FINGERPRINTS_FILE,
+    assign_duplicates,
+    promote_orphans,
+    duplicate_locations,
+)
+from src.components.vectorstore import VectorstoreManager, document_text
+from src.utils.repo_walker import RepositoryWalker, repo_relative_path
+from src.utils.cache_manager import (
+    load_cache,
+    save_cache,
+    calculate_file_hash,
+    SKIPPED_KEY,
+    COMMIT_KEY,
+    CLASSIFIER_KEY,
+)
+from src.utils.file_classifier import (
+    classify_by_path,
+    classify_by_content,
+    classifier_fingerprint,
+)
+from src.utils.atomic_io import atomic_write_json
+from src.utils.checkpoint import IndexCheckpoint, decode_vector
+from src.utils.retry_queue import RetryQueue, RETRY_FILE
+from src.llm.ollama_client import enrich_chunk, summarize_node
+from config.settings import (
+    REPOS_DIR,
+    DATA_DIR,
+    DEDUP_ENABLED,
+    SKIP_REASONS,
+    HASH_WORKERS,
+    EMBED_BATCH_SIZE,
+    EMBED_BATCH_MAX_BYTES,
+    ENRICH_RETRY_WAIT,
+    ENRICH_WORKERS,
+    ENRICH_MODEL,
+    LLM_MODEL,
+    SUMMARY_TREE_ENABLED,
+    CODE_GRAPH_ENABLED,
+)
+
+
+def parse_file_wrapper(file_path, repo_name):
+    """Wrapper for multiprocessing to parse a single file."""
+    stats = {}
+    symbols = {} if CODE_GRAPH_ENABLED else None
+    chunks = parse_and_chunk_file(file_path, repo_name, stats=stats, symbols=symbols)
+    # Sent back to the parent process packed: smaller to pickle than the dicts
+    return file_path, pack_chunks(chunks), stats, symbols
+
+
+def check_file(file_path, rel_path, old_cache, stat, reclassify=False):
+    """
+    Decides whether a file is skipped, given its stat result from the walk.
+    Returns (skip reason, content hash, size/mtime signature). Skipped files
+    are re-classified only when their size or mtime changes, and indexed
+    files are sniffed only when their content hash changes, unless
+    `reclassify` is set (the classifier settings changed).
+    """
+    signature = [stat.st_size, stat.st_mtime_ns]
+    previous = old_cache.get(SKIPPED_KEY, {}).get(file_path)
+    if previous and previous["signature"] == signature and not reclassify:
+        if previous["reason"] in SKIP_REASONS:
+            return previous["reason"], None, signature
+
+    reason = classify_by_path(rel_path, stat.st_size)
+    if reason:
+        return reason, None, signature
+
+    file_hash = calculate_file_hash(file_path)
+    if old_cache.get(file_path) == file_hash and not reclassify:
+        return None, file_hash, signature
+    return classify_by_content(file_path), file_hash, signature
+
+
+def uses_legacy_ids(chunks):
+    """Whether chunks were saved with the old `<basename>-<i>` chunk ids."""
+    return any("#" not in chunk["chunk_id"] for chunk in chunks)
+
+
+def migrate_chunk_ids(chunks, repo_name):
+    """
+    Re-keys chunks saved with `<basename>-<i>` ids to content-derived ids.
+    Near-duplicate links to an old id shared by several files are dropped,
+    which makes those chunks canonical again.
+    """
+    seen, new_ids = {}, {}
+    for chunk in chunks:
+        old_id = chunk["chunk_id"]
+        rel_path = repo_relative_path(chunk["file_path"], repo_name)
+        chunk["chunk_id"] = make_chunk_id(rel_path, chunk.get("content", ""), seen)
+        new_ids.setdefault(old_id, []).append(chunk["chunk_id"])
+
+    for chunk in chunks:
+        if "duplicate_of" not in chunk:
+            continue
+        targets = new_ids.get(chunk["duplicate_of"], [])
+        if len(targets) == 1:
+            chunk["duplicate_of"] = targets[0]
+        else:
+            del chunk["duplicate_of"]
+    return chunks
+
+
+def legacy_chunked_files(chunks):
+    """
+    Files whose chunks were saved before chunks recorded their `type`: they
+    were cut by the old nested chunking and are parsed again.
+    """
+    return {chunk["file_path"] for chunk in chunks if "type" not in chunk}
+
+
+def enriched_by_other_model(chunk):
+    """
+    Whether a chunk's summary and keywords came from another model than
+    ENRICH_MODEL, so they are stale. Chunks from before per-stage models
+    were enriched by LLM_MODEL; failed ones (None) wait in the retry queue.
+    """
+    return chunk.get("enriched_by", LLM_MODEL) not in (ENRICH_MODEL, None)
+
+
+def report_skipped_files(skip_counts):
+    """Prints how many files were skipped, per reason."""
+    if not skip_counts:
+        return
+    reasons = ", ".join(
+        f"{reason}: {count}" for reason, count in sorted(skip_counts.items())
+    )
+    print(f"🚫 Skipped {sum(skip_counts.values())} files ({reasons}).")
+
+
+def report_enrichment(failures, retried, attempted, retry_queue):
+    """Prints the enrichment failures of a run and the state of the retry queue."""
+    if failures:
+        reasons = ", ".join(
+            f"{reason}: {count}" for reason, count in sorted(failures.items())
+        )
+        print(f"⚠️ {sum(failures.values())} chunks failed enrichment ({reasons}).")
+    if attempted:
+        print(f"🔁 Re-enriched {retried} of {attempted} chunks retried.")
+    if retry_queue:
+        errors = ", ".join(
+            f"{error}: {count}" for error, count in sorted(retry_queue.errors().items())
+        )
+        print(
+            f"⏳ {len(retry_queue)} chunks are queued for another enrichment "
+            f"attempt ({errors}); run the 'reenrich' command to retry them now."
+        )
 
 
-def generate_directory_tree(repo_path):
-    """Generates a string representation of the directory tree, respecting .gitignore."""
-    tree_lines = []
-    for root, dirs, files in os.walk(repo_path):
-        # Exclude the .git directory
-        if ".git" in dirs:
-            dirs.remove(".git")
+def report_chunk_stats(before, after):
+    """Prints how chunk normalization changed the chunk count and enrichment load."""
+    if not before.get("chunks"):
+        return
+    print(
+        f"📏 Chunks: {before['chunks']} → {after['chunks']} | "
+        f"avg size: {before['avg_tokens']:.0f} → {after['avg_tokens']:.0f} tokens | "
+        f"sent to Ollama: ~{before['llm_tokens']} → ~{after['llm_tokens']} tokens"
+    )
+
+
+# Name of the chunk list inside an index generation
+CHUNKS_FILE = "chunks.json"
+# Chunk fields that can change without the chunk's content changing
+POSITION_KEYS = ("start_line", "end_line", "name", "parent", "type", "part", "parts")
+
+
+class EmbeddingWriter:
+    """
+    Embeds chunks and adds them to the vectorstore in fixed-size batches as
+    their files finish, so only one batch of texts and vectors waits to be
+    stored at a time (the chunks themselves and the vectorstore are still
+    held in full). The vectors of each batch are checkpointed once stored.
+    """
+
+    def __init__(
+        self,
+        manager,
+        checkpoint,
+        vectorstore,
+        planned_chunks,
+        batch_size=EMBED_BATCH_SIZE,
+        max_bytes=EMBED_BATCH_MAX_BYTES,
+    ):
+        self.manager = manager
+        self.checkpoint = checkpoint
+        self.vectorstore = vectorstore
+        self.planned_chunks = planned_chunks  # shard layout of a new vectorstore
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.pending = []  # (chunk, (file_path, file_hash) or None)
+        self.pending_bytes = 0
+        self.queued = set()
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.queued or (
+            self.vectorstore is not None and chunk_id in self.vectorstore
+        )
+
+    def add(self, chunks, file_path=None, file_hash=None):
+        """Queues chunks to embed; vectors of a file's chunks are checkpointed."""
+        source = (file_path, file_hash) if file_path else None
+        for chunk in chunks:
+            self.pending.append((chunk, source))
+            self.pending_bytes += len(document_text(chunk))
+            self.queued.add(chunk["chunk_id"])
+            if (
+                len(self.pending) >= self.batch_size
+                or self.pending_bytes >= self.max_bytes
+            ):
+                self.flush()
+
+    def add_embedded(self, chunks, vectors):
+        """Stores chunks whose vectors are already known (e.g. resumed ones)."""
+        for start in range(0, len(chunks), self.batch_size):
+            self._store(
+                chunks[start : start + self.batch_size],
+                vectors[start : start + self.batch_size],
+            )
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunks = [chunk for chunk, _ in self.pending]
+        vectors = self.manager.embed_chunks(chunks)
+        self._store(chunks, vectors)
 
-        rel_root = os.path.relpath(root, repo_path)
-        if rel_root == ".":
-            rel_root = ""
+        by_file = {}
+        for (chunk, source), vector in zip(self.pending, vectors):
+            if source:
+                by_file.setdefault(source, {})[chunk["chunk_id"]] = vector
+        for (file_path, file_hash), embeddings in by_file.items():
+            self.checkpoint.append_vectors(file_path, file_hash, embeddings)
+        self.pending, self.pending_bytes = [], 0
 
-        level = rel_root.count(os.sep) if rel_root else 0
-        indent = " " * 4 * level
-        tree_lines.append(f"{indent}{os.path.basename(root)}/")
-        sub_indent = " " * 4 * (level + 1)
-        for f in sorted(files):
-            tree_lines.append(f"{sub_indent}{f}")
-    return "\n".join(tree_lines)
+    def _store(self, chunks, vectors):
+        if self.vectorstore is None:
+            print("Creating new FAISS vectorstore...")
+            self.vectorstore = self.manager.create_vectorstore(
+                chunks, vectors, planned=self.planned_chunks
+            )
+        else:
+            self.manager.add_documents(self.vectorstore, chunks, vectors)
 
 
-def process_file_wrapper(file_path, repo_name):
-    """Wrapper for multiprocessing to process a single file."""
-    chunks = process_and_chunk_file(file_path, repo_name)
-    return file_path, chunks
+class IndexingCancelled(Exception):
+    """Raised inside IndexingPipeline.run when its cancel event is set."""
 
 
 class IndexingPipeline:
+    # Stages reported to progress callbacks, in order
+    STAGES = ("clone", "scan", "parse", "enrich", "embed", "save")
+
     def __init__(self, github_url):
         self.github_url = github_url
         self.repo_name = github_url.split("/")[-1]
         self.vectorstore_manager = VectorstoreManager()
+        # Chunk list written before index generations, read until the first save
         self.repo_chunks_path = os.path.join(DATA_DIR, f"{self.repo_name}_chunks.json")
+        self.checkpoint = IndexCheckpoint(
+            os.path.join(DATA_DIR, f"{self.repo_name}_checkpoint.jsonl")
+        )
+
+    def run(self, progress_callback=None, cancel_event=None):
+        """
+        Indexes the repository incrementally. Each file is checkpointed once
+        it is enriched and embedded, so an interrupted run resumes where it
+        stopped; the final results are written atomically.
+        `progress_callback(current, total, stage)` is called as each stage
+        advances, and setting `cancel_event` (a threading.Event) stops the run
+        at the next progress report by raising IndexingCancelled.
+        """
+
+        def report(stage, current, total):
+            if cancel_event is not None and cancel_event.is_set():
+                raise IndexingCancelled(f"Indexing of {self.repo_name} was cancelled.")
+            if progress_callback:
+                progress_callback(current, total, stage)
 
-    def run(self, progress_callback=None):
+        report("clone", 0, 1)
         repo_path = clone_github_repo(self.github_url, REPOS_DIR)
+        report("clone", 1, 1)
+        try:
+            self._index(repo_path, report)
+        finally:
+            self.checkpoint.close()
+
+    def _vectors(self, chunks, embeddings):
+        """Vectors for `chunks`, embedding only those not embedded during the run."""
+        missing = [c for c in chunks if c["chunk_id"] not in embeddings]
+        if missing:
+            vectors = self.vectorstore_manager.embed_chunks(missing)
+            embeddings.update(zip([c["chunk_id"] for c in missing], vectors))
+        return [embeddings.get(c["chunk_id"]) for c in chunks]
+
+    def _migrate(self, vectorstore, all_chunks):
+        """
+        Moves an index saved with the old chunk ids to content-derived ids.
+        The vectorstore is rebuilt from the chunk list, reusing stored
+        vectors, which also drops the stale documents old runs left behind.
+        Its files are then chunked again (see legacy_chunked_files).
+        """
+        print("🔧 Migrating the index to content-derived chunk ids...")
+        migrate_chunk_ids(all_chunks, self.repo_name)
+        canonical_chunks = [c for c in all_chunks if not c.get("duplicate_of")]
+        if not vectorstore or not canonical_chunks:
+            return None
+
+        known_vectors = self.vectorstore_manager.vectors_by_text(vectorstore)
+        embeddings = {}
+        for chunk in canonical_chunks:
+            vector = known_vectors.get(document_text(chunk))
+            if vector is not None:
+                embeddings[chunk["chunk_id"]] = vector
+        print(
+            f"   Reused {len(embeddings)} of {len(canonical_chunks)} vectors, "
+            f"dropped {len(vectorstore) - len(embeddings)} stale documents."
+        )
+        return self.vectorstore_manager.create_vectorstore(
+            canonical_chunks, self._vectors(canonical_chunks, embeddings)
+        )
 
-        # 1. Load existing data
+    def _load_index(self):
+        """
+        Loads the vectorstore, chunks, retry queue, summaries and code graph
+        of the current generation.
+        """
         vectorstore = self.vectorstore_manager.load(self.repo_name)
-        old_cache = load_cache(self.repo_name)
+        generations = self.vectorstore_manager.generations(self.repo_name)
         all_chunks = []
-        if os.path.exists(self.repo_chunks_path):
-            with open(self.repo_chunks_path, "r", encoding="utf-8") as f:
-                all_chunks = json.load(f)
+        chunks_path = generations.current_file(CHUNKS_FILE) or self.repo_chunks_path
+        if os.path.exists(chunks_path):
+            with open(chunks_path, "r", encoding="utf-8") as f:
+                all_chunks = intern_chunk_fields(json.load(f))
+        retry_queue = RetryQueue.load(generations.current_file(RETRY_FILE))
+        summaries = self.vectorstore_manager.load_summaries(self.repo_name)
+        graph = self.vectorstore_manager.load_graph(self.repo_name)
+        return vectorstore, all_chunks, retry_queue, summaries, graph
+
+    def _summarize(self, summaries, all_chunks):
+        """Updates the file and directory summaries along the changed paths."""
+        if not SUMMARY_TREE_ENABLED:
+            return
+        # Requests to the model are I/O bound: threads are enough
+        with ThreadPoolExecutor(max_workers=ENRICH_WORKERS) as executor:
+            updated = summaries.update(
+                all_chunks,
+                lambda jobs: list(executor.map(summarize_node, jobs)),
+                self.vectorstore_manager.embeddings.embed_documents,
+            )
+        if updated:
+            print(f"🗂️ Updated {updated} file and directory summaries.")
+
+    def _unmapped(self, graph, current_files):
+        """Indexed files the code graph has no symbols for (all, in an older index)."""
+        if not CODE_GRAPH_ENABLED:
+            return []
+        return sorted(
+            file_path
+            for file_path in current_files
+            if repo_relative_path(file_path, self.repo_name) not in graph.files
+        )
+
+    def _map_symbols(self, graph, file_paths):
+        """Parses unchanged files for their code graph symbols alone."""
+        if not file_paths:
+            return
+        print(f"🕸️ Mapping the symbols of {len(file_paths)} files for the code graph.")
+        with Pool(processes=cpu_count()) as pool:
+            parse_func = partial(parse_file_wrapper, repo_name=self.repo_name)
+            for file_path, _, _, symbols in pool.imap_unordered(parse_func, file_paths):
+                graph.update({repo_relative_path(file_path, self.repo_name): symbols or {}})
+
+    def _link(self, graph, all_chunks):
+        """Resolves the code graph edges; near-duplicates stand for their canonical chunk."""
+        if not CODE_GRAPH_ENABLED:
+            return
+        edges = graph.resolve(
+            {c["chunk_id"]: c["duplicate_of"] for c in all_chunks if c.get("duplicate_of")}
+        )
+        print(f"🕸️ Linked chunks by {edges} import and call edges.")
+
+    def _save(
+        self, vectorstore, all_chunks, cache, retry_queue, summaries, graph,
+        near_duplicates=None,
+    ):
+        generations = self.vectorstore_manager.generations(self.repo_name)
+
+        def write_generation_files(generation_path):
+            atomic_write_json(os.path.join(generation_path, CHUNKS_FILE), all_chunks)
+            save_cache(self.repo_name, cache, generation_path)
+            if retry_queue:
+                retry_queue.save(os.path.join(generation_path, RETRY_FILE))
+            if SUMMARY_TREE_ENABLED:
+                summaries.save(generation_path)
+            if CODE_GRAPH_ENABLED:
+                graph.save(generation_path)
+            fingerprints_path = os.path.join(generation_path, FINGERPRINTS_FILE)
+            previous = generations.current_file(FINGERPRINTS_FILE)
+            if near_duplicates is not None:
+                near_duplicates.save(fingerprints_path)
+            elif previous:
+                # Unchanged by this run: carried over, hard-linked if possible
+                try:
+                    os.link(previous, fingerprints_path)
+                except OSError:
+                    shutil.copy2(previous, fingerprints_path)
+
+        # Vectors, chunks, cache, retries, summaries, the graph and the
+        # near-duplicate fingerprints go live together at commit
+        self.vectorstore_manager.save(
+            vectorstore, self.repo_name, before_commit=write_generation_files
+        )
+
+    def _retry_enrichment(self, retry_queue, all_chunks, writer, wait=0, force=False):
+        """
+        Re-enriches the queued chunks due within `wait` seconds (all of them
+        with `force`), one at a time and each no earlier than its backoff
+        allows, and queues the enriched ones for re-embedding. Returns the
+        number of chunks re-enriched and attempted.
+        """
+        chunks_by_id = {chunk["chunk_id"]: chunk for chunk in all_chunks}
+        retry_queue.prune(chunks_by_id)
+        due = retry_queue.due(within=wait, force=force)
+        if not due:
+            return 0, 0
+
+        duplicates = {}
+        for chunk in all_chunks:
+            if chunk.get("duplicate_of"):
+                duplicates.setdefault(chunk["duplicate_of"], []).append(chunk)
+        writer.flush()  # a chunk is re-added only once its first vector is stored
+
+        retried = 0
+        for due_at, chunk_id in due:
+            time.sleep(max(0.0, due_at - time.time()))
+            chunk = chunks_by_id[chunk_id]
+            enriched_data = enrich_chunk(chunk["content"])
+            if enriched_data.get("error"):
+                retry_queue.record_failure(chunk, enriched_data["error"])
+                continue
+            for target in [chunk] + duplicates.get(chunk_id, []):
+                target["summary"] = enriched_data["summary"]
+                target["keywords"] = enriched_data["keywords"]
+                target["enriched_by"] = ENRICH_MODEL
+            retry_queue.record_success(chunk_id)
+            writer.add([chunk])
+            retried += 1
+        return retried, len(due)
+
+    def reenrich(self, force=False):
+        """
+        Retries the enrichment of the chunks in the retry queue that are due
+        (all of them with `force`), re-embeds those that succeed and saves
+        a new index generation.
+        """
+        vectorstore, all_chunks, retry_queue, summaries, graph = self._load_index()
+        if not retry_queue:
+            print("✨ No chunks are waiting for enrichment.")
+            return
+        self._reenrich(
+            vectorstore,
+            all_chunks,
+            load_cache(self.repo_name),
+            retry_queue,
+            summaries,
+            graph,
+            force,
+        )
+
+    def _reenrich(
+        self, vectorstore, all_chunks, cache, retry_queue, summaries, graph, force=False
+    ):
+        writer = EmbeddingWriter(
+            self.vectorstore_manager,
+            self.checkpoint,
+            vectorstore,
+            [c for c in all_chunks if not c.get("duplicate_of")],
+        )
+        retried, attempted = self._retry_enrichment(
+            retry_queue, all_chunks, writer, force=force
+        )
+        if not attempted:
+            print(f"⏳ None of the {len(retry_queue)} queued chunks is due for a retry.")
+            return
+        writer.flush()
+        vectorstore = writer.vectorstore
+        # Re-added documents get their duplicate locations back
+        self.vectorstore_manager.set_duplicate_locations(
+            vectorstore, duplicate_locations(all_chunks)
+        )
+        report_enrichment({}, retried, attempted, retry_queue)
+        self._summarize(summaries, all_chunks)
+        self._save(vectorstore, all_chunks, cache, retry_queue, summaries, graph)
+
+    def _index(self, repo_path, report):
+        # 1. Load existing data (from the current index generation)
+        vectorstore, all_chunks, retry_queue, summaries, graph = self._load_index()
+        old_cache = load_cache(self.repo_name)
+        migrated = uses_legacy_ids(all_chunks)
+        if migrated:
+            vectorstore = self._migrate(vectorstore, all_chunks)
 
         # 2. Identify file and structure changes
         files_to_process = []
-        new_cache = {}
+        commit = head_commit(repo_path)
+        classifier = classifier_fingerprint()
+        new_cache = {SKIPPED_KEY: {}, COMMIT_KEY: commit, CLASSIFIER_KEY: classifier}
+        # Skip decisions cached under other settings are made again for every file
+        reclassify = old_cache.get(CLASSIFIER_KEY) != classifier
+        if old_cache.get(COMMIT_KEY) and commit != old_cache[COMMIT_KEY]:
+            # e.g. an index imported from a bundle: only the changes since are indexed
+            print(f"📌 Index was built at commit {old_cache[COMMIT_KEY][:12]}; updating.")
         current_files = set()
-        spec = load_gitignore(repo_path)
-
-        # Tree structure capture
-        directory_tree = generate_directory_tree(repo_path)
-        tree_hash = hashlib.sha256(directory_tree.encode("utf-8")).hexdigest()
-        tree_changed = old_cache.get("repository_structure.txt") != tree_hash
-        new_cache["repository_structure.txt"] = tree_hash
-
-        for root, dirs, files in os.walk(repo_path):
-            if ".git" in dirs:
-                dirs.remove(".git")
-
-            rel_root = os.path.relpath(root, repo_path)
-            if rel_root == ".":
-                rel_root = ""
-
-            if spec:
-                dirs[:] = [
-                    d for d in dirs if not spec.match_file(os.path.join(rel_root, d))
-                ]
-                files = [
-                    f for f in files if not spec.match_file(os.path.join(rel_root, f))
-                ]
-
-            for file in files:
-                file_path = os.path.join(root, file)
-                if file.endswith(
-                    (".png", ".jpg", ".jpeg", ".gif", ".exe", ".dll", ".bin")
-                ):
+        skip_counts = {}
+
+        # Single walk: the tree listing and file checks are collected together,
+        # hashing files on a thread pool while the walk goes on
+        walker = RepositoryWalker(repo_path)
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+            checks = [
+                (
+                    file_path,
+                    executor.submit(
+                        check_file, file_path, rel_path, old_cache, stat, reclassify
+                    ),
+                )
+                for file_path, rel_path, stat in walker.walk()
+            ]
+            for i, (file_path, check) in enumerate(checks):
+                reason, file_hash, signature = check.result()
+                report("scan", i + 1, len(checks))
+                if reason:
+                    new_cache[SKIPPED_KEY][file_path] = {
+                        "reason": reason,
+                        "signature": signature,
+                    }
+                    skip_counts[reason] = skip_counts.get(reason, 0) + 1
                     continue
 
                 current_files.add(file_path)
-                file_hash = calculate_file_hash(file_path)
                 new_cache[file_path] = file_hash
                 if old_cache.get(file_path) != file_hash:
                     files_to_process.append(file_path)
 
+        # Tree structure capture
+        directory_tree = walker.tree
+        tree_hash = hashlib.sha256(directory_tree.encode("utf-8")).hexdigest()
+        tree_changed = old_cache.get("repository_structure.txt") != tree_hash
+        new_cache["repository_structure.txt"] = tree_hash
+
+        report_skipped_files(skip_counts)
+
+        # Enrichment is keyed by model: files with chunks enriched by another
+        # model than ENRICH_MODEL are processed again
+        stale_files = {
+            chunk["file_path"]
+            for chunk in all_chunks
+            if enriched_by_other_model(chunk)
+        } & current_files - set(files_to_process)
+        if stale_files:
+            print(
+                f"🔄 {len(stale_files)} files were enriched by another model; "
+                f"enriching them again with {ENRICH_MODEL}."
+            )
+            files_to_process += sorted(stale_files)
+        # Unchanged chunks keep their ids, so only the re-cut ones are enriched
+        legacy_files = (
+            legacy_chunked_files(all_chunks) & current_files - set(files_to_process)
+        )
+        if legacy_files:
+            print(f"🔧 Re-chunking {len(legacy_files)} files indexed with the old chunking.")
+            files_to_process += sorted(legacy_files)
         deleted_files = (
-            set(old_cache.keys()) - current_files - {"repository_structure.txt"}
+            set(old_cache.keys())
+            - current_files
+            - {"repository_structure.txt", SKIPPED_KEY, COMMIT_KEY, CLASSIFIER_KEY}
         )
 
-        if not files_to_process and not deleted_files and not tree_changed:
-            print("✨ No changes detected. Index is up to date!")
-            if progress_callback:
-                progress_callback(1, 1)
+        if not (files_to_process or deleted_files or tree_changed or migrated):
+            unmapped = self._unmapped(graph, current_files)
+            if retry_queue.due():
+                print("✨ No changes detected. Retrying failed enrichments.")
+                self._reenrich(
+                    vectorstore, all_chunks, new_cache, retry_queue, summaries, graph
+                )
+            elif all_chunks and (
+                (SUMMARY_TREE_ENABLED and not summaries) or unmapped
+            ):
+                print("✨ No changes detected. Building summaries and the code graph.")
+                self._summarize(summaries, all_chunks)
+                self._map_symbols(graph, unmapped)
+                self._link(graph, all_chunks)
+                self._save(
+                    vectorstore, all_chunks, new_cache, retry_queue, summaries, graph
+                )
+            elif all_chunks and (commit != old_cache.get(COMMIT_KEY) or reclassify):
+                print("✨ No indexed files changed. Recording the new commit and settings.")
+                self._save(
+                    vectorstore, all_chunks, new_cache, retry_queue, summaries, graph
+                )
+            else:
+                print("✨ No changes detected. Index is up to date!")
+            self.checkpoint.remove()
+            report("save", 1, 1)
             return
 
-        # 3. Process changed files in parallel
+        # Files finished by an interrupted run are taken from the checkpoint
+        resumed = self.checkpoint.load(
+            {file_path: new_cache[file_path] for file_path in files_to_process}
+        )
+        resumed_vectors = {}  # chunk_id -> encoded vector, decoded when stored
         newly_processed_chunks = {}
-        if files_to_process:
-            print(f"Found {len(files_to_process)} new or modified files to process.")
-            process_func = partial(process_file_wrapper, repo_name=self.repo_name)
-
-            with Pool(processes=cpu_count()) as pool:
-                results_iterator = pool.imap_unordered(process_func, files_to_process)
+        newly_mapped_symbols = {}  # file_path -> code graph symbols
+        for file_path, record in resumed.items():
+            newly_processed_chunks[file_path] = record["chunks"]
+            resumed_vectors.update(record["embeddings"])
+            if record.get("symbols") is not None:
+                newly_mapped_symbols[file_path] = record["symbols"]
+        if resumed:
+            print(
+                f"♻️ Resuming: {len(resumed)} of {len(files_to_process)} files "
+                "were finished by the interrupted run."
+            )
+        files_to_parse = [f for f in files_to_process if f not in resumed]
+
+        # 3. Parse changed files in parallel
+        stats_before, stats_after = {}, {}
+        if files_to_parse:
+            print(f"Found {len(files_to_parse)} new or modified files to process.")
+            parse_func = partial(parse_file_wrapper, repo_name=self.repo_name)
+            # The pool is only started when there are files to parse
+            with Pool(processes=min(cpu_count(), len(files_to_parse))) as pool:
+                results_iterator = pool.imap_unordered(parse_func, files_to_parse)
+                for i, (file_path, packed, stats, symbols) in enumerate(
+                    results_iterator
+                ):
+                    newly_processed_chunks[file_path] = unpack_chunks(packed)
+                    if symbols is not None:
+                        newly_mapped_symbols[file_path] = symbols
+                    report("parse", i + 1, len(files_to_parse))
+                    merge_stats(stats_before, stats.get("before", {}))
+                    merge_stats(stats_after, stats.get("after", {}))
 
-                total_files = len(files_to_process)
-                for i, (file_path, chunks) in enumerate(results_iterator):
-                    newly_processed_chunks[file_path] = chunks
-                    if progress_callback:
-                        progress_callback(i + 1, total_files)
+            report_chunk_stats(stats_before, stats_after)
 
         # 4. Update the master chunk list
         files_to_update = set(newly_processed_chunks.keys()) | deleted_files
         if tree_changed:
             files_to_update.add("repository_structure.txt")
 
-        chunk_ids_to_remove = []
+        old_chunks = {}  # chunk_id -> chunk, for the files being updated
         remaining_chunks = []
         for chunk in all_chunks:
             if chunk["file_path"] in files_to_update:
-                chunk_ids_to_remove.append(chunk["chunk_id"])
+                old_chunks[chunk["chunk_id"]] = chunk
             else:
                 remaining_chunks.append(chunk)
 
+        # Chunk-level diff: a chunk whose id (path + content hash) is
+        # unchanged keeps its enrichment and vector, only its position moves
+        new_chunks, moved_chunks, stale_ids = [], [], []
+        for file_path in sorted(newly_processed_chunks):
+            for chunk in newly_processed_chunks[file_path]:
+                old_chunk = old_chunks.pop(chunk["chunk_id"], None)
+                if old_chunk is None:
+                    new_chunks.append(chunk)
+                    continue
+                if enriched_by_other_model(old_chunk):
+                    # Enriched and embedded again, like a new chunk
+                    stale_ids.append(chunk["chunk_id"])
+                    new_chunks.append(chunk)
+                    continue
+                if any(old_chunk.get(k) != chunk.get(k) for k in POSITION_KEYS):
+                    old_chunk.update({k: chunk.get(k) for k in POSITION_KEYS})
+                    moved_chunks.append(old_chunk)
+                remaining_chunks.append(old_chunk)
+        chunk_ids_to_remove = list(old_chunks)
+        new_ids = {chunk["chunk_id"] for chunk in new_chunks}
+        if newly_processed_chunks:
+            print(
+                f"🧩 {len(new_chunks)} new or changed chunks, "
+                f"{len(chunk_ids_to_remove)} removed."
+            )
+
+        # Duplicates whose canonical chunk is gone take its place in the index
+        promote_orphans(remaining_chunks, set(chunk_ids_to_remove))
+        # Deletes are O(removed chunks); unknown ids are ignored
+        self.vectorstore_manager.delete(
+            vectorstore, chunk_ids_to_remove + stale_ids
+        )
+
+        # 5. Enrich only canonical chunks, duplicates share their enrichment
+        near_duplicates = None
+        if DEDUP_ENABLED:
+            # The fingerprints saved with the generation are updated by chunk
+            # id: only chunks new to the index are MinHashed
+            near_duplicates = NearDuplicateIndex.load(
+                self.vectorstore_manager.generations(self.repo_name).current_file(
+                    FINGERPRINTS_FILE
+                )
+            )
+            near_duplicates.sync(c for c in remaining_chunks if not c.get("duplicate_of"))
+            to_enrich = assign_duplicates(new_chunks, index=near_duplicates)
+            if len(to_enrich) < len(new_chunks):
+                print(
+                    f"🧬 {len(new_chunks) - len(to_enrich)} of {len(new_chunks)} "
+                    "new chunks are near-duplicates and reuse existing enrichment."
+                )
+        else:
+            to_enrich = new_chunks
+
+        # New canonical chunks stream through enrichment into the index:
+        # files are checkpointed once enriched and embedded in batches
+        writer = EmbeddingWriter(
+            self.vectorstore_manager,
+            self.checkpoint,
+            vectorstore,
+            [c for c in remaining_chunks + new_chunks if not c.get("duplicate_of")],
+        )
+        stored = [c for c in to_enrich if c["chunk_id"] in resumed_vectors]
+        writer.add_embedded(
+            stored, [decode_vector(resumed_vectors.pop(c["chunk_id"])) for c in stored]
+        )
+        pending = [
+            c for c in to_enrich if c["chunk_id"] not in writer and not (
+                c["file_path"] in resumed and c.get("summary")
+            )
+        ]
+        pending_per_file = {}
+        for chunk in pending:
+            pending_per_file[chunk["file_path"]] = (
+                pending_per_file.get(chunk["file_path"], 0) + 1
+            )
+
+        def finish_file(file_path):
+            chunks = newly_processed_chunks[file_path]
+            if file_path not in resumed or file_path in pending_per_file:
+                self.checkpoint.append(
+                    file_path,
+                    new_cache[file_path],
+                    chunks,
+                    {},
+                    newly_mapped_symbols.get(file_path),
+                )
+            writer.add(
+                [
+                    c
+                    for c in chunks
+                    if c["chunk_id"] in new_ids
+                    and not c.get("duplicate_of")
+                    and c["chunk_id"] not in writer
+                ],
+                file_path,
+                new_cache[file_path],
+            )
+
+        for file_path in sorted(newly_processed_chunks):
+            if file_path not in pending_per_file:
+                finish_file(file_path)
+
+        failures = Counter()
+        if pending:
+            contents = [chunk["content"] for chunk in pending]
+            # A pool of its own: ENRICH_WORKERS bounds the requests to the model
+            with Pool(processes=ENRICH_WORKERS) as enrich_pool:
+                results_iterator = enrich_pool.imap(enrich_chunk, contents, chunksize=4)
+                for i, (chunk, enriched_data) in enumerate(
+                    zip(pending, results_iterator)
+                ):
+                    chunk["summary"] = enriched_data["summary"]
+                    chunk["keywords"] = enriched_data["keywords"]
+                    chunk["enriched_by"] = ENRICH_MODEL
+                    if enriched_data.get("error"):
+                        # Stored as is for now, and queued for another attempt
+                        chunk["enriched_by"] = None
+                        retry_queue.record_failure(chunk, enriched_data["error"])
+                        failures[enriched_data["error"]] += 1
+                    report("enrich", i + 1, len(pending))
+
+                    file_path = chunk["file_path"]
+                    pending_per_file[file_path] -= 1
+                    if not pending_per_file[file_path]:
+                        finish_file(file_path)
+
+        # Failed enrichments, from this run or earlier ones, are retried when due
+        retried, attempted = self._retry_enrichment(
+            retry_queue, remaining_chunks + new_chunks, writer, wait=ENRICH_RETRY_WAIT
+        )
+        report_enrichment(failures, retried, attempted, retry_queue)
+
+        chunks_by_id = {c["chunk_id"]: c for c in remaining_chunks + new_chunks}
+        for chunk in new_chunks:
+            canonical = chunks_by_id.get(chunk.get("duplicate_of"))
+            if canonical:
+                chunk["summary"] = canonical["summary"]
+                chunk["keywords"] = canonical["keywords"]
+                chunk["enriched_by"] = canonical.get("enriched_by", LLM_MODEL)
+
         # Updating tree structure if it has changed
         if tree_changed:
             print("🌳 Directory structure has changed. Updating index.")
@@ -144,57 +819,58 @@ class IndexingPipeline:
                 "repo": self.repo_name,
                 "file_path": "repository_structure.txt",
                 "lang": "text",
-                "chunk_id": "repository_structure-0",
+                "chunk_id": make_chunk_id("repository_structure.txt", directory_tree),
                 "start_line": None,
                 "end_line": None,
                 "content": directory_tree,
                 "summary": "This document provides a tree-like representation of the repository's folder and file structure.",
                 "keywords": "folder structure, directory tree, file layout, project architecture",
             }
-            # Append the new tree chunk to remaining_chunks and newly_processed_chunks
-            remaining_chunks.append(tree_chunk)
-            if "repository_structure.txt" in newly_processed_chunks:
-                newly_processed_chunks["repository_structure.txt"].append(tree_chunk)
-            else:
-                newly_processed_chunks["repository_structure.txt"] = [tree_chunk]
-
-        # The loop below was causing duplication, this is a cleaner way
-        temp_processed_chunks = []
-        for chunks in newly_processed_chunks.values():
-            temp_processed_chunks.extend(chunks)
+            new_chunks.append(tree_chunk)
 
-        all_chunks = remaining_chunks + temp_processed_chunks
+        all_chunks = remaining_chunks + new_chunks
 
-        # 5. Save everything
+        # 6. Save everything
         if not all_chunks:
             print("No chunks remaining or created. Exiting.")
             return
 
-        if vectorstore and chunk_ids_to_remove:
-            existing_ids = set(vectorstore.index_to_docstore_id.values())
-            # Ensure the list of IDs to delete is unique to prevent KeyErrors
-            unique_ids_to_remove = set(chunk_ids_to_remove)
-            valid_ids_to_delete = [
-                id_ for id_ in unique_ids_to_remove if id_ in existing_ids
+        # Canonical chunks not stored yet (promoted duplicates, the tree, or
+        # everything when the vectorstore is new) are embedded last
+        report("embed", 0, 1)
+        writer.add(
+            [
+                chunk
+                for chunk in all_chunks
+                if not chunk.get("duplicate_of") and chunk["chunk_id"] not in writer
             ]
-            if valid_ids_to_delete:
-                vectorstore.delete(valid_ids_to_delete)
-
-        # Collect all new chunks (from files and the tree) to be added to the vector store
-        final_new_chunks = [
-            chunk for chunks in newly_processed_chunks.values() for chunk in chunks
-        ]
-
-        if final_new_chunks:
-            if vectorstore:
-                vectorstore = self.vectorstore_manager.add_documents(
-                    vectorstore, final_new_chunks
-                )
-            else:
-                print("Creating new FAISS vectorstore...")
-                vectorstore = self.vectorstore_manager.create_vectorstore(all_chunks)
-
-        self.vectorstore_manager.save(vectorstore, self.repo_name)
-        save_cache(self.repo_name, new_cache)
-        with open(self.repo_chunks_path, "w", encoding="utf-8") as f:
-            json.dump(all_chunks, f, indent=2)
+        )
+        writer.flush()
+        vectorstore = writer.vectorstore
+        report("embed", 1, 1)
+
+        if vectorstore and moved_chunks:
+            self.vectorstore_manager.update_metadata(vectorstore, moved_chunks)
+        self.vectorstore_manager.set_duplicate_locations(
+            vectorstore, duplicate_locations(all_chunks)
+        )
+        self._summarize(summaries, all_chunks)
+
+        # Only the symbols of changed files are replaced; edges are re-resolved
+        if CODE_GRAPH_ENABLED:
+            graph.update(
+                {
+                    repo_relative_path(file_path, self.repo_name): symbols
+                    for file_path, symbols in newly_mapped_symbols.items()
+                },
+                [repo_relative_path(file_path, self.repo_name) for file_path in deleted_files],
+            )
+            self._map_symbols(graph, self._unmapped(graph, current_files))
+        self._link(graph, all_chunks)
+        report("save", 0, 1)
+        self._save(
+            vectorstore, all_chunks, new_cache, retry_queue, summaries, graph,
+            near_duplicates,
+        )
+        self.checkpoint.remove()
+        report("save", 1, 1)
@@ -0,0 +1,105 @@
+# src/pipeline/jobs.py
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.pipeline.indexing import IndexingPipeline, IndexingCancelled
+from config.settings import JOB_RETENTION
+
+
+class IndexingJob:
+    """State of one background indexing run, updated from the worker thread."""
+
+    def __init__(self, github_url):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.github_url = github_url
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.stage = None
+        self.current = 0
+        self.total = 0
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def progress(self):
+        """Overall progress in [0, 1], counting each pipeline stage equally."""
+        if self.status == "done":
+            return 1.0
+        if self.stage not in IndexingPipeline.STAGES:
+            return 0.0
+        stage_index = IndexingPipeline.STAGES.index(self.stage)
+        stage_progress = self.current / self.total if self.total else 0.0
+        return (stage_index + stage_progress) / len(IndexingPipeline.STAGES)
+
+    def update(self, current, total, stage):
+        self.stage, self.current, self.total = stage, current, total
+
+
+class JobManager:
+    """
+    Runs IndexingPipeline jobs on background threads so callers (like the
+    Streamlit app) never block on indexing. Submitting a repository that is
+    already being indexed returns the running job. Jobs that finished more
+    than `retention` seconds ago are forgotten.
+    """
+
+    def __init__(
+        self, max_workers=1, pipeline_factory=IndexingPipeline, retention=JOB_RETENTION
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.pipeline_factory = pipeline_factory
+        self.retention = retention
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _expire(self):
+        """Drops finished jobs past the retention period; called with the lock held."""
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.retention:
+                del self.jobs[job_id]
+
+    def submit(self, github_url):
+        with self.lock:
+            self._expire()
+            for job in self.jobs.values():
+                if job.github_url == github_url and job.active:
+                    return job
+            job = IndexingJob(github_url)
+            self.jobs[job.job_id] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Requests cancellation; the job stops at its next progress report."""
+        job = self.jobs.get(job_id)
+        if job and job.active:
+            job.cancel_event.set()
+        return job
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+
+        job.status = "running"
+        try:
+            pipeline = self.pipeline_factory(job.github_url)
+            pipeline.run(progress_callback=job.update, cancel_event=job.cancel_event)
+            job.status = "done"
+        except IndexingCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
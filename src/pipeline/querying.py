@@ -1,8 +1,66 @@
 # src/pipeline/querying.py
-from langchain.chains import RetrievalQA
+import copy
+import time
+import threading
 from langchain_ollama import OllamaLLM
 from src.components.vectorstore import VectorstoreManager
-from config.settings import LLM_MODEL
+from src.llm.scheduler import answering
+from src.llm.ollama_client import load_model
+from src.utils.tracing import QueryTrace, LLMTimer, span, record_hits, append_trace
+from src.components.context_assembler import assemble_context
+from src.components.summary_tree import is_broad_query
+from src.components.query_filters import (
+    parse_query,
+    merge_filters,
+    relative_path,
+    MetadataTable,
+)
+from src.components.chunk_normalizer import estimate_tokens
+from config.settings import (
+    ANSWER_MODEL,
+    ANSWER_KEEP_ALIVE,
+    CONTEXT_CANDIDATES,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_FULL_CODE_HITS,
+    SUMMARY_CANDIDATES,
+    SUMMARY_DRILL_CHUNKS,
+    SUMMARY_TOKEN_BUDGET,
+    GRAPH_EXPAND_HITS,
+    GRAPH_MAX_NEIGHBORS,
+    INDEX_MMAP,
+    TRACE_LOG_PATH,
+)
+
+ANSWER_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+
+def collapse_duplicates(documents):
+    """
+    Collapses hits that share the same content into a single hit and records
+    every location of that content (including indexed near-duplicates) in
+    its `locations` metadata.
+    """
+    collapsed = {}
+    for doc in documents:
+        # Copy so the stored document is never mutated by concurrent queries
+        doc = copy.copy(doc)
+        doc.metadata = metadata = dict(doc.metadata)
+        location = {
+            "file_path": metadata.get("file_path"),
+            "start_line": metadata.get("start_line"),
+            "end_line": metadata.get("end_line"),
+        }
+        if doc.page_content in collapsed:
+            collapsed[doc.page_content].metadata["locations"].append(location)
+            continue
+        metadata["locations"] = [location] + list(metadata.get("duplicates", []))
+        collapsed[doc.page_content] = doc
+    return list(collapsed.values())
 
 
 class QueryPipeline:
@@ -10,28 +68,285 @@ class QueryPipeline:
         self.github_url = github_url
         self.repo_name = github_url.split("/")[-1]
         self.vectorstore_manager = VectorstoreManager()
-        self.llm = OllamaLLM(model=LLM_MODEL)
-        self.qa_chain = None
+        self.llm = OllamaLLM(model=ANSWER_MODEL, keep_alive=ANSWER_KEEP_ALIVE)
+        self.vectorstore = None
+        self.metadata_table = None
+        self.summaries = None  # file and directory summaries, for broad questions
+        self.graph = None  # import and call edges between chunks
+        self.generation = None  # index generation currently loaded
+        self.refresh_lock = threading.Lock()
+        self.token_budget = CONTEXT_TOKEN_BUDGET
+        self.full_code_hits = CONTEXT_FULL_CODE_HITS
+        self.trace_log = TRACE_LOG_PATH  # JSONL file traces are appended to, if set
+
+    def warm_up(self):
+        """
+        Loads the answer and embedding models into Ollama on a background
+        thread, so they load while the index does rather than on the first
+        question. Returns the thread.
+        """
+
+        def load():
+            load_model(ANSWER_MODEL)
+            try:
+                self.vectorstore_manager.embeddings.embed_query("warm-up")
+            except Exception:
+                pass  # the first question reports an unreachable Ollama
+
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
 
     def setup(self):
-        """Loads the vectorstore and sets up the QA chain."""
-        vectorstore = self.vectorstore_manager.load(self.repo_name)
+        """Loads the vectorstore the questions are answered from."""
+        vectorstore, generation = self.vectorstore_manager.load_generation(
+            self.repo_name, mmap=INDEX_MMAP
+        )
         if not vectorstore:
             raise FileNotFoundError(f"Vectorstore for '{self.repo_name}' not found.")
+        self._install(vectorstore, generation)
+        print("QA pipeline is ready.")
 
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            return_source_documents=True,
+    def _install(self, vectorstore, generation):
+        # The table, summaries and graph are loaded before the swap so queries
+        # never wait
+        self.metadata_table = MetadataTable(vectorstore)
+        self.summaries = self.vectorstore_manager.load_summaries(
+            self.repo_name, generation, mmap=INDEX_MMAP
+        )
+        self.graph = self.vectorstore_manager.load_graph(
+            self.repo_name, generation, symbols=False
         )
-        print("QA chain is ready.")
+        self.vectorstore = vectorstore
+        self.generation = generation
+
+    def refresh(self, wait=False):
+        """
+        Switches to a newer index generation if one was saved. The new index
+        is loaded on a background thread while queries keep using the loaded
+        one, unless `wait` is set. Returns whether a newer generation exists.
+        """
+        if self.generation is None:
+            return False  # not set up from a saved index
+        if self.vectorstore_manager.index_version(self.repo_name) in (None, self.generation):
+            return False
+        if not self.refresh_lock.acquire(blocking=wait):
+            return True  # another query already started loading it
+        if wait:
+            self._swap()
+        else:
+            threading.Thread(target=self._swap, daemon=True).start()
+        return True
+
+    def _swap(self):
+        try:
+            if self.vectorstore_manager.index_version(self.repo_name) == self.generation:
+                return
+            vectorstore, generation = self.vectorstore_manager.load_generation(
+                self.repo_name, mmap=INDEX_MMAP
+            )
+            if vectorstore:
+                self._install(vectorstore, generation)
+                print(f"🔄 {self.repo_name}: switched to index {generation}.")
+        except Exception as e:
+            print(f"⚠️ {self.repo_name}: could not load the new index: {e}")
+        finally:
+            self.refresh_lock.release()
+
+    def ask(self, query_text, k=CONTEXT_CANDIDATES, filters=None):
+        """
+        Answers a question from the `k` best chunks, packed into the token
+        budget by the context assembler. `filters` ({"lang"|"path"|"type":
+        [values]}) and inline predicates such as `lang:python path:src/`
+        restrict the chunks searched. Broad questions about the repository's
+        organization are answered from file and directory summaries first;
+        other questions get the code graph neighbors of their top hits too.
+        The response holds the answer, the documents that made it into the
+        prompt, per-query `stats` and the query's `trace`: span timings,
+        token counts and retrieval scores.
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore is not loaded. Call setup() first.")
+
+        started = time.perf_counter()
+        trace = QueryTrace(query_text, self.repo_name)
+        with trace.activate():
+            broad = None
+            self.refresh()  # before the summaries are read
+            question, inline_filters = parse_query(query_text)
+            filtered = merge_filters(filters, inline_filters)
+            summaries = self.summaries
+            if summaries and not filtered and is_broad_query(question):
+                broad = self._broad_context(question, summaries)
+            if broad:
+                context, sources, stats = broad
+            else:
+                results = self.search(query_text, k=k, filters=filters)
+                documents = [doc for doc, _ in results]
+                neighbors = 0
+                if self.graph and not filtered:  # neighbors may lie outside the filters
+                    with span("graph_expand"):
+                        documents, neighbors = self._with_neighbors(
+                            documents, self.vectorstore, self.graph
+                        )
+                with span("build_prompt"):
+                    context, sources, stats = assemble_context(
+                        documents, self.token_budget, self.full_code_hits
+                    )
+                stats["neighbors"] = neighbors
+            prompt = ANSWER_PROMPT.format(context=context, question=question)
+            waiting = time.perf_counter()
+            with answering():
+                trace.add("answer_slot_wait", waiting, time.perf_counter())
+                result = self.llm.invoke(prompt, config={"callbacks": [LLMTimer(trace)]})
+
+        stats["prompt_tokens"] = estimate_tokens(prompt)
+        stats["time_to_answer"] = time.perf_counter() - started
+        # Estimates; "prompt" and "completion" are the counts Ollama reports
+        trace.tokens["prompt_estimate"] = stats["prompt_tokens"]
+        trace.tokens["context_estimate"] = stats["context_tokens"]
+        record = trace.to_dict()
+        if self.trace_log:
+            append_trace(record, self.trace_log)
+        return {"result": result, "source_documents": sources, "stats": stats, "trace": record}
+
+    def _with_neighbors(self, documents, vectorstore, graph):
+        """
+        Appends the chunks one hop away from the top hits in the code graph
+        (those they import or call, then their callers), found by lookups
+        rather than further vector searches. Returns the documents and the
+        number of neighbors added.
+        """
+        seen = {doc.metadata.get("chunk_id") for doc in documents}
+        neighbors = []
+        for doc in documents[:GRAPH_EXPAND_HITS]:
+            for chunk_id in graph.neighbors(doc.metadata.get("chunk_id")):
+                if len(neighbors) == GRAPH_MAX_NEIGHBORS:
+                    break
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                neighbor = vectorstore.docstore.search(chunk_id)
+                if neighbor is not None:  # e.g. the index was swapped meanwhile
+                    neighbors.append(neighbor)
+        return documents + collapse_duplicates(neighbors), len(neighbors)
+
+    def _broad_context(self, query_text, summaries):
+        """
+        Builds the context of a broad question: the closest file and directory
+        summaries (directories with their children's), then a few chunks found
+        in the matched directories, as summaries too. Returns (context,
+        documents, stats), or None if there are no summaries to search.
+        """
+        with span("embed_query"):
+            embedding = self.vectorstore_manager.embeddings.embed_query(query_text)
+        with span("summary_search"):
+            results = summaries.search(embedding, SUMMARY_CANDIDATES)
+        record_hits(results)
+        nodes = [doc for doc, _ in results]
+        if not nodes:
+            return None
+
+        parts, used, remaining = [], [], SUMMARY_TOKEN_BUDGET
+        for doc in nodes:
+            text = summaries.describe(doc.metadata["node_id"])
+            if estimate_tokens(text) > remaining:
+                break
+            parts.append(text)
+            used.append(doc)
+            remaining -= estimate_tokens(text)
+
+        # Drill down into the matched directories; matched files are covered
+        matched = {"dir": [], "file": []}
+        for doc in used:
+            matched[doc.metadata["kind"]].append(doc.metadata["path"])
+        documents = []
+        if matched["dir"]:
+            # The root ("") covers every chunk
+            filters = {} if "" in matched["dir"] else {
+                "path": [path + "/" for path in matched["dir"]]
+            }
+            documents = [
+                doc
+                for doc, _ in self.search_by_vector(
+                    embedding, k=SUMMARY_DRILL_CHUNKS, filters=filters
+                )
+                if relative_path(doc.metadata) not in matched["file"]
+            ]
+        with span("build_prompt"):
+            context, sources, stats = assemble_context(
+                documents, remaining, full_code_hits=0
+            )
+        stats["context_tokens"] += SUMMARY_TOKEN_BUDGET - remaining
+        stats["summaries"] = len(used)
+        if context:
+            parts.append(context)
+        return "\n\n".join(parts), used + sources, stats
+
+    def search(self, query_text, k=5, filters=None):
+        """
+        Returns the `k` most similar documents and their scores, without the
+        LLM. Filters are taken from `filters` and from inline predicates.
+        """
+        if not self.vectorstore:
+            raise ValueError("Vectorstore is not loaded. Call setup() first.")
+        self.refresh()
+
+        query_text, inline_filters = parse_query(query_text)
+        filters = merge_filters(filters, inline_filters)
+        if not query_text:
+            raise ValueError("The query is empty once filters are removed.")
+        if not filters:
+            results = self.vectorstore.similarity_search_with_score(query_text, k=k)
+            return self._collapse_results(results)
+
+        with span("embed_query"):
+            embedding = self.vectorstore_manager.embeddings.embed_query(query_text)
+        return self.search_by_vector(embedding, k=k, filters=filters)
+
+    def search_by_vector(self, embedding, k=5, filters=None):
+        """Like search(), for a query that is already embedded."""
+        if not self.vectorstore:
+            raise ValueError("Vectorstore is not loaded. Call setup() first.")
+        self.refresh()
+
+        # Read once: a refresh may swap the index while this query runs
+        vectorstore, table = self.vectorstore, self.metadata_table
+        if filters:
+            # Filters select the candidate ids before the vector search runs
+            if table is None or table.vectorstore is not vectorstore:
+                table = MetadataTable(vectorstore)
+            with span("filter_select"):
+                faiss_ids = table.select(filters)
+            results = self.vectorstore_manager.search_by_vector_in(
+                vectorstore, embedding, k, faiss_ids
+            )
+        else:
+            results = vectorstore.similarity_search_with_score_by_vector(embedding, k=k)
+        return self._collapse_results(results)
+
+    def _collapse_results(self, results):
+        scores = {}
+        for doc, score in results:
+            scores.setdefault(doc.page_content, float(score))
+        documents = collapse_duplicates([doc for doc, _ in results])
+        results = [(doc, scores[doc.page_content]) for doc in documents]
+        record_hits(results)
+        return results
+
+
+def load_query_pipeline(github_url):
+    """Creates and sets up a QueryPipeline (used as an IndexCache loader)."""
+    pipeline = QueryPipeline(github_url)
+    pipeline.setup()
+    return pipeline
+
+
+def query_pipeline_size(pipeline):
+    """Estimated memory held by a set-up QueryPipeline (used as an IndexCache sizer)."""
+    return pipeline.vectorstore_manager.estimate_memory(pipeline.vectorstore)
 
-    def ask(self, query_text):
-        """Asks a question and returns the response."""
-        if not self.qa_chain:
-            raise ValueError("QA chain is not set up. Call setup() first.")
 
-        response = self.qa_chain.invoke(query_text)
-        return response
+def query_pipeline_version(pipeline):
+    """The index generation a QueryPipeline has loaded (used as an IndexCache version)."""
+    return pipeline.generation
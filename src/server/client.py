@@ -0,0 +1,90 @@
+# src/server/client.py
+import requests
+from config.settings import QUERY_SERVER_URL
+
+
+class RemoteDocument:
+    """Minimal stand-in for a LangChain Document returned by the query server."""
+
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class QueryClient:
+    """Thin HTTP client for the query server."""
+
+    def __init__(self, base_url=QUERY_SERVER_URL, timeout=300):
+        if not base_url:
+            raise ValueError("No query server URL configured.")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        response = requests.request(
+            method, f"{self.base_url}{path}", json=payload, timeout=self.timeout
+        )
+        data = response.json()
+        if response.status_code == 404:
+            raise FileNotFoundError(data.get("error"))
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"Query server error {response.status_code}: {data.get('error')}"
+            )
+        return data
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def metrics(self):
+        return self._request("GET", "/metrics")
+
+    def load(self, repo, reload=False):
+        return self._request("POST", "/load", {"repo": repo, "reload": reload})
+
+    def ask(self, repo, query_text):
+        data = self._request("POST", "/ask", {"repo": repo, "query": query_text})
+        return {
+            "result": data["result"],
+            "source_documents": [
+                RemoteDocument(d["page_content"], d["metadata"])
+                for d in data["source_documents"]
+            ],
+            "stats": data.get("stats", {}),
+            "trace": data.get("trace"),
+        }
+
+    def search(self, repo, query_text, k=5):
+        payload = {"repo": repo, "query": query_text, "k": k}
+        data = self._request("POST", "/search", payload)
+        return [
+            (RemoteDocument(d["page_content"], d["metadata"]), d["score"])
+            for d in data["results"]
+        ]
+
+
+class RemoteQueryPipeline:
+    """QueryPipeline look-alike that forwards to a running query server."""
+
+    def __init__(self, github_url, base_url=QUERY_SERVER_URL, reload=False):
+        self.github_url = github_url
+        self.repo_name = github_url.split("/")[-1]
+        self.client = QueryClient(base_url)
+        self.reload = reload
+
+    def setup(self):
+        """Makes the server load (or reload) the repository's index."""
+        self.client.load(self.repo_name, reload=self.reload)
+        print("Connected to query server.")
+
+    def refresh(self, wait=False):
+        """The server switches generations on its own; `wait` makes it do so now."""
+        if wait:
+            self.client.load(self.repo_name, reload=True)
+        return wait
+
+    def ask(self, query_text):
+        return self.client.ask(self.repo_name, query_text)
+
+    def search(self, query_text, k=5):
+        return self.client.search(self.repo_name, query_text, k=k)
@@ -0,0 +1,183 @@
+# src/server/query_server.py
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from src.pipeline.querying import (
+    load_query_pipeline,
+    query_pipeline_size,
+    query_pipeline_version,
+)
+from src.utils.index_cache import IndexCache
+from config.settings import (
+    QUERY_SERVER_HOST,
+    QUERY_SERVER_PORT,
+    QUERY_SERVER_WORKERS,
+    INDEX_CACHE_MAX_BYTES,
+)
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+}
+
+
+def document_to_dict(doc, score=None):
+    """Serializes a retrieved document for a JSON response."""
+    payload = {"page_content": doc.page_content, "metadata": doc.metadata}
+    if score is not None:
+        payload["score"] = score
+    return payload
+
+
+class QueryServer:
+    """
+    Long-running asyncio HTTP server answering `ask` and `search` requests for
+    many repositories. Loaded pipelines are shared by all clients through an
+    LRU with a memory budget, and blocking work runs on a thread pool so
+    requests are served concurrently.
+
+    Routes (JSON bodies):
+      GET  /health
+      GET  /metrics
+      POST /load    {"repo": ..., "reload": false}
+      POST /ask     {"repo": ..., "query": ...}
+      POST /search  {"repo": ..., "query": ..., "k": 5}
+    """
+
+    def __init__(
+        self,
+        host=QUERY_SERVER_HOST,
+        port=QUERY_SERVER_PORT,
+        max_bytes=INDEX_CACHE_MAX_BYTES,
+        workers=QUERY_SERVER_WORKERS,
+    ):
+        self.host = host
+        self.port = port
+        self.index_cache = IndexCache(
+            load_query_pipeline,
+            query_pipeline_size,
+            max_bytes,
+            version=query_pipeline_version,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.started_at = time.time()
+        self.requests = {}  # route -> {"count", "errors", "total_ms"}
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("POST", "/load"): self.handle_load,
+            ("POST", "/ask"): self.handle_ask,
+            ("POST", "/search"): self.handle_search,
+        }
+
+    # --- Handlers (run on the thread pool) ---
+    def handle_health(self, body):
+        return {"status": "ok", "uptime_s": round(time.time() - self.started_at, 1)}
+
+    def handle_metrics(self, body):
+        return {"requests": self.requests, "index_cache": self.index_cache.stats()}
+
+    def handle_load(self, body):
+        repo = body["repo"]
+        pipeline = self.index_cache.get(repo)
+        if body.get("reload"):
+            # Swap in the newest index generation; other queries keep running
+            pipeline.refresh(wait=True)
+        return {"repo": repo, "loaded": True, "generation": pipeline.generation}
+
+    def handle_ask(self, body):
+        pipeline = self.index_cache.get(body["repo"])
+        response = pipeline.ask(body["query"])
+        return {
+            "result": response["result"],
+            "source_documents": [
+                document_to_dict(doc) for doc in response["source_documents"]
+            ],
+            "stats": response.get("stats", {}),
+            "trace": response.get("trace"),
+        }
+
+    def handle_search(self, body):
+        pipeline = self.index_cache.get(body["repo"])
+        results = pipeline.search(body["query"], k=int(body.get("k", 5)))
+        return {"results": [document_to_dict(doc, score) for doc, score in results]}
+
+    # --- HTTP plumbing ---
+    async def dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            return 404, {"error": f"No route for {method} {path}"}
+
+        metrics = self.requests.setdefault(
+            path, {"count": 0, "errors": 0, "total_ms": 0.0}
+        )
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            return 200, await loop.run_in_executor(self.executor, handler, body)
+        except FileNotFoundError as e:
+            metrics["errors"] += 1
+            return 404, {"error": str(e)}
+        except (KeyError, ValueError) as e:
+            metrics["errors"] += 1
+            return 400, {"error": f"Bad request: {e}"}
+        except Exception as e:
+            metrics["errors"] += 1
+            return 500, {"error": str(e)}
+        finally:
+            metrics["count"] += 1
+            metrics["total_ms"] += (time.perf_counter() - start) * 1000
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            if not isinstance(body, dict):
+                raise ValueError("the body must be a JSON object")
+            status, payload = await self.dispatch(method, path.split("?")[0], body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": f"Malformed request: {e}"}
+
+        data = json.dumps(payload, default=str).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        print(f"🛰️ Query server listening on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(**kwargs):
+    """Starts a QueryServer and blocks until it is interrupted."""
+    try:
+        asyncio.run(QueryServer(**kwargs).serve_forever())
+    except KeyboardInterrupt:
+        print("Query server stopped.")
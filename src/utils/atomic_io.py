@@ -0,0 +1,62 @@
+# src/utils/atomic_io.py
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+
+
+def fsync_dir(path):
+    """Makes renames and new entries in a directory durable (no-op where unsupported)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    Opens a file for writing `path` so readers only ever see the old or the
+    new content: the data goes to a temp file in the same directory, is
+    synced to disk, then renamed over `path` when the block exits cleanly.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_dir(directory)
+
+
+def atomic_write_text(path, text):
+    with atomic_open(path) as f:
+        f.write(text)
+
+
+def atomic_write_json(path, data, indent=2):
+    # Streamed to the file, never built as one string
+    with atomic_open(path) as f:
+        json.dump(data, f, indent=indent)
+
+
+def fsync_tree(path):
+    """Syncs every file under a directory written by a third-party saver."""
+    for root, _, files in os.walk(path):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as f:
+                os.fsync(f.fileno())
+        fsync_dir(root)
+
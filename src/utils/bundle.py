@@ -0,0 +1,160 @@
+# src/utils/bundle.py
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+from src.utils.generations import repo_generations, GENERATION_FILE
+from src.utils.cache_manager import load_cache, calculate_file_hash, COMMIT_KEY
+from config.settings import (
+    REPOS_DIR,
+    EMBEDDING_MODEL,
+    ENRICH_MODEL,
+    CHUNK_MAX_TOKENS,
+    CHUNK_MIN_TOKENS,
+    CHUNK_TARGET_TOKENS,
+    DEDUP_ENABLED,
+    DEDUP_THRESHOLD,
+    DEDUP_NUM_PERM,
+    DEDUP_BANDS,
+)
+
+BUNDLE_FORMAT = 1
+BUNDLE_SUFFIX = ".bundle.tar.gz"
+MANIFEST_FILE = "manifest.json"
+GENERATION_DIR = "generation"  # the generation's files, inside the bundle
+
+
+def index_fingerprint():
+    """
+    The settings an index's contents depend on: its vectors, enrichment,
+    chunk boundaries and the paths stored in its chunks and cache.
+    """
+    return {
+        "format": BUNDLE_FORMAT,
+        "embedding_model": EMBEDDING_MODEL,
+        "enrich_model": ENRICH_MODEL,
+        "repos_dir": REPOS_DIR,
+        "chunk_tokens": [CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, CHUNK_TARGET_TOKENS],
+        "dedup": [DEDUP_ENABLED, DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS],
+    }
+
+
+def _member_path(name):
+    """A bundled file's path in the generation, or None if it lies outside."""
+    if not name.startswith(GENERATION_DIR + "/"):
+        return None
+    path = name[len(GENERATION_DIR) + 1 :]
+    parts = path.split("/")
+    if not path or path.startswith("/") or any(p in ("", ".", "..") for p in parts):
+        return None
+    return path
+
+
+def export_bundle(repo_name, output_path=None):
+    """
+    Packages the current index generation of a repository (vectors, chunks,
+    file hash cache and everything else it holds) with a manifest of its
+    commit, index fingerprint and file checksums into one compressed file.
+    Returns the manifest.
+    """
+    store = repo_generations(repo_name)
+    generation_path = store.current_path()
+    if generation_path is None:
+        raise FileNotFoundError(f"No index of '{repo_name}' to export.")
+
+    files = {}
+    for root, _, names in os.walk(generation_path):
+        for name in names:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, generation_path).replace(os.sep, "/")
+            if rel_path == GENERATION_FILE:
+                continue  # the importing store writes its own on commit
+            files[rel_path] = calculate_file_hash(path)
+    manifest = {
+        "repo": repo_name,
+        "generation": store.current(),
+        "commit": load_cache(repo_name).get(COMMIT_KEY),
+        "created": time.time(),
+        "fingerprint": index_fingerprint(),
+        "files": files,
+    }
+
+    output_path = output_path or f"{repo_name}{BUNDLE_SUFFIX}"
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with tarfile.open(tmp_path, "w:gz") as tar:
+            data = json.dumps(manifest, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_FILE)
+            info.size, info.mtime = len(data), int(manifest["created"])
+            tar.addfile(info, io.BytesIO(data))
+            for rel_path in sorted(files):
+                tar.add(
+                    os.path.join(generation_path, rel_path),
+                    arcname=f"{GENERATION_DIR}/{rel_path}",
+                    recursive=False,
+                )
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return manifest
+
+
+def import_bundle(bundle_path, force=False):
+    """
+    Installs a bundle as the current index generation of its repository,
+    after checking its fingerprint against the local settings (skipped
+    with `force`) and every file against its checksum. The next indexing
+    run then only processes the files changed since the bundle's commit.
+    Returns the manifest and the name of the new generation.
+    """
+    with tarfile.open(bundle_path, "r:gz") as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST_FILE:
+            raise ValueError(f"{bundle_path} is not an index bundle.")
+        manifest = json.load(tar.extractfile(member))
+
+        fingerprint = manifest.get("fingerprint", {})
+        mismatched = sorted(
+            key for key, value in index_fingerprint().items() if fingerprint.get(key) != value
+        )
+        if mismatched and not force:
+            raise ValueError(
+                "The bundle was built with other settings "
+                f"({', '.join(mismatched)}); use --force to import it anyway."
+            )
+        repo_name = manifest["repo"]
+        if not repo_name or "/" in repo_name or repo_name in (".", ".."):
+            raise ValueError(f"Invalid repository name in bundle: {repo_name!r}")
+
+        store = repo_generations(repo_name)
+        staging_path = store.stage()
+        try:
+            extracted = set()
+            for member in tar:
+                if member.isdir() or member.name == MANIFEST_FILE:
+                    continue
+                rel_path = _member_path(member.name)
+                if not member.isfile() or rel_path not in manifest["files"]:
+                    raise ValueError(f"Unexpected entry in bundle: {member.name}")
+                target = os.path.join(staging_path, *rel_path.split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                sha256 = hashlib.sha256()
+                with tar.extractfile(member) as src, open(target, "wb") as dst:
+                    while block := src.read(1024 * 1024):
+                        sha256.update(block)
+                        dst.write(block)
+                if sha256.hexdigest() != manifest["files"][rel_path]:
+                    raise ValueError(f"Checksum mismatch for {rel_path} in bundle.")
+                extracted.add(rel_path)
+            missing = set(manifest["files"]) - extracted
+            if missing:
+                raise ValueError(f"Bundle is missing {len(missing)} files, e.g. {min(missing)}.")
+        except BaseException:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+    return manifest, store.commit(staging_path)
@@ -2,28 +2,42 @@
 import os
 import json
 import hashlib
+from src.utils.atomic_io import atomic_write_json
+from src.utils.generations import repo_generations
+
+# Cache entry holding the files skipped by the file classifier
+SKIPPED_KEY = "__skipped__"
+# Cache entry holding the commit the index was built from
+COMMIT_KEY = "__commit__"
+# Cache entry holding the file classifier settings the skip decisions were made with
+CLASSIFIER_KEY = "__classifier__"
+# Name of the cache inside an index generation
+CACHE_FILE = "cache.json"
 
 
 def get_cache_path(repo_name):
-    """Generates the file path for the cache."""
+    """Generates the file path for the cache used before index generations."""
     return f"data/{repo_name}_cache.json"
 
 
 def load_cache(repo_name):
-    """Loads the file hash cache from disk."""
-    cache_path = get_cache_path(repo_name)
+    """Loads the file hash cache of the current index generation."""
+    cache_path = repo_generations(repo_name).current_file(CACHE_FILE)
+    if cache_path is None:
+        cache_path = get_cache_path(repo_name)
     if os.path.exists(cache_path):
         with open(cache_path, "r") as f:
             return json.load(f)
     return {}
 
 
-def save_cache(repo_name, cache_data):
-    """Saves the file hash cache to disk."""
-    cache_path = get_cache_path(repo_name)
-    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-    with open(cache_path, "w") as f:
-        json.dump(cache_data, f, indent=2)
+def save_cache(repo_name, cache_data, generation_path=None):
+    """Saves the file hash cache into a staged index generation."""
+    if generation_path is None:
+        cache_path = get_cache_path(repo_name)
+    else:
+        cache_path = os.path.join(generation_path, CACHE_FILE)
+    atomic_write_json(cache_path, cache_data)
 
 
 def calculate_file_hash(file_path):
@@ -0,0 +1,98 @@
+# src/utils/checkpoint.py
+import os
+import json
+import base64
+import numpy as np
+
+
+def encode_vector(vector):
+    """Packs an embedding as base64 float32 (about 5x smaller than a JSON list)."""
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(data):
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).tolist()
+
+
+class IndexCheckpoint:
+    """
+    Append-only JSONL log of the files an indexing run has finished: their
+    content hash and enriched chunks, then the chunk embeddings once they
+    are computed. Each record is synced to disk as it is written, so an
+    interrupted run can resume from the files that were already done. A
+    torn last line is ignored on load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def load(self, file_hashes):
+        """Returns {file_path: record} for the files whose content hash still matches."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partially written line from a crash
+                file_path = record.get("file_path")
+                if file_hashes.get(file_path) != record.get("file_hash"):
+                    continue
+                if "chunks" in record:
+                    records[file_path] = record
+                elif file_path in records:
+                    records[file_path]["embeddings"].update(record["embeddings"])
+        return records
+
+    def append(self, file_path, file_hash, chunks, embeddings, symbols=None):
+        """
+        Durably records a finished file; `embeddings` maps chunk_id to vector,
+        `symbols` are the file's code graph symbols.
+        """
+        self._write(
+            {
+                "file_path": file_path,
+                "file_hash": file_hash,
+                "chunks": chunks,
+                "embeddings": {
+                    chunk_id: encode_vector(vector)
+                    for chunk_id, vector in embeddings.items()
+                },
+                "symbols": symbols,
+            }
+        )
+
+    def append_vectors(self, file_path, file_hash, embeddings):
+        """Durably adds embeddings to a file recorded earlier."""
+        self._write(
+            {
+                "file_path": file_path,
+                "file_hash": file_hash,
+                "embeddings": {
+                    chunk_id: encode_vector(vector)
+                    for chunk_id, vector in embeddings.items()
+                },
+            }
+        )
+
+    def _write(self, record):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        """Deletes the checkpoint once the run's results are saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
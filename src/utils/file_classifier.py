@@ -0,0 +1,93 @@
+# src/utils/file_classifier.py
+import os
+import re
+import json
+import hashlib
+from config.settings import (
+    SKIP_REASONS,
+    BINARY_EXTENSIONS,
+    MAX_FILE_BYTES,
+    MAX_TEXT_FILE_BYTES,
+    SNIFF_BYTES,
+    MINIFIED_MAX_LINE_LENGTH,
+    MINIFIED_AVG_LINE_LENGTH,
+    GENERATED_MARKERS,
+    VENDORED_PATHS,
+)
+
+VENDORED_PATTERN = re.compile("|".join(VENDORED_PATHS))
+TEXT_EXTENSIONS = (".txt", ".md")
+
+
+def classifier_fingerprint():
+    """
+    A hash of the settings that decide which files are skipped. Files whose
+    classification was cached under another fingerprint are classified again.
+    """
+    settings = [
+        SKIP_REASONS,
+        BINARY_EXTENSIONS,
+        MAX_FILE_BYTES,
+        MAX_TEXT_FILE_BYTES,
+        SNIFF_BYTES,
+        MINIFIED_MAX_LINE_LENGTH,
+        MINIFIED_AVG_LINE_LENGTH,
+        GENERATED_MARKERS,
+        VENDORED_PATHS,
+    ]
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()
+
+
+def classify_by_path(rel_path, size):
+    """
+    Cheap checks that need only the path and size: vendored paths, binary
+    extensions and size limits. Returns a skip reason or None.
+    """
+    rel_path = rel_path.replace(os.sep, "/")
+    lower_path = rel_path.lower()
+    if "vendored" in SKIP_REASONS and VENDORED_PATTERN.search(rel_path):
+        return "vendored"
+    if "binary" in SKIP_REASONS and lower_path.endswith(BINARY_EXTENSIONS):
+        return "binary"
+    if "oversized" in SKIP_REASONS:
+        limit = MAX_TEXT_FILE_BYTES if lower_path.endswith(TEXT_EXTENSIONS) else MAX_FILE_BYTES
+        if size > limit:
+            return "oversized"
+    return None
+
+
+def classify_by_content(file_path):
+    """
+    Sniffs the head of a file for null bytes, generated-file markers and
+    minified lines. Returns a skip reason or None.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+
+    if "binary" in SKIP_REASONS and b"\0" in head:
+        return "binary"
+
+    text = head.decode("utf-8", errors="ignore")
+    if "generated" in SKIP_REASONS:
+        header = "\n".join(text.splitlines()[:10])
+        if any(marker in header for marker in GENERATED_MARKERS):
+            return "generated"
+
+    if "minified" in SKIP_REASONS and not file_path.lower().endswith(TEXT_EXTENSIONS):
+        lines = [line for line in text.splitlines() if line.strip()]
+        if lines:
+            longest = max(len(line) for line in lines)
+            average = sum(len(line) for line in lines) / len(lines)
+            if longest > MINIFIED_MAX_LINE_LENGTH or average > MINIFIED_AVG_LINE_LENGTH:
+                return "minified"
+    return None
+
+
+def classify_file(file_path, rel_path, size=None):
+    """Returns why a file should be skipped ('binary', 'oversized', ...), or None to index it."""
+    if size is None:
+        size = os.path.getsize(file_path)
+    return classify_by_path(rel_path, size) or classify_by_content(file_path)
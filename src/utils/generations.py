@@ -0,0 +1,134 @@
+# src/utils/generations.py
+import os
+import re
+import json
+import time
+import shutil
+from src.utils.atomic_io import atomic_write_text, atomic_write_json, fsync_dir, fsync_tree
+from config.settings import VECTORSTORE_PATH, GENERATIONS_RETAINED, GENERATION_MIN_AGE
+
+CURRENT_FILE = "CURRENT"
+GENERATION_FILE = "generation.json"  # the generation's manifest: when it was committed
+GENERATION_PATTERN = re.compile(r"^gen-(\d+)$")
+STAGING_PATTERN = re.compile(r"^\.gen-(\d+)\.\d+\.tmp$")
+
+
+class GenerationStore:
+    """
+    Immutable index generations under one directory:
+
+        <root>/gen-000001/   complete, never modified once committed, with a
+                             manifest (generation.json) of its commit time
+        <root>/gen-000002/
+        <root>/CURRENT       name of the generation readers should use
+
+    A writer fills a staging directory, renames it into a new generation and
+    then atomically rewrites CURRENT, so readers see either the old or the new
+    generation in full.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def current(self):
+        """Name of the current generation, or None if none was committed."""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), "r", encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if GENERATION_PATTERN.match(name) else None
+
+    def current_path(self):
+        name = self.current()
+        return os.path.join(self.root, name) if name else None
+
+    def current_file(self, filename):
+        """Path of a file in the current generation, or None if it isn't there."""
+        path = self.current_path()
+        if path and os.path.exists(os.path.join(path, filename)):
+            return os.path.join(path, filename)
+        return None
+
+    def generations(self):
+        """Committed generation names, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if GENERATION_PATTERN.match(name))
+
+    def _next_number(self):
+        numbers = [0]
+        for name in os.listdir(self.root):
+            match = GENERATION_PATTERN.match(name) or STAGING_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return max(numbers) + 1
+
+    def stage(self):
+        """Creates and returns an empty staging directory for the next generation."""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f".gen-{self._next_number():06d}.{os.getpid()}.tmp")
+        os.makedirs(path)
+        return path
+
+    def commit(self, staging_path):
+        """Turns a filled staging directory into the current generation; returns its name."""
+        atomic_write_json(
+            os.path.join(staging_path, GENERATION_FILE), {"created": time.time()}
+        )
+        fsync_tree(staging_path)
+        number = int(STAGING_PATTERN.match(os.path.basename(staging_path)).group(1))
+        while os.path.exists(os.path.join(self.root, f"gen-{number:06d}")):
+            number += 1  # another writer committed this number first
+        name = f"gen-{number:06d}"
+        os.replace(staging_path, os.path.join(self.root, name))
+        fsync_dir(self.root)
+        atomic_write_text(os.path.join(self.root, CURRENT_FILE), name)
+        return name
+
+    def created(self, name):
+        """
+        When a generation was committed, from its manifest. Directory mtimes
+        are no substitute: writing or hard-linking files into it changes them.
+        Generations committed before manifests fall back to the mtime.
+        """
+        path = os.path.join(self.root, name)
+        try:
+            with open(os.path.join(path, GENERATION_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)["created"]
+        except (OSError, ValueError, KeyError):
+            return os.stat(path).st_mtime
+
+    def collect_garbage(self, retained=GENERATIONS_RETAINED, min_age=GENERATION_MIN_AGE):
+        """
+        Deletes generations older than the current one beyond the newest
+        `retained`, plus abandoned staging directories, but only once they
+        are `min_age` seconds old so readers still loading them can finish.
+        A generation's age counts from when the next one was committed, the
+        last moment readers could start loading it. Returns the names that
+        were deleted.
+        """
+        current = self.current()
+        if current is None:
+            return []
+        generations = self.generations()
+        older = [name for name in generations if name < current]
+        ages = {}  # name -> time it stopped being current
+        for name in older[: max(0, len(older) - retained)]:
+            ages[name] = self.created(generations[generations.index(name) + 1])
+        for name in os.listdir(self.root):
+            if STAGING_PATTERN.match(name):
+                ages[name] = os.stat(os.path.join(self.root, name)).st_mtime
+
+        deleted = []
+        now = time.time()
+        for name, since in ages.items():
+            if now - since >= min_age:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                deleted.append(name)
+        return deleted
+
+
+def repo_generations(repo_name, db_path=VECTORSTORE_PATH):
+    """The generation store holding a repository's index."""
+    return GenerationStore(os.path.join(db_path, f"{repo_name}_vectorstore"))
@@ -2,10 +2,45 @@ from pathlib import Path
 import pathspec
 
 
-def load_gitignore(repo_path):
-    gitignore_file = Path(repo_path) / ".gitignore"
-    if gitignore_file.exists():
-        with open(gitignore_file, "r", encoding="utf-8") as f:
+def load_ignore_file(ignore_file):
+    """Loads a .gitignore-style file into a PathSpec, or returns None if it doesn't exist."""
+    ignore_file = Path(ignore_file)
+    if ignore_file.is_file():
+        with open(ignore_file, "r", encoding="utf-8", errors="ignore") as f:
             spec = pathspec.PathSpec.from_lines("gitwildmatch", f)
         return spec
     return None
+
+
+def load_gitignore(repo_path):
+    return load_ignore_file(Path(repo_path) / ".gitignore")
+
+
+class IgnoreRules:
+    """
+    Stack of ignore specs following git precedence: .git/info/exclude at the
+    bottom, then the root .gitignore, then nested .gitignore files, where the
+    deepest file with a matching pattern decides.
+    """
+
+    def __init__(self, repo_path):
+        self.specs = []  # [(base directory relative to the repo, spec)]
+        exclude = load_ignore_file(Path(repo_path) / ".git" / "info" / "exclude")
+        if exclude:
+            self.specs.append(("", exclude))
+
+    def push(self, rel_dir, spec):
+        self.specs.append((rel_dir, spec))
+
+    def pop_to(self, depth):
+        """Drops the specs of directories the walk has left."""
+        del self.specs[depth:]
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Checks a repo-relative posix path against the applicable specs."""
+        for base, spec in reversed(self.specs):
+            path = rel_path[len(base) + 1 :] if base else rel_path
+            result = spec.check_file(path + "/" if is_dir else path)
+            if result.include is not None:
+                return result.include
+        return False
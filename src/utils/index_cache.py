@@ -0,0 +1,97 @@
+# src/utils/index_cache.py
+import threading
+from collections import OrderedDict
+from config.settings import INDEX_CACHE_MAX_BYTES
+
+
+class IndexCache:
+    """
+    Thread-safe LRU of loaded indexes (typically set-up QueryPipelines) with a
+    memory budget. `loader(key)` loads a missing entry and `sizer(value)`
+    estimates its size in bytes; the least recently used entries are evicted
+    once the budget is exceeded, always keeping the most recent one. Entries
+    that change in place (an index swapping in a new generation) are sized
+    again when `version(value)` changes.
+    """
+
+    def __init__(self, loader, sizer, max_bytes=INDEX_CACHE_MAX_BYTES, version=None):
+        self.loader = loader
+        self.sizer = sizer
+        self.version = version or (lambda value: None)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size, version)
+        self.lock = threading.Lock()
+        self.load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the entry for `key`, loading it on a miss."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                load_lock = self.load_locks.setdefault(key, threading.Lock())
+        if entry is not None:
+            value, _, version = entry
+            if self.version(value) != version:
+                self._resize(key, value)
+            return value
+
+        # Loads happen outside the cache lock so other keys stay available,
+        # and a per-key lock makes concurrent misses load only once
+        with load_lock:
+            try:
+                with self.lock:
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+                        self.hits += 1
+                        return self.entries[key][0]
+                value = self.loader(key)
+                size = self.sizer(value)
+                with self.lock:
+                    self.misses += 1
+                    self.entries[key] = (value, size, self.version(value))
+                    self._evict()
+                return value
+            finally:
+                # Waiting misses hold the lock already; later ones find the entry
+                with self.lock:
+                    if self.load_locks.get(key) is load_lock:
+                        del self.load_locks[key]
+
+    def _resize(self, key, value):
+        """Sizes an entry that changed in place again, evicting others if it grew."""
+        version = self.version(value)
+        size = self.sizer(value)  # outside the lock, like loads
+        with self.lock:
+            if key in self.entries and self.entries[key][0] is value:
+                self.entries[key] = (value, size, version)
+                self._evict()
+
+    def invalidate(self, key):
+        """Drops `key` so that the next `get` reloads it."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def _evict(self):
+        while len(self.entries) > 1 and self.total_bytes() > self.max_bytes:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": list(self.entries.keys()),
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
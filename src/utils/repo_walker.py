@@ -0,0 +1,77 @@
+# src/utils/repo_walker.py
+import os
+from src.utils.gitignore_loader import IgnoreRules, load_ignore_file
+from config.settings import REPOS_DIR
+
+
+def repo_relative_path(file_path, repo_name):
+    """A file's posix path relative to its repository checkout (unchanged if outside it)."""
+    file_path = file_path.replace("\\", "/")
+    prefix = os.path.join(REPOS_DIR, repo_name or "").replace("\\", "/") + "/"
+    index = file_path.find(prefix)
+    if index != -1 and (index == 0 or file_path[index - 1] == "/"):
+        return file_path[index + len(prefix) :]
+    return file_path
+
+
+class RepositoryWalker:
+    """
+    Walks a repository once with os.scandir, yielding the files to index and
+    collecting the directory tree listing on the way. Honors .git/info/exclude,
+    the root .gitignore and nested .gitignore files, and never descends into
+    ignored directories.
+    """
+
+    def __init__(self, repo_path):
+        self.repo_path = repo_path
+        self.tree_lines = []
+        self.rules = IgnoreRules(repo_path)
+
+    @property
+    def tree(self):
+        """The directory tree listing of everything walked so far."""
+        return "\n".join(self.tree_lines)
+
+    def walk(self):
+        """Yields (file_path, rel_path, stat) for every file that is not ignored."""
+        self.tree_lines = []
+        yield from self._walk_dir(self.repo_path, "", 0)
+
+    def _walk_dir(self, dir_path, rel_dir, level):
+        depth = len(self.rules.specs)
+        spec = load_ignore_file(os.path.join(dir_path, ".gitignore"))
+        if spec:
+            self.rules.push(rel_dir, spec)
+
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            entries = []
+
+        self.tree_lines.append(f"{' ' * 4 * level}{os.path.basename(dir_path)}/")
+        sub_indent = " " * 4 * (level + 1)
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                # scandir already knows the entry type, so this costs no stat call
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git" and not self.rules.is_ignored(
+                        rel_path, is_dir=True
+                    ):
+                        subdirs.append((entry.path, rel_path))
+                    continue
+                if not entry.is_file() or self.rules.is_ignored(rel_path):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            self.tree_lines.append(f"{sub_indent}{entry.name}")
+            yield entry.path, rel_path, stat
+
+        for subdir_path, rel_path in subdirs:
+            yield from self._walk_dir(subdir_path, rel_path, level + 1)
+
+        self.rules.pop_to(depth)
@@ -0,0 +1,84 @@
+# src/utils/retry_queue.py
+import os
+import json
+import time
+from collections import Counter
+from src.utils.atomic_io import atomic_write_json
+from config.settings import (
+    ENRICH_MAX_ATTEMPTS,
+    ENRICH_RETRY_BACKOFF,
+    ENRICH_RETRY_MAX_BACKOFF,
+)
+
+# Name of the retry queue inside an index generation
+RETRY_FILE = "retry.json"
+
+
+class RetryQueue:
+    """
+    Chunks whose enrichment failed, by chunk_id, with their attempt count,
+    last error and time of the last attempt. It is saved in each index
+    generation next to the chunks it refers to. Retries back off
+    exponentially, and stop after ENRICH_MAX_ATTEMPTS unless forced.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path):
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        atomic_write_json(path, self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.entries
+
+    def record_failure(self, chunk, error, now=None):
+        entry = self.entries.setdefault(
+            chunk["chunk_id"], {"file_path": chunk["file_path"], "attempts": 0}
+        )
+        entry["attempts"] += 1
+        entry["last_error"] = error
+        entry["last_attempt"] = time.time() if now is None else now
+
+    def record_success(self, chunk_id):
+        self.entries.pop(chunk_id, None)
+
+    def due_at(self, chunk_id):
+        entry = self.entries[chunk_id]
+        delay = ENRICH_RETRY_BACKOFF * 2 ** (entry["attempts"] - 1)
+        return entry["last_attempt"] + min(delay, ENRICH_RETRY_MAX_BACKOFF)
+
+    def due(self, within=0, force=False, now=None):
+        """
+        Returns [(due time, chunk_id)], soonest first, of the chunks to retry
+        within `within` seconds. `force` returns every chunk, due now.
+        """
+        now = time.time() if now is None else now
+        if force:
+            return [(now, chunk_id) for chunk_id in self.entries]
+        return sorted(
+            (self.due_at(chunk_id), chunk_id)
+            for chunk_id, entry in self.entries.items()
+            if entry["attempts"] < ENRICH_MAX_ATTEMPTS
+            and self.due_at(chunk_id) <= now + within
+        )
+
+    def prune(self, chunks_by_id):
+        """Drops chunks that are gone or now share the enrichment of a copy."""
+        for chunk_id in list(self.entries):
+            chunk = chunks_by_id.get(chunk_id)
+            if chunk is None or chunk.get("duplicate_of"):
+                del self.entries[chunk_id]
+
+    def errors(self):
+        """Queued chunks per last error."""
+        return Counter(entry["last_error"] for entry in self.entries.values())
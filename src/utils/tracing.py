@@ -0,0 +1,161 @@
+# src/utils/tracing.py
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+# The trace of the query being answered, if any; components record spans in it
+_current = contextvars.ContextVar("query_trace", default=None)
+_log_lock = threading.Lock()
+
+
+class QueryTrace:
+    """
+    Timings of the stages of one query, with its token counts and the scores
+    of the hits retrieved. Components record spans with span() while the
+    trace is active, at any call depth; a span recorded several times (once
+    per shard searched, say) adds up, so it may exceed the wall time.
+    """
+
+    def __init__(self, query, repo=None):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.query = query
+        self.repo = repo
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = {}  # name -> {"start_ms", "ms", "count"}, in order of first start
+        self.tokens = {}
+        self.retrieval = []  # [{"id", "file_path", "start_line", "score"}]
+        self.lock = threading.Lock()
+
+    def add(self, name, start, end):
+        """Records a span that ran from `start` to `end` (perf_counter times)."""
+        with self.lock:
+            span = self.spans.setdefault(
+                name, {"start_ms": (start - self.start) * 1000, "ms": 0.0, "count": 0}
+            )
+            span["ms"] += (end - start) * 1000
+            span["count"] += 1
+
+    @contextmanager
+    def activate(self):
+        """Makes this the trace spans are recorded in, for the current context."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "repo": self.repo,
+            "query": self.query,
+            "started_at": self.started_at,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round(span["start_ms"], 3),
+                    "ms": round(span["ms"], 3),
+                    "count": span["count"],
+                }
+                for name, span in self.spans.items()
+            ],
+            "tokens": dict(self.tokens),
+            "retrieval": list(self.retrieval),
+        }
+
+
+@contextmanager
+def span(name):
+    """Times the block into the active trace; does nothing without one."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+def record_hits(results):
+    """Adds the ids, locations and scores of [(document, score)] to the active trace."""
+    trace = _current.get()
+    if trace is None:
+        return
+    for doc, score in results:
+        metadata = doc.metadata
+        trace.retrieval.append(
+            {
+                "id": metadata.get("chunk_id") or metadata.get("node_id"),
+                "file_path": metadata.get("file_path"),
+                "start_line": metadata.get("start_line"),
+                "score": float(score),
+            }
+        )
+
+
+class LLMTimer(BaseCallbackHandler):
+    """
+    Splits an LLM call into time to first token and generation time, and
+    records the prompt and completion token counts Ollama reports.
+    """
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.started = None
+        self.first_token = None
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.started = time.perf_counter()
+
+    def on_llm_new_token(self, token, **kwargs):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+            self.trace.add("llm_first_token", self.started, self.first_token)
+
+    def on_llm_end(self, response, **kwargs):
+        ended = time.perf_counter()
+        if self.first_token is None:
+            self.trace.add("llm", self.started, ended)  # no tokens were streamed
+        else:
+            self.trace.add("llm_generation", self.first_token, ended)
+        info = response.generations[0][0].generation_info or {}
+        for key, name in (("prompt_eval_count", "prompt"), ("eval_count", "completion")):
+            if key in info:
+                self.trace.tokens[name] = info[key]
+
+
+def append_trace(record, path):
+    """Appends a finished trace to a JSONL log, one line per query."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record) + "\n"
+    with _log_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def format_trace(record):
+    """A trace as aligned text lines: each span's share of the total, then tokens."""
+    total = record["total_ms"] or 1.0
+    lines = [f"trace {record['trace_id']}: {record['total_ms']:.1f} ms"]
+    for span_record in record["spans"]:
+        count = f" x{span_record['count']}" if span_record["count"] > 1 else ""
+        lines.append(
+            f"  {span_record['name']:<18} {span_record['ms']:>10.1f} ms "
+            f"{span_record['ms'] / total:>6.1%}{count}"
+        )
+    if record["tokens"]:
+        lines.append(
+            "  tokens: " + ", ".join(f"{k} {v}" for k, v in record["tokens"].items())
+        )
+    if record["retrieval"]:
+        scores = ", ".join(f"{hit['score']:.3f}" for hit in record["retrieval"])
+        lines.append(f"  scores: {scores}")
+    return "\n".join(lines)
@@ -0,0 +1,86 @@
+import io
+import os
+import json
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.utils import bundle
+from src.utils.generations import GenerationStore
+
+
+class TestBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.stores = {}
+
+        def repo_generations(repo_name):
+            root = os.path.join(self.tmp.name, "machine", f"{repo_name}_vectorstore")
+            return self.stores.setdefault(repo_name, GenerationStore(root))
+
+        for target, value in (
+            ("repo_generations", repo_generations),
+            ("load_cache", lambda repo_name: {"__commit__": "abc123"}),
+        ):
+            patcher = patch.object(bundle, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        store = repo_generations("repo")
+        staging = store.stage()
+        os.makedirs(os.path.join(staging, "shards", "src"))
+        with open(os.path.join(staging, "chunks.json"), "w") as f:
+            f.write("[]")
+        with open(os.path.join(staging, "shards", "src", "index.faiss"), "wb") as f:
+            f.write(b"\x00vectors")
+        store.commit(staging)
+        self.path = os.path.join(self.tmp.name, "repo.bundle.tar.gz")
+
+    def test_export_and_import(self):
+        manifest = bundle.export_bundle("repo", self.path)
+        self.assertEqual(manifest["commit"], "abc123")
+        self.assertEqual(sorted(manifest["files"]), ["chunks.json", "shards/src/index.faiss"])
+
+        imported, generation = bundle.import_bundle(self.path)
+        self.assertEqual(imported["generation"], "gen-000001")
+        self.assertEqual(generation, "gen-000002")
+        with open(os.path.join(self.stores["repo"].current_path(), "shards/src/index.faiss"), "rb") as f:
+            self.assertEqual(f.read(), b"\x00vectors")
+
+    def test_import_checks_the_fingerprint(self):
+        bundle.export_bundle("repo", self.path)
+        with patch.object(bundle, "EMBEDDING_MODEL", "other-embedder"):
+            with self.assertRaisesRegex(ValueError, "embedding_model"):
+                bundle.import_bundle(self.path)
+            _, generation = bundle.import_bundle(self.path, force=True)
+        self.assertEqual(generation, "gen-000002")
+
+    def write_bundle(self, entries):
+        with tarfile.open(self.path, "w:gz") as tar:
+            for name, data in entries:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+    def test_import_rejects_corrupt_bundles(self):
+        manifest = bundle.export_bundle("repo", self.path)
+        checksum = manifest["files"]["chunks.json"]
+        manifest["files"]["chunks.json"] = "0" * 64
+        self.write_bundle(
+            [(bundle.MANIFEST_FILE, json.dumps(manifest).encode()), ("generation/chunks.json", b"[]")]
+        )
+        with self.assertRaisesRegex(ValueError, "Checksum mismatch"):
+            bundle.import_bundle(self.path)
+
+        manifest["files"] = {"chunks.json": checksum}
+        self.write_bundle(
+            [(bundle.MANIFEST_FILE, json.dumps(manifest).encode()), ("generation/../escape", b"")]
+        )
+        with self.assertRaisesRegex(ValueError, "Unexpected entry"):
+            bundle.import_bundle(self.path)
+        # Failed imports leave no generation or staging directory behind
+        self.assertEqual(sorted(os.listdir(self.stores["repo"].root)), ["CURRENT", "gen-000001"])
+
+if __name__ == "__main__":
+    unittest.main()
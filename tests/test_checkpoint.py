@@ -0,0 +1,52 @@
+import os
+import json
+import tempfile
+import unittest
+from src.utils.checkpoint import IndexCheckpoint, decode_vector
+from src.utils.atomic_io import atomic_write_json
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "repo_checkpoint.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume_skips_changed_files_and_torn_lines(self):
+        checkpoint = IndexCheckpoint(self.path)
+        checkpoint.append("a.py", "hash-a", [{"chunk_id": "a.py-0"}], {"a.py-0": [0.5, 0.25]})
+        checkpoint.append("b.py", "hash-b", [{"chunk_id": "b.py-0"}], {})
+        checkpoint.append("d.py", "hash-d", [{"chunk_id": "d.py-0"}], {})
+        checkpoint.append_vectors("d.py", "hash-d", {"d.py-0": [1.0]})
+        checkpoint.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"file_path": "c.py", "file_ha')  # crash mid-write
+
+        records = IndexCheckpoint(self.path).load(
+            {"a.py": "hash-a", "b.py": "changed", "c.py": "x", "d.py": "hash-d"}
+        )
+
+        self.assertEqual(list(records), ["a.py", "d.py"])
+        self.assertEqual(decode_vector(records["a.py"]["embeddings"]["a.py-0"]), [0.5, 0.25])
+        # Vectors written after the file's chunks are merged into its record
+        self.assertEqual(decode_vector(records["d.py"]["embeddings"]["d.py-0"]), [1.0])
+
+    def test_remove(self):
+        checkpoint = IndexCheckpoint(self.path)
+        checkpoint.append("a.py", "hash-a", [], {})
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(checkpoint.load({"a.py": "hash-a"}), {})
+
+    def test_atomic_writes(self):
+        path = os.path.join(self.tmp.name, "data", "chunks.json")
+        atomic_write_json(path, [1])
+        atomic_write_json(path, [2])
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), [2])
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["chunks.json"])
+
+if __name__ == "__main__":
+    unittest.main()
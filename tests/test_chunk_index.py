@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+from unittest.mock import MagicMock
+from src.components.chunk_index import ChunkIndex
+
+
+class TestChunkIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ChunkIndex(2)
+        self.index.add_embeddings(
+            [("a", [0.0, 0.0]), ("b", [1.0, 0.0]), ("c", [5.0, 5.0])],
+            [{"chunk_id": "a"}, {"chunk_id": "b"}, {"chunk_id": "c"}],
+            ["a", "b", "c"],
+        )
+
+    def _search(self, index, **kwargs):
+        results = index.similarity_search_with_score_by_vector([0.0, 0.0], **kwargs)
+        return [doc.page_content for doc, _ in results]
+
+    def test_delete_tombstones_until_compaction(self):
+        self.assertEqual(self.index.delete(["a", "missing"]), 1)
+        self.assertEqual(self._search(self.index, k=3), ["b", "c"])
+        self.assertEqual(self.index.index.ntotal, 3)
+        self.assertAlmostEqual(self.index.fragmentation, 1 / 3)
+
+        self.assertEqual(self.index.compact(), 1)
+        self.assertEqual(self.index.index.ntotal, 2)
+        self.assertEqual(self.index.fragmentation, 0.0)
+        self.assertEqual(self._search(self.index, k=3), ["b", "c"])
+
+    def test_readding_a_chunk_replaces_it(self):
+        self.index.add_embeddings([("a2", [9.0, 9.0])], [{}], ["a"])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self._search(self.index, k=1), ["b"])
+        self.assertEqual(self.index.docstore.search("a").page_content, "a2")
+
+    def test_search_restricted_to_ids(self):
+        faiss_ids = [self.index.chunk_to_id["c"]]
+        self.assertEqual(self._search(self.index, k=3, faiss_ids=faiss_ids), ["c"])
+
+    def test_save_and_load_roundtrip(self):
+        self.index.delete(["b"])
+        with tempfile.TemporaryDirectory() as path:
+            self.index.save_local(path)
+            loaded = ChunkIndex.load_local(path)
+
+        # Documents are only built when looked up
+        self.assertEqual(loaded.docstore.documents, {})
+        self.assertEqual(self._search(loaded, k=3), ["a", "c"])
+        self.assertEqual(loaded.tombstones, self.index.tombstones)
+        # New ids never reuse the ids of deleted chunks
+        loaded.add_embeddings([("d", [0.5, 0.5])], [{}], ["d"])
+        self.assertEqual(loaded.chunk_to_id["d"], 3)
+
+    def test_docstore_size_matches_its_records(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.index.save_local(path)
+            loaded = ChunkIndex.load_local(path)
+        loaded.docstore.search("a")  # one built Document, two plain records
+
+        expected = sum(
+            len(record["page_content"]) + len(str(record["metadata"]))
+            for record in loaded.docstore.dump().values()
+        )
+        self.assertEqual(loaded.docstore.estimate_bytes(), expected)
+
+    def test_mmap_load_is_read_only(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.index.save_local(path)
+            loaded = ChunkIndex.load_local(path, mmap=True)
+            self.assertEqual(self._search(loaded, k=2), ["a", "b"])
+            if loaded.mmapped:
+                with self.assertRaises(ValueError):
+                    loaded.add_embeddings([("d", [0.5, 0.5])], [{}], ["d"])
+            del loaded
+
+    def test_from_langchain_reuses_vectors(self):
+        legacy = MagicMock()
+        legacy.index = self.index.index
+        legacy.index_to_docstore_id = {0: "a", 2: "c"}
+        legacy.docstore = self.index.docstore
+
+        converted = ChunkIndex.from_langchain(legacy)
+        self.assertEqual(self._search(converted, k=3), ["a", "c"])
+        self.assertEqual(sorted(converted.chunk_to_id), ["a", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
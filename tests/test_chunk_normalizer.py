@@ -0,0 +1,74 @@
+import unittest
+from src.components.chunk_normalizer import (
+    estimate_tokens,
+    split_chunk,
+    pack_chunks,
+    normalize_chunks,
+    chunk_stats,
+)
+
+
+class TestChunkNormalizer(unittest.TestCase):
+    def test_split_oversized_chunk_keeps_line_ranges(self):
+        methods = [f"    def m{i}(self):\n        return {i}\n" for i in range(40)]
+        content = ("class Big:\n" + "\n".join(methods)).rstrip("\n")
+        chunk = {
+            "type": "class",
+            "content": content,
+            "start_line": 10,
+            "end_line": 10 + content.count("\n"),
+        }
+
+        parts = split_chunk(chunk, max_tokens=60)
+
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(parts[0]["start_line"], 10)
+        self.assertEqual(parts[-1]["end_line"], chunk["end_line"])
+        for previous, part in zip(parts, parts[1:]):
+            self.assertEqual(part["start_line"], previous["end_line"] + 1)
+        # Every later part starts on a method boundary, not mid-body
+        for part in parts[1:]:
+            self.assertTrue(part["content"].lstrip().startswith("def m"))
+        self.assertEqual("\n".join(p["content"] for p in parts), content)
+
+    def test_split_keeps_class_skeleton_whole(self):
+        signatures = [f"    def m{i}(self): ..." for i in range(40)]
+        content = "class Big:\n" + "\n".join(signatures)
+        # The skeleton leaves out the method bodies the class spans
+        chunk = {"type": "class", "content": content, "start_line": 10, "end_line": 130}
+
+        self.assertEqual(split_chunk(chunk, max_tokens=60), [chunk])
+
+    def test_pack_tiny_adjacent_chunks(self):
+        chunks = [
+            {"type": "import", "content": "import os", "start_line": 1, "end_line": 1},
+            {"type": "import", "content": "import re", "start_line": 2, "end_line": 2},
+            {"type": "other", "content": "X = 1", "start_line": 3, "end_line": 3},
+            {"type": "function", "content": "def f():\n" + "    pass\n" * 80, "start_line": 5, "end_line": 85},
+        ]
+
+        packed = pack_chunks(chunks, min_tokens=20, target_tokens=100)
+
+        self.assertEqual(len(packed), 2)
+        self.assertEqual(packed[0]["content"], "import os\nimport re\nX = 1")
+        self.assertEqual((packed[0]["start_line"], packed[0]["end_line"]), (1, 3))
+        self.assertEqual(packed[0]["type"], "other")
+
+    def test_normalize_reduces_chunk_count(self):
+        chunks = [
+            {"type": "variable", "content": f"const a{i} = {i};", "start_line": i, "end_line": i}
+            for i in range(1, 21)
+        ]
+
+        normalized = normalize_chunks(chunks, max_tokens=200, min_tokens=20, target_tokens=100)
+
+        self.assertLess(len(normalized), len(chunks))
+        self.assertLess(
+            chunk_stats(normalized, prompt_overhead=50)["llm_tokens"],
+            chunk_stats(chunks, prompt_overhead=50)["llm_tokens"],
+        )
+        self.assertEqual(estimate_tokens("abcd"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import pickle
+import unittest
+from src.components.chunk_records import pack_chunks, unpack_chunks, intern_chunk_fields
+
+
+def parsed_chunk(i):
+    return {
+        "repo": "repo",
+        "file_path": "repos/repo/src/a.py",
+        "lang": "python",
+        "chunk_id": f"src/a.py#{i:016x}",
+        "type": "function",
+        "name": f"f{i}",
+        "parent": None,
+        "start_line": i * 3 + 1,
+        "end_line": i * 3 + 2,
+        "content": f"def f{i}():\n    return {i}",
+        "summary": "",
+        "keywords": "",
+    }
+
+
+class TestChunkRecords(unittest.TestCase):
+    def test_pack_roundtrip(self):
+        chunks = [parsed_chunk(i) for i in range(20)]
+        packed = pack_chunks(chunks)
+        self.assertEqual(unpack_chunks(pickle.loads(pickle.dumps(packed))), chunks)
+        self.assertLess(len(pickle.dumps(packed)), len(pickle.dumps(chunks)))
+        self.assertEqual(unpack_chunks(pack_chunks([])), [])
+
+    def test_shared_values_are_interned(self):
+        first = unpack_chunks(pickle.loads(pickle.dumps(pack_chunks([parsed_chunk(0)]))))
+        second = intern_chunk_fields(pickle.loads(pickle.dumps([parsed_chunk(1)])))
+        for field in ("repo", "file_path", "lang", "type"):
+            self.assertIs(first[0][field], second[0][field])
+
+
+if __name__ == "__main__":
+    unittest.main()
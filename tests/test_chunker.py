@@ -1,14 +1,12 @@
 import unittest
 from unittest.mock import patch
-from src.components.chunker import process_and_chunk_file
+from src.components.chunker import parse_and_chunk_file
 
 
 class TestChunker(unittest.TestCase):
 
-    # We now only need to patch 'enrich_chunk'
-    @patch("src.components.chunker.enrich_chunk")
     @patch("src.components.chunker._parse_file")
-    def test_process_and_chunk_file(self, mock_parse, mock_enrich):
+    def test_parse_and_chunk_file(self, mock_parse):
         # 1. Setup the mocks
         # Mock the file parser to return a simple code chunk
         mock_parse.return_value = (
@@ -23,25 +21,34 @@ class TestChunker(unittest.TestCase):
             "python",
         )
 
-        # Mock the enrich_chunk function to return a predefined dictionary
-        mock_enrich.return_value = {
-            "summary": "A test summary",
-            "keywords": "test, keywords",
-        }
-
         # 2. Call the function we are testing
-        chunks = process_and_chunk_file("test.py", "test_repo")
+        chunks = parse_and_chunk_file("test.py", "test_repo")
 
-        # 3. Assert the results
+        # 3. Assert the results: chunks are enriched later, by the pipeline
         self.assertEqual(len(chunks), 1)
         chunk = chunks[0]
         self.assertEqual(chunk["repo"], "test_repo")
-        self.assertEqual(chunk["summary"], "A test summary")
-        self.assertEqual(chunk["keywords"], "test, keywords")
-
-        # Verify that our mocks were called as expected
+        self.assertEqual(chunk["content"], "def hello(): pass")
+        self.assertEqual((chunk["summary"], chunk["keywords"]), ("", ""))
         mock_parse.assert_called_once_with("test.py")
-        mock_enrich.assert_called_once_with("def hello(): pass")
+
+    @patch("src.components.chunker._parse_file")
+    def test_chunk_ids_are_repo_unique_and_content_derived(self, mock_parse):
+        # Long enough not to be packed with its neighbour by the normalizer
+        code = "def helper(value):\n" + "    value = str(value).strip().lower() + '-suffix-for-tests'\n" * 4
+        mock_parse.return_value = ([{"content": code, "start_line": 1, "end_line": 2, "type": "function"}] * 2, "python")
+
+        first = parse_and_chunk_file("repos/demo/pkg/utils.py", "demo")
+        other = parse_and_chunk_file("repos/demo/lib/utils.py", "demo")
+
+        self.assertTrue(first[0]["chunk_id"].startswith("pkg/utils.py#"))
+        self.assertEqual(first[1]["chunk_id"], first[0]["chunk_id"] + "~2")
+        self.assertNotEqual(first[0]["chunk_id"], other[0]["chunk_id"])
+
+        # The id survives the chunk moving within its file
+        mock_parse.return_value = ([{"content": code, "start_line": 10, "end_line": 11, "type": "function"}], "python")
+        moved = parse_and_chunk_file("repos/demo/pkg/utils.py", "demo")
+        self.assertEqual(moved[0]["chunk_id"], first[0]["chunk_id"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+import subprocess
+from unittest.mock import patch
+from typer.testing import CliRunner
+from app.cli import app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCli(unittest.TestCase):
+    def test_heavy_dependencies_are_not_imported_at_startup(self):
+        """
+        Tests that loading the CLI (e.g. for --help) leaves the pipelines and
+        their dependencies to the commands that use them.
+        """
+        heavy = ["src.pipeline.indexing", "src.pipeline.querying", "langchain_ollama", "faiss", "git"]
+        code = f"import sys, app.cli; print([m for m in {heavy!r} if m in sys.modules])"
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    @patch("src.pipeline.querying.QueryPipeline")
+    def test_query_errors_keep_the_session_open(self, mock_pipeline):
+        pipeline = mock_pipeline.return_value
+        pipeline.ask.side_effect = [
+            ValueError("The query is empty once filters are removed."),
+            {"result": "It parses files.", "source_documents": []},
+        ]
+
+        result = CliRunner().invoke(
+            app,
+            ["query", "https://github.com/user/repo", "--no-warm-up"],
+            input="lang:python\nWhat does it do?\nexit\n",
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Error: The query is empty once filters are removed.", result.output)
+        self.assertIn("It parses files.", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from src.components.code_graph import CodeGraph, file_symbols
+
+
+def chunk(chunk_id, start_line, end_line, type="function"):
+    return {"chunk_id": chunk_id, "start_line": start_line, "end_line": end_line, "type": type}
+
+
+class TestCodeGraph(unittest.TestCase):
+    def setUp(self):
+        # src/app/main.py imports `load` from src/app/io.py; both define `run`
+        self.graph = CodeGraph()
+        self.graph.update(
+            {
+                "src/app/main.py": file_symbols(
+                    [chunk("main#1", 3, 6), chunk("main#2", 8, 9)],
+                    {
+                        "imports": {"load": ["io", "load", 1], "log": ["app.util", "log", 0]},
+                        "defines": [(3, "main"), (8, "run")],
+                        "refs": [(4, "load"), (5, "run"), (6, "log"), (9, "save")],
+                    },
+                    "python",
+                ),
+                "src/app/io.py": file_symbols(
+                    [chunk("io#1", 1, 2), chunk("io#2", 4, 5), chunk("io#3", 7, 8)],
+                    {"imports": {}, "defines": [(1, "load"), (4, "run"), (7, "save")], "refs": []},
+                    "python",
+                ),
+                "src/app/util.py": file_symbols(
+                    [chunk("util#1", 1, 2)],
+                    {"imports": {}, "defines": [(1, "log")], "refs": [(2, "helper")]},
+                    "python",
+                ),
+                "src/other/util.py": file_symbols(
+                    [chunk("other#1", 1, 2)],
+                    {"imports": {}, "defines": [(1, "helper"), (1, "save")], "refs": []},
+                    "python",
+                ),
+            }
+        )
+
+    def test_file_symbols_prefers_the_narrowest_chunk(self):
+        symbols = file_symbols(
+            [chunk("a#1", 1, 10, "class"), chunk("a#2", 3, 5, "method")],
+            {"imports": {}, "defines": [(1, "A"), (3, "run")], "refs": [(4, "x"), (8, "y"), (12, "z")]},
+            "python",
+        )
+        self.assertEqual(symbols["chunks"]["a#1"], {"defines": ["A"], "refs": ["y"]})
+        self.assertEqual(symbols["chunks"]["a#2"], {"defines": ["run"], "refs": ["x"]})
+
+    def test_resolve_follows_imports_then_locals_then_unique_names(self):
+        self.graph.resolve()
+        # `load` from the relative import, `run` in the same file (not io.py's),
+        # `log` by the suffix of an absolute import; `save` is ambiguous
+        self.assertEqual(self.graph.edges["main#1"], ["io#1", "util#1", "main#2"])
+        self.assertNotIn("main#2", self.graph.edges)
+        self.assertEqual(self.graph.edges["util#1"], ["other#1"])  # the only `helper`
+        self.assertEqual(self.graph.neighbors("io#1"), ["main#1"])
+
+    def test_resolve_maps_duplicates_and_updates_per_file(self):
+        self.graph.resolve(canonical={"io#1": "other#1"})
+        self.assertEqual(self.graph.edges["main#1"], ["other#1", "util#1", "main#2"])
+
+        self.graph.update({}, removed=["src/app/io.py"])
+        self.graph.resolve()
+        self.assertEqual(self.graph.edges["main#1"], ["util#1", "main#2"])
+        self.assertEqual(self.graph.edges["main#2"], ["other#1"])  # `save` is unique now
+        self.assertEqual(self.graph.neighbors("main#2"), ["other#1", "main#1"])
+
+    def test_save_and_load(self):
+        self.graph.resolve()
+        with tempfile.TemporaryDirectory() as tmp:
+            self.graph.save(tmp)
+            edges_only = CodeGraph.load(tmp, symbols=False)
+            self.assertEqual(edges_only.edges, self.graph.edges)
+            self.assertEqual(edges_only.files, {})
+            self.assertEqual(CodeGraph.load(tmp).files, self.graph.files)
+            self.assertEqual(len(CodeGraph.load(tmp + "/missing")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
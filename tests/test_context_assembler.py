@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock
+from src.components.context_assembler import assemble_context, document_code, document_summary
+from src.components.chunk_records import document_metadata
+
+
+def make_doc(code, file_path="a.py", start=None, end=None, summary="", keywords="", type_=None):
+    metadata = {"file_path": file_path, "start_line": start, "end_line": end,
+                "summary": summary, "keywords": keywords, "type": type_}
+    return MagicMock(page_content=code + summary + keywords, metadata=metadata)
+
+
+class TestContextAssembler(unittest.TestCase):
+    def test_document_code_strips_enrichment(self):
+        doc = make_doc("x = 1\n", summary="Sets x.", keywords="x, value")
+        self.assertEqual(document_code(doc), "x = 1\n")
+
+    def test_document_text_spans(self):
+        chunk = {"content": "x = 1\n", "summary": "Sets x.", "keywords": "x, value"}
+        doc = MagicMock(page_content="x = 1\nSets x.x, value", metadata=document_metadata(chunk))
+        self.assertNotIn("summary", doc.metadata)
+        self.assertEqual(document_code(doc), "x = 1\n")
+        self.assertEqual(document_summary(doc), "Sets x.")
+        # Documents stored before the spans
+        self.assertEqual(document_summary(make_doc("y", summary="Old.")), "Old.")
+
+    def test_contained_chunk_is_dropped(self):
+        outer = make_doc("def f():\n    a = 1\n    b = 2", start=1, end=3)
+        inner = make_doc("    a = 1", start=2, end=2)
+
+        context, used, _ = assemble_context([outer, inner])
+
+        self.assertEqual(used, [outer])
+        self.assertEqual(context.count("a = 1"), 1)
+
+    def test_class_skeleton_keeps_its_methods(self):
+        skeleton = make_doc("class A:\n    def f(self): ...", start=1, end=3, type_="class")
+        method = make_doc("    def f(self):\n        return 1", start=2, end=3, type_="method")
+
+        context, used, _ = assemble_context([skeleton, method])
+
+        self.assertEqual(len(used), 2)
+        self.assertIn("return 1", context)
+
+    def test_inexact_ranges_are_kept_apart(self):
+        # Indexes built before exact part ranges stored every part of a long
+        # module-level block with the block's start line
+        constants = [f"CONSTANT_{i} = {i}" for i in range(80)]
+        parts = [constants[i:i + 16] for i in range(0, 80, 16)]
+        docs = [
+            make_doc("\n".join(part) + "\n", start=1, end=len(part), type_="other")
+            for part in parts
+        ]
+
+        context, used, _ = assemble_context(docs, full_code_hits=5)
+
+        self.assertEqual(len(used), 5)
+        for constant in ("CONSTANT_0 ", "CONSTANT_40 ", "CONSTANT_79 "):
+            self.assertIn(constant, context)
+
+    def test_adjacent_chunks_are_merged(self):
+        first = make_doc("a = 1\nb = 2", start=1, end=2)
+        second = make_doc("b = 2\nc = 3", start=2, end=3)
+        other = make_doc("z = 0", file_path="b.py", start=1, end=1)
+
+        context, used, stats = assemble_context([first, other, second])
+
+        self.assertIn("File: a.py (Lines: 1-3)\na = 1\nb = 2\nc = 3", context)
+        self.assertEqual(context.count("b = 2"), 1)
+        self.assertEqual(stats["full_blocks"], 2)
+        self.assertEqual(len(used), 3)
+
+    def test_budget_falls_back_to_summaries(self):
+        docs = [
+            make_doc("x" * 400, file_path=f"f{i}.py", start=1, end=1, summary=f"Summary {i}.")
+            for i in range(4)
+        ]
+
+        context, used, stats = assemble_context(docs, token_budget=200, full_code_hits=1)
+
+        self.assertIn("x" * 400, context)
+        self.assertIn("Summary: Summary 3.", context)
+        self.assertEqual(stats["full_blocks"], 1)
+        self.assertEqual(stats["summary_blocks"], 3)
+        self.assertLessEqual(stats["context_tokens"], 200)
+
+if __name__ == "__main__":
+    unittest.main()
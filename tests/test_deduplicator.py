@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.components.deduplicator import (
+    NearDuplicateIndex,
+    assign_duplicates,
+    promote_orphans,
+    duplicate_locations,
+)
+
+CODE = """def load_config(path):
+    with open(path) as f:
+        data = json.load(f)
+    if "name" not in data:
+        raise ValueError("missing name")
+    return Config(name=data["name"], debug=data.get("debug", False))
+"""
+
+
+def make_chunk(chunk_id, content, file_path="a.py"):
+    return {"chunk_id": chunk_id, "content": content, "file_path": file_path}
+
+
+class TestDeduplicator(unittest.TestCase):
+    def test_near_duplicates_point_to_canonical(self):
+        chunks = [
+            make_chunk("a", CODE, "vendor/a.py"),
+            make_chunk("b", CODE.replace("False", "True"), "vendor/b.py"),
+            make_chunk("c", "class Other:\n    def run(self):\n        return 42\n"),
+        ]
+
+        canonicals = assign_duplicates(chunks)
+
+        self.assertEqual([c["chunk_id"] for c in canonicals], ["a", "c"])
+        self.assertEqual(chunks[1]["duplicate_of"], "a")
+        self.assertEqual(
+            duplicate_locations(chunks),
+            {"a": [{"file_path": "vendor/b.py", "start_line": None, "end_line": None}]},
+        )
+
+    def test_existing_canonical_is_reused(self):
+        existing = [make_chunk("old", CODE)]
+        new = [make_chunk("new", CODE, "copy.py")]
+
+        self.assertEqual(assign_duplicates(new, existing), [])
+        self.assertEqual(new[0]["duplicate_of"], "old")
+
+    def test_unrelated_code_is_not_matched(self):
+        index = NearDuplicateIndex()
+        index.add("a", CODE)
+        self.assertIsNone(index.find("SELECT id, name FROM users WHERE active = 1 ORDER BY name"))
+
+    def test_promote_orphans(self):
+        chunks = [
+            dict(make_chunk("b", CODE), duplicate_of="a"),
+            dict(make_chunk("c", CODE), duplicate_of="a"),
+        ]
+
+        promoted = promote_orphans(chunks, {"a"})
+
+        self.assertEqual([c["chunk_id"] for c in promoted], ["b"])
+        self.assertNotIn("duplicate_of", chunks[0])
+        self.assertEqual(chunks[1]["duplicate_of"], "b")
+
+    def test_saved_fingerprints_are_updated_by_chunk_id(self):
+        other = "class Other:\n    def run(self):\n        return 42\n"
+        index = NearDuplicateIndex()
+        index.sync([make_chunk("old", CODE), make_chunk("gone", other)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fingerprints.json")
+            index.save(path)
+            loaded = NearDuplicateIndex.load(path)
+
+        with patch.object(NearDuplicateIndex, "_fingerprint", wraps=loaded._fingerprint) as fingerprint:
+            added = loaded.sync([make_chunk("old", CODE), make_chunk("kept", "x = 1")])
+            self.assertEqual(added, 1)
+            fingerprint.assert_called_once_with("x = 1")
+
+        self.assertNotIn("gone", loaded.fingerprints)
+        self.assertIsNone(loaded.find(other))
+        new = [make_chunk("new", CODE, "copy.py")]
+        self.assertEqual(assign_duplicates(new, index=loaded), [])
+        self.assertEqual(new[0]["duplicate_of"], "old")
+
+
+if __name__ == "__main__":
+    unittest.main()
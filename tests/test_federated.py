@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from src.llm import scheduler
+from src.pipeline.federated import FederatedQueryPipeline
+
+
+def make_pipeline(hits):
+    pipeline = MagicMock()
+    pipeline.vectorstore_manager.embeddings.model = "nomic-embed-text"
+    pipeline.vectorstore_manager.embeddings.embed_query.return_value = [0.1, 0.2]
+    pipeline.search_by_vector.return_value = [
+        (MagicMock(page_content=text, metadata={}), score) for text, score in hits
+    ]
+    return pipeline
+
+
+class TestFederatedQueryPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(
+            scheduler, "ANSWERS_DIR", os.path.join(self.tmp.name, "answers")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    @patch("src.pipeline.federated.OllamaLLM")
+    @patch("src.pipeline.federated.VectorstoreManager")
+    def test_search_merges_by_normalized_score(self, mock_manager, mock_llm):
+        mock_manager.return_value.relevance_score.side_effect = lambda vs, s: 1 / (1 + s)
+        pipelines = {
+            "api": make_pipeline([("api-1", 0.2), ("api-2", 0.9)]),
+            "web": make_pipeline([("web-1", 0.5)]),
+        }
+
+        def get(repo):
+            if repo not in pipelines:
+                raise FileNotFoundError(f"Vectorstore for '{repo}' not found.")
+            return pipelines[repo]
+
+        cache = MagicMock()
+        cache.get.side_effect = get
+
+        federated = FederatedQueryPipeline(repos=["api", "web", "gone"], index_cache=cache)
+        docs, errors = federated.search("query", k=2)
+
+        self.assertEqual([d.page_content for d in docs], ["api-1", "web-1"])
+        self.assertEqual([d.metadata["repo"] for d in docs], ["api", "web"])
+        self.assertIn("gone", errors)
+        # The query is embedded once for both repos sharing an embedding model
+        embed_calls = sum(
+            p.vectorstore_manager.embeddings.embed_query.call_count for p in pipelines.values()
+        )
+        self.assertEqual(embed_calls, 1)
+
+    @patch("src.pipeline.federated.OllamaLLM")
+    @patch("src.pipeline.federated.VectorstoreManager")
+    def test_repo_filter_avoids_loading_other_repos(self, mock_manager, mock_llm):
+        mock_manager.return_value.list_repos.return_value = ["svc-a", "svc-b", "docs"]
+        cache = MagicMock()
+        cache.get.return_value = make_pipeline([])
+
+        federated = FederatedQueryPipeline(index_cache=cache)
+        federated.search("query", repo_filter=["svc-*"])
+
+        self.assertEqual(
+            sorted(call.args[0] for call in cache.get.call_args_list), ["svc-a", "svc-b"]
+        )
+
+
+    @patch("src.pipeline.federated.OllamaLLM")
+    @patch("src.pipeline.federated.VectorstoreManager")
+    def test_ask_prompt_leaves_out_filter_predicates(self, mock_manager, mock_llm):
+        cache = MagicMock()
+        cache.get.return_value = make_pipeline([])
+
+        federated = FederatedQueryPipeline(repos=["api"], index_cache=cache)
+        federated.ask("where is x parsed? lang:python")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0]
+        self.assertIn("where is x parsed?", prompt)
+        self.assertNotIn("lang:python", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from src.utils.file_classifier import classify_file, classify_by_path
+
+
+class TestFileClassifier(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir.name, name)
+        mode = "wb" if isinstance(data, bytes) else "w"
+        with open(path, mode) as f:
+            f.write(data)
+        return path
+
+    def test_regular_source_is_indexed(self):
+        path = self._write("app.py", "def main():\n    return 1\n")
+        self.assertIsNone(classify_file(path, "app.py"))
+
+    def test_null_bytes_are_binary(self):
+        path = self._write("data.txt", b"header\x00\x01\x02")
+        self.assertEqual(classify_file(path, "data.txt"), "binary")
+
+    def test_minified_bundle(self):
+        path = self._write("bundle.js", "var a=1;" * 500)
+        self.assertEqual(classify_file(path, "bundle.js"), "minified")
+
+    def test_generated_marker(self):
+        path = self._write("client.py", "# Code generated by protoc. DO NOT EDIT.\nx = 1\n")
+        self.assertEqual(classify_file(path, "client.py"), "generated")
+
+    def test_path_rules(self):
+        self.assertEqual(classify_by_path("web/node_modules/lib/index.js", 10), "vendored")
+        self.assertEqual(classify_by_path("static/app.min.js", 10), "vendored")
+        self.assertEqual(classify_by_path("assets/logo.PNG", 10), "binary")
+        self.assertEqual(classify_by_path("logs/server.txt", 5_000_000), "oversized")
+        self.assertIsNone(classify_by_path("src/vendors.py", 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from src.utils.generations import GenerationStore, GENERATION_FILE
+
+
+class TestGenerationStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = GenerationStore(os.path.join(self.tmp.name, "repo_vectorstore"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def commit_generation(self, content):
+        path = self.store.stage()
+        with open(os.path.join(path, "chunks.json"), "w") as f:
+            f.write(content)
+        return self.store.commit(path)
+
+    def test_commit_flips_current(self):
+        self.assertIsNone(self.store.current())
+        self.assertEqual(self.commit_generation("one"), "gen-000001")
+        self.assertEqual(self.commit_generation("two"), "gen-000002")
+
+        self.assertEqual(self.store.current(), "gen-000002")
+        with open(self.store.current_file("chunks.json")) as f:
+            self.assertEqual(f.read(), "two")
+        self.assertIsNone(self.store.current_file("cache.json"))
+        self.assertEqual(self.store.generations(), ["gen-000001", "gen-000002"])
+
+    def test_uncommitted_stage_is_invisible(self):
+        self.commit_generation("one")
+        self.store.stage()  # a writer that crashed before committing
+        self.assertEqual(self.store.current(), "gen-000001")
+        self.assertEqual(self.commit_generation("three"), "gen-000003")
+
+    def test_collect_garbage_keeps_current_and_retained(self):
+        for content in ("1", "2", "3", "4"):
+            self.commit_generation(content)
+        self.store.stage()
+
+        self.assertEqual(self.store.collect_garbage(retained=1, min_age=3600), [])
+        deleted = self.store.collect_garbage(retained=1, min_age=0)
+
+        self.assertEqual(sorted(deleted)[-2:], ["gen-000001", "gen-000002"])
+        self.assertEqual(len(deleted), 3)  # plus the abandoned staging directory
+        self.assertEqual(self.store.generations(), ["gen-000003", "gen-000004"])
+
+    def test_collect_garbage_ages_generations_from_their_manifest(self):
+        for content in ("1", "2", "3"):
+            self.commit_generation(content)
+        root = self.store.root
+        # gen-000002 was committed two hours ago, gen-000003 just now
+        with open(os.path.join(root, "gen-000002", GENERATION_FILE), "w") as f:
+            json.dump({"created": time.time() - 7200}, f)
+        os.utime(os.path.join(root, "gen-000001"))  # e.g. a file linked in later
+
+        deleted = self.store.collect_garbage(retained=0, min_age=3600)
+
+        self.assertEqual(deleted, ["gen-000001"])
+        self.assertEqual(self.store.generations(), ["gen-000002", "gen-000003"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.utils.index_cache import IndexCache
+
+
+class TestIndexCache(unittest.TestCase):
+    def test_lru_eviction_respects_budget(self):
+        loader = MagicMock(side_effect=lambda key: f"index-{key}")
+        cache = IndexCache(loader, sizer=lambda value: 40, max_bytes=100)
+
+        cache.get("a")
+        cache.get("b")
+        cache.get("a")  # "a" becomes the most recently used
+        cache.get("c")  # evicts "b"
+
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], ["a", "c"])
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 3, 1))
+
+    def test_concurrent_misses_load_once(self):
+        started = threading.Event()
+
+        def slow_loader(key):
+            started.wait(0.1)
+            return key
+
+        loader = MagicMock(side_effect=slow_loader)
+        cache = IndexCache(loader, sizer=lambda value: 1)
+        threads = [threading.Thread(target=cache.get, args=("repo",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+
+        loader.assert_called_once_with("repo")
+        self.assertEqual(cache.load_locks, {})
+
+    def test_failed_loads_leave_no_lock(self):
+        cache = IndexCache(MagicMock(side_effect=FileNotFoundError), sizer=lambda value: 1)
+        for key in ("a", "b"):
+            with self.assertRaises(FileNotFoundError):
+                cache.get(key)
+        self.assertEqual(cache.load_locks, {})
+
+    def test_invalidate_forces_reload(self):
+        loader = MagicMock(side_effect=lambda key: object())
+        cache = IndexCache(loader, sizer=lambda value: 1)
+        first = cache.get("repo")
+        cache.invalidate("repo")
+        self.assertIsNot(cache.get("repo"), first)
+
+
+    def test_swapped_entry_is_sized_again(self):
+        index = MagicMock(generation="gen-000001", size=40)
+        other = MagicMock(generation="gen-000001", size=40)
+        cache = IndexCache(
+            lambda key: {"a": index, "b": other}[key],
+            sizer=lambda value: value.size,
+            max_bytes=100,
+            version=lambda value: value.generation,
+        )
+        cache.get("b")
+        cache.get("a")
+        self.assertEqual(cache.stats()["bytes"], 80)
+
+        index.generation, index.size = "gen-000002", 90  # hot swap to a larger index
+        cache.get("a")
+
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (["a"], 90))
+        self.assertEqual(stats["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,28 @@
 import unittest
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
 from unittest.mock import patch, MagicMock
-from src.pipeline.indexing import IndexingPipeline
+from src.utils.retry_queue import RetryQueue
+from src.pipeline.indexing import (
+    IndexingPipeline,
+    EmbeddingWriter,
+    check_file,
+    report_enrichment,
+    enriched_by_other_model,
+    legacy_chunked_files,
+    migrate_chunk_ids,
+    uses_legacy_ids,
+)
 
 
 class TestIndexingPipeline(unittest.TestCase):
 
     # We need to patch all the external dependencies of the 'run' method
+    @patch("src.components.deduplicator.atomic_write_json")
+    @patch("src.pipeline.indexing.atomic_write_json")
+    @patch("src.pipeline.indexing.IndexCheckpoint")
     @patch("src.pipeline.indexing.clone_github_repo")
     @patch("src.pipeline.indexing.load_cache")
     @patch("src.pipeline.indexing.calculate_file_hash")
@@ -24,6 +41,9 @@ class TestIndexingPipeline(unittest.TestCase):
         mock_hash,
         mock_load_cache,
         mock_clone,
+        mock_checkpoint,
+        mock_write_json,
+        mock_write_fingerprints,
     ):
         # 1. --- Setup Mocks ---
 
@@ -48,8 +68,11 @@ class TestIndexingPipeline(unittest.TestCase):
 
         # 2. --- Call the Method ---
         pipeline = IndexingPipeline("https://github.com/fake/repo")
-        with patch("os.walk") as mock_walk:
-            mock_walk.return_value = [("repo_path", [], ["file.py"])]
+        with patch("src.pipeline.indexing.RepositoryWalker") as mock_walker:
+            mock_walker.return_value.walk.return_value = [
+                ("repo_path/file.py", "file.py", MagicMock(st_size=10, st_mtime_ns=1))
+            ]
+            mock_walker.return_value.tree = "repo_path/\n    file.py"
             pipeline.run()
 
         # 3. --- Assert Results ---
@@ -63,7 +86,95 @@ class TestIndexingPipeline(unittest.TestCase):
 
         # Check that it saved the new vector store and the new cache
         mock_vs_manager_instance.save.assert_called_once()
+        # Chunks and cache are written into the generation before it is committed
+        write_generation_files = mock_vs_manager_instance.save.call_args.kwargs["before_commit"]
+        write_generation_files("gen")
+        mock_write_json.assert_called_once()
+        mock_write_fingerprints.assert_called_once()
         mock_save_cache.assert_called_once()
+        mock_checkpoint.return_value.remove.assert_called_once()
+
+    def test_embedding_writer_streams_batches(self):
+        manager, checkpoint = MagicMock(), MagicMock()
+        manager.embed_chunks.side_effect = lambda chunks: [[0.5]] * len(chunks)
+        writer = EmbeddingWriter(manager, checkpoint, None, [], batch_size=2)
+        chunks = [{"chunk_id": f"a.py#{i}", "content": "x"} for i in range(3)]
+
+        writer.add(chunks, "a.py", "hash-a")
+        # The first full batch creates the vectorstore and checkpoints its vectors
+        manager.create_vectorstore.assert_called_once_with(chunks[:2], [[0.5]] * 2, planned=[])
+        checkpoint.append_vectors.assert_called_once_with(
+            "a.py", "hash-a", {"a.py#0": [0.5], "a.py#1": [0.5]}
+        )
+        self.assertIn("a.py#2", writer)
+
+        writer.flush()
+        manager.add_documents.assert_called_once_with(
+            manager.create_vectorstore.return_value, chunks[2:], [[0.5]]
+        )
+        self.assertEqual(writer.pending, [])
+
+    def test_migrate_chunk_ids(self):
+        chunks = [
+            {"chunk_id": "utils.py-0", "file_path": "repos/repo/a/utils.py", "content": "x = 1"},
+            {"chunk_id": "utils.py-0", "file_path": "repos/repo/b/utils.py", "content": "y = 2"},
+            {"chunk_id": "main.py-0", "file_path": "repos/repo/main.py", "content": "x = 1 "},
+            {"chunk_id": "main.py-1", "file_path": "repos/repo/main.py", "content": "z", "duplicate_of": "utils.py-0"},
+            {"chunk_id": "run.py-0", "file_path": "repos/repo/run.py", "content": "w", "duplicate_of": "main.py-0"},
+        ]
+        self.assertTrue(uses_legacy_ids(chunks))
+
+        migrate_chunk_ids(chunks, "repo")
+
+        self.assertFalse(uses_legacy_ids(chunks))
+        self.assertEqual(len({c["chunk_id"] for c in chunks}), 5)
+        self.assertTrue(chunks[0]["chunk_id"].startswith("a/utils.py#"))
+        self.assertNotIn("duplicate_of", chunks[3])  # ambiguous old id
+        self.assertEqual(chunks[4]["duplicate_of"], chunks[2]["chunk_id"])
+
+    def test_chunks_without_type_are_chunked_again(self):
+        chunks = [
+            {"chunk_id": "a.py#1", "file_path": "repos/repo/a.py", "type": "function"},
+            {"chunk_id": "b.md#1", "file_path": "repos/repo/b.md", "type": None},
+            {"chunk_id": "c.py#1", "file_path": "repos/repo/c.py"},
+        ]
+        self.assertEqual(legacy_chunked_files(chunks), {"repos/repo/c.py"})
+
+    @patch("src.pipeline.indexing.LLM_MODEL", "big")
+    @patch("src.pipeline.indexing.ENRICH_MODEL", "small")
+    def test_enrichment_is_keyed_by_model(self):
+        self.assertFalse(enriched_by_other_model({"enriched_by": "small"}))
+        self.assertTrue(enriched_by_other_model({"enriched_by": "big"}))
+        self.assertTrue(enriched_by_other_model({}))  # enriched before per-stage models
+        self.assertFalse(enriched_by_other_model({"enriched_by": None}))  # failed
+
+
+    def test_check_file_reclassifies_when_settings_change(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "api_pb2.py")
+            with open(path, "w") as f:
+                f.write("# Generated by the protocol buffer compiler.  DO NOT EDIT!\nx = 1\n")
+            stat = os.stat(path)
+            reason, file_hash, _ = check_file(path, "api_pb2.py", {}, stat)
+            self.assertEqual(reason, "generated")
+
+            # Indexed while "generated" was not a skip reason, then unchanged
+            old_cache = {path: file_hash}
+            self.assertIsNone(check_file(path, "api_pb2.py", old_cache, stat)[0])
+            reason = check_file(path, "api_pb2.py", old_cache, stat, reclassify=True)[0]
+            self.assertEqual(reason, "generated")
+
+
+    def test_report_enrichment_lists_remaining_errors(self):
+        queue = RetryQueue()
+        queue.record_failure({"chunk_id": "a.py#1", "file_path": "a.py"}, "timeout")
+        queue.record_failure({"chunk_id": "b.py#1", "file_path": "b.py"}, "timeout")
+        queue.record_failure({"chunk_id": "c.py#1", "file_path": "c.py"}, "HTTP 500")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            report_enrichment({}, 1, 4, queue)
+        self.assertIn("3 chunks are queued", output.getvalue())
+        self.assertIn("(HTTP 500: 1, timeout: 2)", output.getvalue())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import time
+import threading
+import unittest
+from src.pipeline.jobs import JobManager
+from src.pipeline.indexing import IndexingCancelled
+
+
+class FakePipeline:
+    """Stands in for IndexingPipeline, reporting progress like the real run()."""
+
+    release = threading.Event()
+
+    def __init__(self, github_url):
+        self.github_url = github_url
+
+    def run(self, progress_callback=None, cancel_event=None):
+        if "broken" in self.github_url:
+            raise RuntimeError("clone failed")
+        for stage in ("clone", "scan", "parse", "enrich"):
+            if stage == "enrich":
+                FakePipeline.release.wait(2)
+            if cancel_event.is_set():
+                raise IndexingCancelled()
+            progress_callback(1, 1, stage)
+
+
+def wait_for(job, timeout=2):
+    deadline = time.time() + timeout
+    while job.active and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        FakePipeline.release.clear()
+        self.manager = JobManager(max_workers=2, pipeline_factory=FakePipeline)
+
+    def test_job_completes_with_progress(self):
+        job = self.manager.submit("https://github.com/user/repo")
+        # Submitting the same repo while it is running returns the same job
+        self.assertIs(self.manager.submit("https://github.com/user/repo"), job)
+        FakePipeline.release.set()
+
+        wait_for(job)
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.stage, "enrich")
+        self.assertEqual(job.progress(), 1.0)
+
+    def test_cancel(self):
+        job = self.manager.submit("https://github.com/user/repo")
+        self.manager.cancel(job.job_id)
+        FakePipeline.release.set()
+
+        self.assertEqual(wait_for(job).status, "cancelled")
+
+    def test_failure_is_recorded(self):
+        job = wait_for(self.manager.submit("https://github.com/user/broken"))
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "clone failed")
+
+
+    def test_finished_jobs_expire(self):
+        manager = JobManager(pipeline_factory=FakePipeline, retention=60)
+        old = wait_for(manager.submit("https://github.com/user/broken"))
+        old.finished_at -= 120
+        recent = wait_for(manager.submit("https://github.com/user/broken-too"))
+
+        manager.submit("https://github.com/user/other")
+        self.assertIsNone(manager.get(old.job_id))
+        self.assertIs(manager.get(recent.job_id), recent)
+        FakePipeline.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
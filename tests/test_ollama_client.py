@@ -3,7 +3,8 @@ import json
 from unittest.mock import patch, MagicMock
 import requests
 
-from src.llm.ollama_client import enrich_chunk
+from src.llm.ollama_client import enrich_chunk, load_model
+from config.settings import ENRICH_MODEL
 
 
 class TestOllamaClient(unittest.TestCase):
@@ -28,6 +29,7 @@ class TestOllamaClient(unittest.TestCase):
 
         result = enrich_chunk("some code chunk")
         self.assertEqual(result, mock_response_content)
+        self.assertEqual(mock_post.call_args.kwargs["json"]["model"], ENRICH_MODEL)
 
     @patch("requests.post")
     def test_enrich_chunk_http_error_returns_default(self, mock_post):
@@ -40,7 +42,7 @@ class TestOllamaClient(unittest.TestCase):
         mock_post.return_value = mock_response
 
         result = enrich_chunk("some code chunk")
-        self.assertEqual(result, {"summary": "", "keywords": ""})
+        self.assertEqual(result, {"summary": "", "keywords": "", "error": "HTTP 500"})
 
     @patch("requests.post")
     def test_enrich_chunk_network_error_returns_default(self, mock_post):
@@ -50,7 +52,30 @@ class TestOllamaClient(unittest.TestCase):
         mock_post.side_effect = requests.exceptions.RequestException
 
         result = enrich_chunk("some code chunk")
-        self.assertEqual(result, {"summary": "", "keywords": ""})
+        self.assertEqual(result, {"summary": "", "keywords": "", "error": "network error"})
+
+    @patch("requests.post")
+    def test_enrich_chunk_timeout_and_bad_json_are_reported(self, mock_post):
+        mock_post.side_effect = requests.exceptions.Timeout
+        self.assertEqual(enrich_chunk("some code chunk")["error"], "timeout")
+
+        mock_post.side_effect = None
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = {"message": {"content": "{not json"}}
+        self.assertEqual(enrich_chunk("some code chunk")["error"], "malformed JSON")
+
+    @patch("requests.post")
+    def test_load_model(self, mock_post):
+        """
+        Tests that load_model asks Ollama to load a model without a prompt.
+        """
+        mock_post.return_value.status_code = 200
+        self.assertTrue(load_model("answer-model", keep_alive="10m"))
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertEqual(payload, {"model": "answer-model", "messages": [], "keep_alive": "10m"})
+
+        mock_post.side_effect = requests.exceptions.ConnectionError()
+        self.assertFalse(load_model("answer-model"))
 
 
 if __name__ == "__main__":
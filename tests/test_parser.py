@@ -30,6 +30,70 @@ class TestParsers(unittest.TestCase):
         self.assertEqual(chunks[0]['type'], 'function')
         self.assertEqual(chunks[1]['type'], 'class')
 
+    def test_python_parser_hierarchical(self):
+        with open("test_nested.py", "w") as f:
+            f.write(
+                "class Service:\n"
+                "    \"\"\"Docs.\"\"\"\n"
+                "    retries = 3\n\n"
+                "    def run(self):\n"
+                "        def helper():\n"
+                "            pass\n"
+                "        return helper()\n\n"
+                "    async def stop(self):\n"
+                "        pass\n"
+            )
+        try:
+            chunks = parse_python_with_ast("test_nested.py")
+        finally:
+            os.remove("test_nested.py")
+
+        self.assertEqual(
+            [(c["type"], c["name"]) for c in chunks],
+            [("class", "Service"), ("method", "Service.run"), ("method", "Service.stop")],
+        )
+        skeleton = chunks[0]["content"]
+        self.assertIn("retries = 3", skeleton)
+        self.assertIn("def run(self): ...", skeleton)
+        self.assertNotIn("helper", skeleton)
+        self.assertEqual(chunks[1]["parent"], "Service")
+        self.assertEqual((chunks[2]["start_line"], chunks[2]["end_line"]), (10, 11))
+
+    def test_python_skeleton_leaves_out_comments_before_body(self):
+        with open("test_comment.py", "w") as f:
+            f.write(
+                "class Service:\n"
+                "    def run(self, x):\n"
+                "        # note\n"
+                "\n"
+                "        return x\n"
+            )
+        try:
+            chunks = parse_python_with_ast("test_comment.py")
+        finally:
+            os.remove("test_comment.py")
+
+        self.assertEqual(chunks[0]["content"], "class Service:\n    def run(self, x): ...")
+
+    def test_python_module_level_parts_keep_their_lines(self):
+        lines = [f"SETTING_{i} = 'value number {i} of the configuration'" for i in range(400)]
+        source = "\n".join(["import os", ""] + lines + ["", "def main():", "    pass"]) + "\n"
+        with open("test_module.py", "w") as f:
+            f.write(source)
+        try:
+            chunks = parse_python_with_ast("test_module.py")
+        finally:
+            os.remove("test_module.py")
+
+        file_lines = source.splitlines()
+        others = [c for c in chunks if c["type"] == "other"]
+        self.assertGreater(len(others), 1)
+        for chunk in others:
+            expected = "\n".join(file_lines[chunk["start_line"] - 1:chunk["end_line"]])
+            self.assertEqual(chunk["content"], expected)
+        self.assertEqual(others[0]["start_line"], 1)
+        self.assertEqual(others[-1]["end_line"], 402)
+
     def test_js_parser(self):
         chunks = parse_js("test.js")
         self.assertEqual(len(chunks), 2)
@@ -41,6 +105,49 @@ class TestParsers(unittest.TestCase):
         self.assertEqual(len(chunks), 1)
         self.assertEqual(chunks[0]['type'], 'class')
 
+    def test_references(self):
+        with open("test_refs.py", "w") as f:
+            f.write(
+                "from .io import load as read\nimport os\n\ndef main(store):\n"
+                "    print(store.open())\n    return read(os.sep)\n"
+            )
+        try:
+            references = {}
+            parse_python_with_ast("test_refs.py", references)
+        finally:
+            os.remove("test_refs.py")
+        self.assertEqual(references["imports"]["read"], ["io", "load", 1])
+        self.assertIn((4, "main"), references["defines"])
+        self.assertIn((6, "read"), references["refs"])
+        # A builtin name called as a method is kept, a bare builtin call is not
+        self.assertIn((5, "open"), references["refs"])
+        self.assertNotIn((5, "print"), references["refs"])
+
+        references = {}
+        parse_js("test.js", references)
+        self.assertIn((1, "hello"), references["defines"])
+        self.assertEqual([name for _, name in references["refs"]], ["log"])
+
+        with open("test_refs.java", "w") as f:
+            f.write(
+                "import com.app.io.Loader;\n\n"
+                "public class Test extends Base {\n"
+                "    public void run() {\n"
+                "        Loader.load();\n"
+                "    }\n"
+                "}\n"
+            )
+        try:
+            references = {}
+            parse_java("test_refs.java", references)
+        finally:
+            os.remove("test_refs.java")
+        self.assertEqual(references["imports"]["Loader"], ["com.app.io.Loader", "Loader", 0])
+        self.assertEqual(references["defines"], [(3, "Test"), (4, "run")])
+        self.assertEqual(
+            sorted(name for _, name in references["refs"]), ["Base", "Loader", "load"]
+        )
+
     def test_markdown_parser(self):
         with open("test.md", "r") as f:
             content = f.read()
@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from src.components.query_filters import parse_query, merge_filters, MetadataTable
+
+
+def make_vectorstore(metadatas):
+    docs = {f"id-{i}": Document(page_content=str(i), metadata=m) for i, m in enumerate(metadatas)}
+    vectorstore = MagicMock()
+    vectorstore.index_to_docstore_id = {i: f"id-{i}" for i in range(len(metadatas))}
+    vectorstore.docstore.metadata.side_effect = lambda doc_id: docs[doc_id].metadata
+    return vectorstore
+
+
+class TestQueryFilters(unittest.TestCase):
+    def test_parse_query(self):
+        query, filters = parse_query("how are chunks saved lang:py path:src/pipeline type:Class lang:java")
+        self.assertEqual(query, "how are chunks saved")
+        self.assertEqual(filters, {"lang": ["python", "java"], "path": ["src/pipeline"], "type": ["class"]})
+
+    def test_parse_query_ignores_other_colons(self):
+        query, filters = parse_query("what does http://x do?")
+        self.assertEqual(query, "what does http://x do?")
+        self.assertEqual(filters, {})
+
+    def test_merge_filters_rejects_unknown_keys(self):
+        self.assertEqual(merge_filters({"lang": "python"}, None), {"lang": ["python"]})
+        with self.assertRaises(ValueError):
+            merge_filters({"author": ["me"]})
+
+    def test_select(self):
+        table = MetadataTable(make_vectorstore([
+            {"repo": "demo", "file_path": "repos/demo/src/pipeline/a.py", "lang": "python", "type": "class"},
+            {"repo": "demo", "file_path": "repos/demo/src/app/B.java", "lang": "java", "type": "class"},
+            {"repo": "demo", "file_path": "repos/demo/src/pipeline/b.py", "lang": "python", "type": "function"},
+            {"repo": "demo", "file_path": "repos/demo/README.md", "lang": "markdown"},
+        ]))
+
+        self.assertEqual(table.select({"lang": ["python"]}).tolist(), [0, 2])
+        self.assertEqual(table.select({"path": ["src/pipeline"], "type": ["class"]}).tolist(), [0])
+        self.assertEqual(table.select({"path": ["*.java", "README*"]}).tolist(), [1, 3])
+        self.assertEqual(table.select({"lang": ["rust"]}).tolist(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+from src.server.query_server import QueryServer
+
+
+async def http_request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data)
+
+
+class TestQueryServer(unittest.TestCase):
+    def _run(self, server, requests):
+        async def scenario():
+            listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            async with listener:
+                return await asyncio.gather(
+                    *(http_request(port, *request) for request in requests)
+                )
+
+        return asyncio.run(scenario())
+
+    @patch("src.server.query_server.query_pipeline_size", return_value=10)
+    @patch("src.server.query_server.load_query_pipeline")
+    def test_search_and_metrics(self, mock_load, mock_size):
+        doc = MagicMock(page_content="def f(): pass", metadata={"file_path": "a.py"})
+        mock_load.return_value.search.return_value = [(doc, 0.5)]
+        server = QueryServer()
+
+        responses = self._run(
+            server,
+            [
+                ("POST", "/search", {"repo": "repo", "query": "f"}),
+                ("POST", "/search", {"repo": "repo", "query": "g", "k": 3}),
+                ("GET", "/health"),
+            ],
+        )
+
+        self.assertEqual(responses[0][0], 200)
+        self.assertEqual(responses[0][1]["results"][0]["metadata"], {"file_path": "a.py"})
+        self.assertEqual(responses[2][1]["status"], "ok")
+        mock_load.assert_called_once_with("repo")  # second request hits the cache
+
+        status, metrics = self._run(server, [("GET", "/metrics")])[0]
+        self.assertEqual(metrics["requests"]["/search"]["count"], 2)
+        self.assertEqual(metrics["index_cache"]["entries"], ["repo"])
+
+    @patch("src.server.query_server.load_query_pipeline")
+    def test_errors(self, mock_load):
+        mock_load.side_effect = FileNotFoundError("Vectorstore for 'nope' not found.")
+        server = QueryServer()
+
+        responses = self._run(
+            server,
+            [
+                ("POST", "/ask", {"repo": "nope", "query": "q"}),
+                ("POST", "/ask", {"query": "missing repo"}),
+                ("GET", "/unknown"),
+                ("POST", "/ask", []),
+            ],
+        )
+
+        self.assertEqual([status for status, _ in responses], [404, 400, 404, 400])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,205 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
-from src.pipeline.querying import QueryPipeline
+from src.components.code_graph import CodeGraph
+from src.llm import scheduler
+from src.pipeline.querying import QueryPipeline, collapse_duplicates
 
 class TestQueryPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(
+            scheduler, "ANSWERS_DIR", os.path.join(self.tmp.name, "answers")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    @patch("src.pipeline.querying.MetadataTable")
     @patch("src.pipeline.querying.VectorstoreManager")
-    @patch("src.pipeline.querying.RetrievalQA")
-    def test_setup(self, mock_qa, mock_manager):
-        mock_manager.return_value.load.return_value = MagicMock()
+    def test_setup(self, mock_manager, mock_table):
+        vectorstore = MagicMock()
+        mock_manager.return_value.load_generation.return_value = (vectorstore, "gen-000001")
         pipeline = QueryPipeline("https://github.com/user/repo")
         pipeline.setup()
-        self.assertTrue(mock_qa.from_chain_type.called)
+        self.assertIs(pipeline.vectorstore, vectorstore)
+        self.assertEqual(pipeline.generation, "gen-000001")
+
+    @patch("src.pipeline.querying.load_model")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_warm_up_loads_models(self, mock_manager, mock_load):
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.warm_up().join()
+        mock_load.assert_called_once()
+        mock_manager.return_value.embeddings.embed_query.assert_called_once()
+
+    @patch("src.pipeline.querying.MetadataTable")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_refresh_swaps_to_new_generation(self, mock_manager, mock_table):
+        old, new = MagicMock(), MagicMock()
+        manager = mock_manager.return_value
+        manager.load_generation.return_value = (old, "gen-000001")
+        manager.index_version.return_value = "gen-000001"
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.setup()
+        self.assertFalse(pipeline.refresh(wait=True))
+
+        manager.load_generation.return_value = (new, "gen-000002")
+        manager.index_version.return_value = "gen-000002"
+        self.assertTrue(pipeline.refresh(wait=True))
+
+        self.assertIs(pipeline.vectorstore, new)
+        self.assertEqual(pipeline.generation, "gen-000002")
+        self.assertFalse(pipeline.refresh_lock.locked())
+
+    @patch("src.pipeline.querying.OllamaLLM")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_ask(self, mock_manager, mock_llm):
+        mock_llm.return_value.invoke.return_value = "answer"
+        doc = MagicMock(page_content="def f(): pass", metadata={"file_path": "a.py", "start_line": 1, "end_line": 1})
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.vectorstore = MagicMock()
+        pipeline.vectorstore.similarity_search_with_score.return_value = [(doc, 0.1)]
+
+        response = pipeline.ask("question")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0]
+        self.assertIn("def f(): pass", prompt)
+        self.assertEqual(response["result"], "answer")
+        self.assertEqual(len(response["source_documents"]), 1)
+        self.assertGreater(response["stats"]["prompt_tokens"], 0)
+        self.assertIn("time_to_answer", response["stats"])
+        trace = response["trace"]
+        self.assertIn("build_prompt", [span["name"] for span in trace["spans"]])
+        self.assertEqual(trace["retrieval"][0]["score"], 0.1)
+        self.assertEqual(trace["tokens"]["prompt_estimate"], response["stats"]["prompt_tokens"])
+
+    @patch("src.pipeline.querying.MetadataTable")
+    @patch("src.pipeline.querying.OllamaLLM")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_ask_routes_broad_questions_to_summaries(self, mock_manager, mock_llm, mock_table):
+        mock_table.return_value.select.return_value = [3]
+        manager = mock_manager.return_value
+        manager.embeddings.embed_query.return_value = [0.1]
+        hit = MagicMock(
+            page_content="code",
+            metadata={"file_path": "repos/repo/src/a.py", "repo": "repo", "summary": "Reads input."},
+        )
+        manager.search_by_vector_in.return_value = [(hit, 0.2)]
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.vectorstore = MagicMock()
+        pipeline.summaries = MagicMock()
+        node = MagicMock(metadata={"node_id": "dir:src", "kind": "dir", "path": "src"})
+        pipeline.summaries.search.return_value = [(node, 0.1)]
+        pipeline.summaries.describe.return_value = "Directory: src\nSummary: The sources."
+
+        response = pipeline.ask("How is the src package organized?")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0]
+        self.assertIn("Summary: The sources.", prompt)
+        self.assertIn("Reads input.", prompt)
+        self.assertNotIn("code", prompt)  # drilled-down chunks are sent as summaries
+        mock_table.return_value.select.assert_called_once_with({"path": ["src/"]})
+        self.assertFalse(pipeline.vectorstore.similarity_search_with_score.called)
+        self.assertEqual(response["source_documents"], [node, hit])
+        self.assertEqual(response["stats"]["summaries"], 1)
+
+        pipeline.ask("why does parse() fail on empty files")
+        pipeline.vectorstore.similarity_search_with_score.assert_called_once()
 
+    @patch("src.pipeline.querying.OllamaLLM")
     @patch("src.pipeline.querying.VectorstoreManager")
-    def test_ask(self, mock_manager):
+    def test_ask_searches_summaries_of_refreshed_index(self, mock_manager, mock_llm):
+        mock_manager.return_value.embeddings.embed_query.return_value = [0.1]
         pipeline = QueryPipeline("https://github.com/user/repo")
-        pipeline.qa_chain = MagicMock()
-        pipeline.ask("question")
-        self.assertTrue(pipeline.qa_chain.invoke.called)
+        pipeline.vectorstore = MagicMock()
+        old, new = MagicMock(), MagicMock()
+        new.search.return_value = []
+        pipeline.summaries = old
+
+        def swap(wait=False):
+            pipeline.summaries = new
+
+        with patch.object(pipeline, "refresh", side_effect=swap):
+            pipeline.ask("How is this repo organized?")
+        new.search.assert_called_once()
+        self.assertFalse(old.search.called)
+
+    @patch("src.pipeline.querying.OllamaLLM")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_ask_adds_code_graph_neighbors(self, mock_manager, mock_llm):
+        hit = MagicMock(page_content="def main(): load()", metadata={"chunk_id": "main#1"})
+        callee = MagicMock(page_content="def load(): ...", metadata={"chunk_id": "io#1"})
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.vectorstore = MagicMock()
+        pipeline.vectorstore.similarity_search_with_score.return_value = [(hit, 0.1)]
+        pipeline.vectorstore.docstore.search.side_effect = {"io#1": callee}.get
+        pipeline.graph = CodeGraph(edges={"main#1": ["io#1", "gone#1"], "test#1": ["main#1"]})
+
+        response = pipeline.ask("why does main fail")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0]
+        self.assertIn("def load(): ...", prompt)
+        self.assertEqual(response["stats"]["neighbors"], 1)  # gone#1 is not stored
+        self.assertEqual(
+            [doc.metadata["chunk_id"] for doc in response["source_documents"]],
+            ["main#1", "io#1"],
+        )
+
+        # Neighbors may lie outside the filters, so filtered questions get none
+        pipeline.search = MagicMock(return_value=[(hit, 0.1)])
+        response = pipeline.ask("why does main fail lang:python")
+        self.assertEqual(response["stats"]["neighbors"], 0)
+
+    @patch("src.pipeline.querying.MetadataTable")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_search_with_filters(self, mock_manager, mock_table):
+        mock_table.return_value.select.return_value = [3]
+        manager = mock_manager.return_value
+        manager.embeddings.embed_query.return_value = [0.1]
+        manager.search_by_vector_in.return_value = [(MagicMock(page_content="hit", metadata={}), 0.2)]
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.vectorstore = MagicMock()
+
+        results = pipeline.search("where is x lang:python", k=2)
+
+        manager.embeddings.embed_query.assert_called_once_with("where is x")
+        mock_table.return_value.select.assert_called_once_with({"lang": ["python"]})
+        manager.search_by_vector_in.assert_called_once_with(pipeline.vectorstore, [0.1], 2, [3])
+        self.assertFalse(pipeline.vectorstore.similarity_search_with_score.called)
+        self.assertEqual(results[0][1], 0.2)
+
+    @patch("src.pipeline.querying.MetadataTable")
+    @patch("src.pipeline.querying.OllamaLLM")
+    @patch("src.pipeline.querying.VectorstoreManager")
+    def test_ask_prompt_leaves_out_filter_predicates(self, mock_manager, mock_llm, mock_table):
+        mock_table.return_value.select.return_value = [3]
+        manager = mock_manager.return_value
+        manager.embeddings.embed_query.return_value = [0.1]
+        manager.search_by_vector_in.return_value = []
+        pipeline = QueryPipeline("https://github.com/user/repo")
+        pipeline.vectorstore = MagicMock()
+
+        pipeline.ask("where is x parsed? lang:python path:src/")
+
+        prompt = mock_llm.return_value.invoke.call_args[0][0]
+        self.assertIn("Question: where is x parsed?\n", prompt)
+        self.assertNotIn("lang:python", prompt)
+
+    def test_collapse_duplicates(self):
+        first = MagicMock(page_content="same", metadata={"file_path": "a.py", "start_line": 1, "end_line": 2,
+                                                         "duplicates": [{"file_path": "c.py", "start_line": 5, "end_line": 6}]})
+        second = MagicMock(page_content="same", metadata={"file_path": "b.py", "start_line": 3, "end_line": 4})
+        other = MagicMock(page_content="other", metadata={"file_path": "d.py"})
+
+        docs = collapse_duplicates([first, second, other])
+
+        self.assertEqual(len(docs), 2)
+        self.assertEqual(
+            [loc["file_path"] for loc in docs[0].metadata["locations"]],
+            ["a.py", "c.py", "b.py"],
+        )
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
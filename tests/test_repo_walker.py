@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from src.utils.repo_walker import RepositoryWalker
+
+
+class TestRepositoryWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp_dir.name, "repo")
+        files = {
+            ".gitignore": "node_modules/\n*.log\n",
+            ".git/info/exclude": "secret.txt\n",
+            ".git/HEAD": "ref: refs/heads/main\n",
+            "main.py": "print('hi')\n",
+            "secret.txt": "x\n",
+            "debug.log": "x\n",
+            "node_modules/lib/index.js": "x\n",
+            "src/app.py": "x\n",
+            "src/.gitignore": "build/\n!keep.log\n",
+            "src/keep.log": "x\n",
+            "src/build/out.py": "x\n",
+        }
+        for rel_path, content in files.items():
+            path = os.path.join(self.repo, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_walk_honors_nested_ignores(self):
+        walker = RepositoryWalker(self.repo)
+        rel_paths = [rel_path for _, rel_path, _ in walker.walk()]
+
+        self.assertEqual(
+            rel_paths,
+            [".gitignore", "main.py", "src/.gitignore", "src/app.py", "src/keep.log"],
+        )
+
+    def test_tree_lists_only_walked_entries(self):
+        walker = RepositoryWalker(self.repo)
+        for _, _, stat in walker.walk():
+            self.assertGreater(stat.st_size, 0)
+
+        self.assertEqual(
+            walker.tree,
+            "repo/\n    .gitignore\n    main.py\n    src/\n        .gitignore\n"
+            "        app.py\n        keep.log",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.utils.retry_queue import RetryQueue
+
+CHUNK = {"chunk_id": "a.py#1", "file_path": "repos/r/a.py"}
+
+
+@patch("src.utils.retry_queue.ENRICH_RETRY_BACKOFF", 10)
+@patch("src.utils.retry_queue.ENRICH_MAX_ATTEMPTS", 3)
+class TestRetryQueue(unittest.TestCase):
+    def test_backoff_doubles_until_the_attempt_limit(self):
+        queue = RetryQueue()
+        queue.record_failure(CHUNK, "timeout", now=100)
+        self.assertEqual(queue.due(now=105), [])
+        self.assertEqual(queue.due(within=5, now=105), [(110, "a.py#1")])
+
+        queue.record_failure(CHUNK, "HTTP 500", now=110)
+        self.assertEqual(queue.due_at("a.py#1"), 130)
+        self.assertEqual(queue.errors(), {"HTTP 500": 1})
+
+        queue.record_failure(CHUNK, "HTTP 500", now=130)
+        self.assertEqual(queue.due(now=10**6), [])
+        self.assertEqual(queue.due(force=True, now=131), [(131, "a.py#1")])
+
+        queue.record_success("a.py#1")
+        self.assertEqual(len(queue), 0)
+
+    def test_prune_and_persistence(self):
+        queue = RetryQueue()
+        queue.record_failure(CHUNK, "timeout", now=1)
+        queue.record_failure({"chunk_id": "gone#1", "file_path": "gone.py"}, "timeout", now=1)
+        queue.record_failure({"chunk_id": "b.py#1", "file_path": "b.py"}, "timeout", now=1)
+        queue.prune({"a.py#1": CHUNK, "b.py#1": {"duplicate_of": "a.py#1"}})
+        self.assertEqual(list(queue.entries), ["a.py#1"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "retry.json")
+            queue.save(path)
+            loaded = RetryQueue.load(path)
+        self.assertEqual(loaded.entries["a.py#1"]["attempts"], 1)
+        self.assertEqual(len(RetryQueue.load(None)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
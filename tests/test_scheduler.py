@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.llm import scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = patch.object(
+            scheduler, "ANSWERS_DIR", os.path.join(self.tmp.name, "answers")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_answers_are_visible_while_generated(self):
+        self.assertFalse(scheduler.answers_in_progress())
+        with scheduler.answering():
+            self.assertTrue(scheduler.answers_in_progress())
+            # Markers left behind by a crashed process expire
+            self.assertFalse(scheduler.answers_in_progress(now=10**12))
+        self.assertFalse(scheduler.answers_in_progress())
+        self.assertFalse(os.path.exists(scheduler.ANSWERS_DIR))
+
+    @patch("src.llm.scheduler.time.sleep")
+    def test_enrichment_yields_to_answers_for_a_bounded_time(self, mock_sleep):
+        scheduler.yield_to_answers()
+        mock_sleep.assert_not_called()
+
+        with scheduler.answering():
+            waited = scheduler.yield_to_answers(max_wait=0.05)
+        self.assertGreaterEqual(waited, 0.05)
+        mock_sleep.assert_called_with(scheduler.ENRICH_YIELD_INTERVAL)
+
+
+if __name__ == "__main__":
+    unittest.main()
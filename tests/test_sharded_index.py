@@ -0,0 +1,100 @@
+import os
+import json
+import unittest
+import tempfile
+from unittest.mock import patch
+import faiss
+from src.components.chunk_index import ChunkIndex
+from src.components.sharded_index import ShardedIndex, SHARDS_FILE, SMALL_SHARD
+
+
+def chunk(path, vector):
+    return (path, vector), {"file_path": path, "chunk_id": path}
+
+
+@patch("src.components.sharded_index.SHARD_MIN_CHUNKS", 2)
+class TestShardedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ShardedIndex(2, by="directory")
+        self.add(
+            [
+                chunk("src/a.py", [0.0, 0.0]),
+                chunk("src/b.py", [1.0, 0.0]),
+                chunk("docs/c.md", [5.0, 5.0]),
+                chunk("setup.py", [0.1, 0.0]),
+            ]
+        )
+
+    def add(self, chunks):
+        pairs, metadatas = zip(*chunks)
+        self.index.add_embeddings(pairs, list(metadatas), [m["chunk_id"] for m in metadatas])
+
+    def _search(self, index, **kwargs):
+        results = index.similarity_search_with_score_by_vector([0.0, 0.0], **kwargs)
+        return [doc.page_content for doc, _ in results]
+
+    def test_rebalance_gives_large_directories_their_own_shard(self):
+        # New directories start in the small shard
+        self.assertEqual(list(self.index.shards), [SMALL_SHARD])
+
+        self.assertEqual(self.index.rebalance(by="directory"), 2)
+        self.assertEqual(sorted(self.index.shards), ["dir-src", SMALL_SHARD])
+        self.assertEqual(self.index.chunk_shard["docs/c.md"], SMALL_SHARD)
+        self.assertEqual(len(self.index), 4)
+
+        # Searches merge the hits of every shard
+        self.assertEqual(self._search(self.index, k=3), ["src/a.py", "setup.py", "src/b.py"])
+        faiss_ids = [self.index.shards["dir-src"].chunk_to_id["src/b.py"]]
+        self.assertEqual(self._search(self.index, k=3, faiss_ids=faiss_ids), ["src/b.py"])
+
+    def test_only_changed_shards_are_rewritten(self):
+        self.index.rebalance(by="directory")
+        with tempfile.TemporaryDirectory() as root:
+            first = os.path.join(root, "gen-1")
+            self.assertEqual(sorted(self.index.save_local(first)), ["dir-src", SMALL_SHARD])
+            self.index.mark_saved(first)
+
+            loaded = ShardedIndex.load_local(first)
+            self.assertEqual(self._search(loaded, k=4), self._search(self.index, k=4))
+
+            loaded.delete(["docs/c.md"])
+            second = os.path.join(root, "gen-2")
+            self.assertEqual(loaded.save_local(second), [SMALL_SHARD])
+            # The untouched shard is the same file, linked from the first generation
+            index_file = os.path.join("shards", "dir-src", "index.faiss")
+            self.assertTrue(
+                os.path.samefile(os.path.join(first, index_file), os.path.join(second, index_file))
+            )
+            with open(os.path.join(second, SHARDS_FILE), "r", encoding="utf-8") as f:
+                layout = json.load(f)
+        self.assertEqual(layout["shards"][SMALL_SHARD]["chunks"], 1)
+        self.assertEqual(layout["large_keys"], ["src"])
+
+    def test_small_directories_are_merged_back(self):
+        self.index.rebalance(by="directory")
+        self.index.delete(["src/b.py"])
+        self.index.rebalance(by="directory")
+        self.assertEqual(list(self.index.shards), [SMALL_SHARD])
+        self.assertEqual(self._search(self.index, k=4), ["src/a.py", "setup.py", "docs/c.md"])
+
+    def test_ids_are_unique_across_shards(self):
+        self.index.rebalance(by="size")
+        self.add([chunk("lib/d.py", [2.0, 2.0])])
+        ids = list(self.index.index_to_docstore_id)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 5)
+
+    def test_inner_product_shards_merge_highest_first(self):
+        index = ShardedIndex(2, by="directory")
+        for name, chunks in (("a", [("a.py", [1.0, 0.0])]), ("b", [("b.py", [0.5, 0.0])])):
+            index.shards[name] = ChunkIndex(2, index=faiss.IndexIDMap2(faiss.IndexFlatIP(2)))
+            pairs = [(path, vector) for path, vector in chunks]
+            ids = [path for path, _ in chunks]
+            index.shards[name].add_embeddings(pairs, [{} for _ in ids], ids)
+
+        results = index.similarity_search_with_score_by_vector([1.0, 0.0], k=1)
+        self.assertEqual([doc.page_content for doc, _ in results], ["a.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()
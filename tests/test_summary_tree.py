@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+from src.components.summary_tree import SummaryTree, is_broad_query
+
+
+def chunk(path, summary, start_line=1):
+    return {
+        "file_path": f"repos/repo/{path}",
+        "repo": "repo",
+        "summary": summary,
+        "start_line": start_line,
+    }
+
+
+def embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestSummaryTree(unittest.TestCase):
+    def setUp(self):
+        self.jobs = []
+
+    def summarize(self, jobs):
+        self.jobs.extend((kind, path) for kind, path, _ in jobs)
+        return [{"summary": f"About {path or 'root'}."} for _, path, _ in jobs]
+
+    def test_update_is_bottom_up_and_incremental(self):
+        chunks = [
+            chunk("src/a.py", "Parses input.", 1),
+            chunk("src/a.py", "Writes output.", 20),
+            chunk("src/b.py", "Helpers."),
+            chunk("README.md", "Project readme."),
+            {"file_path": "repository_structure.txt", "summary": "Tree."},
+        ]
+        tree = SummaryTree()
+        self.assertEqual(tree.update(chunks, self.summarize, embed), 5)
+        # Single-part nodes reuse their part's summary without a model call
+        self.assertEqual(self.jobs, [("file", "src/a.py"), ("dir", "src"), ("dir", "")])
+        self.assertEqual(tree.nodes["file:src/b.py"]["summary"], "Helpers.")
+        self.assertEqual(tree.nodes["dir:"]["children"], ["dir:src", "file:README.md"])
+        self.assertEqual(len(tree.index), 5)
+
+        # Only the nodes along the changed path are rebuilt
+        self.jobs.clear()
+        chunks[2]["summary"] = "Shared helpers."
+        self.assertEqual(tree.update(chunks, self.summarize, embed), 2)
+        self.assertEqual(self.jobs, [("dir", "src")])
+
+        # Removed files drop out of the tree and the coarse index
+        self.assertEqual(tree.update(chunks[:2] + chunks[3:], self.summarize, embed), 2)
+        self.assertNotIn("file:src/b.py", tree.nodes)
+        self.assertEqual(len(tree.index), 4)
+
+    def test_failed_summaries_are_retried(self):
+        chunks = [chunk("a.py", "One.", 1), chunk("a.py", "Two.", 9)]
+        tree = SummaryTree()
+        tree.update(chunks, lambda jobs: [{"summary": "", "error": "timeout"}] * len(jobs), embed)
+        self.assertEqual(tree.nodes["file:a.py"]["summary"], "One. Two.")
+
+        self.assertEqual(tree.update(chunks, self.summarize, embed), 2)  # and the root
+        self.assertEqual(tree.nodes["file:a.py"]["summary"], "About a.py.")
+        self.assertEqual(tree.nodes["dir:"]["summary"], "About a.py.")
+
+    def test_save_load_and_search(self):
+        tree = SummaryTree()
+        tree.update(
+            [chunk("pkg/a.py", "A."), chunk("pkg/b.py", "B.")], self.summarize, embed
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            tree.save(tmp)
+            loaded = SummaryTree.load(tmp)
+            self.assertEqual(loaded.nodes, tree.nodes)
+            [(doc, _)] = loaded.search([float(len("Directory: pkg\nAbout pkg.")), 1.0], 1)
+            self.assertEqual(doc.metadata["node_id"], "dir:pkg")
+            self.assertIn("- a.py: A.", loaded.describe("dir:pkg"))
+            self.assertEqual(len(SummaryTree.load(tmp + "/missing")), 0)
+
+    def test_is_broad_query(self):
+        self.assertTrue(is_broad_query("How is this repo organized?"))
+        self.assertTrue(is_broad_query("What does the pipeline package do?"))
+        self.assertFalse(is_broad_query("Why does parse() fail on empty files?"))
+        self.assertTrue(is_broad_query("What is the architecture of this project?"))
+        self.assertTrue(is_broad_query("Which module is responsible for retries?"))
+        self.assertFalse(is_broad_query("How is the Config dataclass structured?"))
+        self.assertFalse(is_broad_query("What layout does render() use?"))
+        self.assertFalse(is_broad_query("Which function is responsible for retries?"))
+
+
+if __name__ == "__main__":
+    unittest.main()
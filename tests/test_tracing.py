@@ -0,0 +1,67 @@
+import os
+import json
+import tempfile
+import unittest
+import contextvars
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.tracing import (
+    QueryTrace,
+    LLMTimer,
+    span,
+    record_hits,
+    append_trace,
+    format_trace,
+)
+
+
+class TestTracing(unittest.TestCase):
+    def test_spans_are_recorded_while_active(self):
+        def search_shard():
+            with span("faiss_search"):
+                pass
+
+        search_shard()  # no active trace: nothing to record in
+        trace = QueryTrace("question", "repo")
+        with trace.activate():
+            with span("embed_query"):
+                pass
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                executor.submit(search_shard).result()  # threads start with no trace
+                # Shards searched in parallel record through copies of the context
+                contexts = [contextvars.copy_context() for _ in range(2)]
+                list(executor.map(lambda context: context.run(search_shard), contexts))
+            record_hits([(MagicMock(metadata={"chunk_id": "a#1", "file_path": "a.py"}), 0.25)])
+
+        record = trace.to_dict()
+        self.assertEqual([s["name"] for s in record["spans"]], ["embed_query", "faiss_search"])
+        self.assertEqual(record["spans"][1]["count"], 2)
+        self.assertEqual(record["retrieval"][0]["id"], "a#1")
+        self.assertEqual(record["retrieval"][0]["score"], 0.25)
+
+    def test_llm_timer(self):
+        trace = QueryTrace("question")
+        timer = LLMTimer(trace)
+        timer.on_llm_start({}, ["prompt"])
+        timer.on_llm_new_token("The")
+        timer.on_llm_new_token(" answer")
+        response = MagicMock()
+        response.generations = [[MagicMock(generation_info={"prompt_eval_count": 120, "eval_count": 30})]]
+        timer.on_llm_end(response)
+
+        record = trace.to_dict()
+        self.assertEqual([s["name"] for s in record["spans"]], ["llm_first_token", "llm_generation"])
+        self.assertEqual(record["tokens"], {"prompt": 120, "completion": 30})
+        self.assertIn("llm_generation", format_trace(record))
+
+    def test_append_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logs", "traces.jsonl")
+            append_trace(QueryTrace("one").to_dict(), path)
+            append_trace(QueryTrace("two").to_dict(), path)
+            with open(path) as f:
+                self.assertEqual([json.loads(line)["query"] for line in f], ["one", "two"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,41 +1,70 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import os
+from langchain_core.documents import Document
 from src.components.vectorstore import VectorstoreManager
+from config.settings import COMPACTION_THRESHOLD
 
 class TestVectorstoreManager(unittest.TestCase):
     @patch("src.components.vectorstore.OllamaEmbeddings")
-    @patch("src.components.vectorstore.FAISS")
-    def test_create_vectorstore(self, mock_faiss, mock_embeddings):
+    @patch("src.components.vectorstore.ShardedIndex")
+    def test_create_vectorstore(self, mock_index, mock_embeddings):
         manager = VectorstoreManager()
         chunks = [{"content": "content", "summary": "summary", "keywords": "keywords"}]
         
         # Mock the embedding dimension
-        mock_embeddings.return_value.embed_query.return_value = [0.1] * 10
+        mock_embeddings.return_value.embed_documents.return_value = [[0.1] * 10]
         
         manager.create_vectorstore(chunks)
-        self.assertTrue(mock_faiss.called)
+        mock_index.assert_called_once_with(10, manager.embeddings)
+        self.assertTrue(mock_index.return_value.add_embeddings.called)
 
-    @patch("src.components.vectorstore.FAISS")
+    @patch("src.components.vectorstore.OllamaEmbeddings")
+    def test_update_metadata_keeps_text_out_of_metadata(self, mock_embeddings):
+        manager = VectorstoreManager()
+        chunk = {
+            "chunk_id": "a.py#1", "file_path": "a.py", "start_line": 1, "end_line": 2,
+            "content": "code", "summary": "Sum.", "keywords": "kw",
+        }
+        doc = Document(page_content="codeSum.kw", metadata={"chunk_id": "a.py#1", "summary": "Sum."})
+        vectorstore = MagicMock()
+        vectorstore.docstore.search.return_value = doc
+
+        manager.update_metadata(vectorstore, [dict(chunk, start_line=11, end_line=12)])
+        self.assertNotIn("summary", doc.metadata)
+        self.assertNotIn("content", doc.metadata)
+        self.assertEqual(doc.metadata["start_line"], 11)
+        self.assertEqual(doc.metadata["text_spans"], [4, 4])
+        vectorstore.touch.assert_called_once_with(["a.py#1"])
+
+    @patch("src.components.vectorstore.repo_generations")
+    @patch("src.components.vectorstore.ShardedIndex")
     @patch("os.path.exists")
-    def test_save_and_load(self, mock_exists, mock_faiss):
+    def test_save_and_load(self, mock_exists, mock_index, mock_generations):
         # Ensure os.path.exists returns True for the load operation
         mock_exists.return_value = True
         
         manager = VectorstoreManager()
         mock_vectorstore = MagicMock()
         
-        db_path = os.path.join(manager.db_path, "repo_vectorstore")
-        
-        # Test save
+        store = mock_generations.return_value
+        store.root = os.path.join(manager.db_path, "repo_vectorstore")
+        store.stage.return_value = os.path.join(store.root, ".gen-000002.1.tmp")
+        store.current.return_value = store.commit.return_value = "gen-000002"
+        db_path = os.path.join(store.root, "gen-000002")
+
+        # Test save: written to a staging directory, then committed
         manager.save(mock_vectorstore, "repo")
-        mock_vectorstore.save_local.assert_called_with(db_path)
-        
-        # Test load
+        mock_vectorstore.save_local.assert_called_with(store.stage.return_value)
+        store.commit.assert_called_once_with(store.stage.return_value)
+        # Fragmented shards are compacted and rebalanced before they are written
+        mock_vectorstore.rebalance.assert_called_once()
+        mock_vectorstore.compact.assert_called_once_with(COMPACTION_THRESHOLD)
+        mock_vectorstore.mark_saved.assert_called_once_with(db_path)
+
+        # Test load: the current generation
         manager.load("repo")
-        mock_faiss.load_local.assert_called_with(
-            db_path, manager.embeddings, allow_dangerous_deserialization=True
-        )
+        mock_index.load_local.assert_called_with(db_path, manager.embeddings, mmap=False)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file